@@ -1,75 +1,52 @@
 # app.py
 
 import streamlit as st
-from pydantic import BaseModel
+import pandas as pd
 from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-import uuid
-from modules.data_manager import DataManager
-from modules.invoice_gen import InvoiceGenerator
-from modules.email_handler import EmailHandler
-from modules.workflow import WorkflowManager
 from modules.validator import DataValidator
-from modules.kyc_manager import KYCManager
-
-class WorkflowState(BaseModel):
-    customer: Dict[str, Any]
-    invoice: Dict[str, Any]
-    validation_status: Optional[Dict[str, Any]] = None
-    invoice_creation_status: Optional[Dict[str, Any]] = None
-    email_notification_status: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
-    completed: bool = False
+from modules.workflow_state import WorkflowState
+from modules.systems import systems
+from modules.receivables_summary import ReceivablesSummary
+from modules.event_log import log_event
 
 
 class InvoiceApp:
     def __init__(self):
-        if not hasattr(st.session_state, 'workflow_manager'):
-            st.session_state.workflow_manager = self.init_systems()
-        
+        # Systems are shared by every session in the process, only per-user state lives in session_state
         if not hasattr(st.session_state, 'state'):
-            st.session_state.state = WorkflowState(
-                customer={
-                    'cust_unique_id': '',
-                    'cust_tax_id': '',
-                    'cust_fname': '',
-                    'cust_lname': '',
-                    'cust_email': ''
-                },
-                invoice={
-                    'transaction_id': '',
-                    'transaction_date': '',
-                    'billed_amount': 0.0,
-                    'currency': 'USD',
-                    'payment_due_date': '',
-                    'payment_status': 'pending'
-                }
-            )
-        
-        self.kyc_manager = KYCManager()
-        self.workflow_manager = st.session_state.workflow_manager
+            st.session_state.state = WorkflowState.empty()
+
+        self.init_systems()
+        self.kyc_manager = systems.get('kyc_manager')
+        self.kyc_manager.initialize_session_state()
         self.validator = DataValidator()
         self.state = st.session_state.state
 
 
     @staticmethod
     def init_systems():
+        """Warm up what every rerun renders, invoice systems are built on first use"""
         try:
-            data_manager = DataManager()
-            invoice_generator = InvoiceGenerator()
-            email_handler = EmailHandler()
-            return WorkflowManager(data_manager, invoice_generator, email_handler, WorkflowState)
+            systems.warm_up(['metrics_exporter', 'kyc_manager'])
         except Exception as e:
             st.error(f"System initialization failed: {str(e)}")
-            return None
+
+
+    @property
+    def data_manager(self):
+        return systems.get('data_manager')
+
+
+    @property
+    def workflow_manager(self):
+        # Built on the first generate, which is when langgraph, reportlab and smtplib get imported
+        return systems.get('workflow_manager')
 
 
     def update_state(self, customer_id: str, tax_id: str, first_name: str, 
                     last_name: str, email: str, amount: float, currency: str, payment_status: str):
         """Update state with new data"""
-        now = datetime.now()
-        transaction_id = str(uuid.uuid4())
-        
         self.state.customer.update({
             'cust_unique_id': customer_id,
             'cust_tax_id': tax_id,
@@ -78,20 +55,13 @@ class InvoiceApp:
             'cust_email': email
         })
         
-        self.state.invoice.update({
-            'transaction_id': transaction_id,
-            'transaction_date': now.strftime('%Y-%m-%d'),
-            'billed_amount': amount,
-            'currency': currency,
-            'payment_due_date': (now + timedelta(days=30)).strftime('%Y-%m-%d'),
-            'payment_status': payment_status.lower()
-        })
+        self.state.invoice.update(WorkflowState.new_invoice(amount, currency, payment_status))
 
 
     def search_customer(self, customer_id: str):
         """Search customer and update state"""
         try:
-            result = self.workflow_manager.data_manager.get_customer(customer_id, WorkflowState)
+            result = self.data_manager.get_customer(customer_id, WorkflowState)
             
             if result:
                 self.state.customer.update(result.customer)
@@ -121,14 +91,15 @@ class InvoiceApp:
                 return
 
             # Save to CSV immediately after validation
-            updated_state = self.workflow_manager.data_manager.save_record(self.state.dict())
+            updated_state = self.data_manager.save_record(self.state.dict(), WorkflowState)
 
             if updated_state:
                 self.state.customer.update(updated_state.customer)
                 self.state.invoice.update(updated_state.invoice)
                 self.state.completed = updated_state.completed
                 st.success("Record saved successfully")
-                print("*****\n\n Debugging point in handle_submit: cust_unique_id : ", self.state.customer['cust_unique_id'])
+                log_event('record_saved', cust_unique_id=self.state.customer['cust_unique_id'],
+                          transaction_id=self.state.invoice['transaction_id'])
             else:
                 st.error("Failed to save record")
                 return
@@ -137,42 +108,103 @@ class InvoiceApp:
             st.error(f"Submission failed: {str(e)}")
 
 
-    def handle_generate_invoice(self):
-        """Handle invoice generation"""
-        print("\n\nDebug - Customer ID at start of generate:", self.state.customer['cust_unique_id'])
+    @staticmethod
+    def run_invoice_workflow(workflow_state: WorkflowState, force: bool = False) -> WorkflowState:
+        """Background job: render and send the invoice of a workflow state"""
+        return systems.get('workflow_manager').run_workflow(workflow_state, force=force)
+
+
+    def handle_generate_invoice(self, force: bool = False):
+        """Queue invoice generation as a background job, the tab polls it until it finishes"""
+        log_event('invoice_generate_requested', cust_unique_id=self.state.customer['cust_unique_id'], force=force)
 
         if self.state.customer['cust_unique_id'] == '':
             st.error("Please submit record first")
             return
 
-        result = self.workflow_manager.run_workflow(self.state)
-        print("\n\nDebug - Workflow result:", result.dict() if result else "No result")
+        job_runner = systems.get('job_runner')
+        if job_runner.is_active(st.session_state.get('invoice_job_id')):
+            st.warning("Invoice generation is already in progress")
+            return
+
+        try:
+            # The job works on a copy, the session state is only replaced once it finishes
+            st.session_state.invoice_job_id = job_runner.submit(
+                'invoice', self.run_invoice_workflow, self.state.copy(deep=True), force=force
+            )
+            # The result is only applied while the session still shows this transaction
+            st.session_state.invoice_job_transaction_id = self.state.invoice['transaction_id']
+        except Exception as e:
+            st.error(f"Could not start invoice generation: {str(e)}")
+
+
+    def apply_invoice_result(self, job: Dict[str, Any]):
+        """
+        Report a finished invoice job and keep its workflow state, unless the
+        operator has moved on to another record since the job was submitted
+        """
+        transaction_id = st.session_state.pop('invoice_job_transaction_id', None)
+        if job['status'] == 'failed':
+            st.error(f"Workflow execution failed: {job['error']}")
+            return
+
+        result = job['result']
+        if result is None:
+            log_event('invoice_job_finished', level='warning', job_id=job['job_id'],
+                      duration_seconds=job['duration_seconds'], transaction_id=transaction_id,
+                      error="no result")
+            st.error("Invoice generation finished without a result")
+            return
+
+        log_event('invoice_job_finished', job_id=job['job_id'], duration_seconds=job['duration_seconds'],
+                  transaction_id=transaction_id, error=result.error)
         if result.error:
             st.error(result.error)
+            return
+
+        if self.state.invoice['transaction_id'] != transaction_id:
+            # Keep the record the operator is working on now
+            st.info(f"Invoice of transaction {transaction_id} was generated and sent to {result.customer['cust_email']}")
+            return
+
+        self.state = result
+        st.session_state.state = result
+        if result.email_notification_status and result.email_notification_status.get('skipped'):
+            st.info(f"Invoice already sent to {result.customer['cust_email']} on "
+                    f"{result.email_notification_status['sent_at']}. Tick 'Force resend' to send it again.")
         else:
-            self.state = result
             st.success(f"Invoice generated and sent to {result.customer['cust_email']}")
 
 
+    def render_invoice_job(self):
+        """Progress of this session's invoice job, its outcome once it has finished"""
+        job_id = st.session_state.get('invoice_job_id')
+        if not job_id:
+            return
+
+        job_runner = systems.get('job_runner')
+        job = job_runner.status(job_id)
+        if job is None or job['status'] not in job_runner.ACTIVE:
+            st.session_state.invoice_job_id = None
+            if job is not None:
+                self.apply_invoice_result(job)
+            return
+
+        # Only this fragment reruns while the job is in progress, then the whole page once
+        @st.fragment(run_every=self.kyc_manager.config.JOB_POLL_SECONDS)
+        def poll_invoice_job():
+            current = job_runner.status(job_id)
+            if current is not None and current['status'] in job_runner.ACTIVE:
+                st.info(f"Generating and sending invoice ({current['status']})...")
+            else:
+                st.rerun()
+
+        poll_invoice_job()
+
+
     def reset_state(self):
         """Reset the state"""
-        new_state = WorkflowState(
-            customer={
-                'cust_unique_id': '',
-                'cust_tax_id': '',
-                'cust_fname': '',
-                'cust_lname': '',
-                'cust_email': ''
-            },
-            invoice={
-                'transaction_id': '',
-                'transaction_date': '',
-                'billed_amount': 0.0,
-                'currency': 'USD',
-                'payment_due_date': '',
-                'payment_status': 'pending'
-            }
-        )
+        new_state = WorkflowState.empty()
 
         # Reset both instance state and session state
         self.state = new_state
@@ -190,8 +222,8 @@ class InvoiceApp:
         st.title("Invoice & KYC Management System")
 
 
-        # Create tabs for Invoice and KYC
-        tab1, tab2 = st.tabs(["Invoice Management", "KYC Management"])
+        # Create tabs for Invoice, KYC and the receivables overview
+        tab1, tab2, tab3 = st.tabs(["Invoice Management", "KYC Management", "Overview"])
 
         with tab1:
             # Your existing invoice management UI code
@@ -203,6 +235,51 @@ class InvoiceApp:
                 self.state.customer.get('cust_unique_id') if self.state.customer else None
             )
 
+        with tab3:
+            self.render_overview_tab()
+
+
+    def render_overview_tab(self):
+        """Receivables totals, overdue invoices and top debtors from the materialized summary"""
+        try:
+            summary = self.data_manager.get_receivables_summary()
+        except Exception as e:
+            st.error(f"Could not load receivables summary: {str(e)}")
+            return
+
+        totals = ReceivablesSummary.totals_frame(summary)
+        overdue = ReceivablesSummary.overdue(summary)
+        outstanding = totals[totals['status'].isin(ReceivablesSummary.OUTSTANDING_STATUSES)]
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Invoices", summary['records'])
+        col2.metric("Outstanding", int(outstanding['count'].sum()))
+        col3.metric("Overdue", overdue['count'])
+
+        if not outstanding.empty:
+            by_currency = outstanding.groupby('currency')['amount'].sum()
+            st.write("Outstanding: " + ", ".join(
+                f"{amount:,.2f} {currency}" for currency, amount in by_currency.items()
+            ))
+        if overdue['amounts']:
+            st.write("Overdue: " + ", ".join(
+                f"{amount:,.2f} {currency}" for currency, amount in sorted(overdue['amounts'].items())
+            ))
+
+        st.subheader("Totals by currency and status")
+        st.dataframe(totals, hide_index=True, use_container_width=True)
+
+        st.subheader("Top debtors")
+        if not summary['top_debtors']:
+            st.info("No outstanding invoices")
+        for currency, debtors in sorted(summary['top_debtors'].items()):
+            st.write(currency)
+            st.dataframe(
+                pd.DataFrame(debtors, columns=['Customer ID', 'Name', 'Outstanding']),
+                hide_index=True, use_container_width=True
+            )
+        st.caption(f"Summary updated {summary['updated_at']}")
+
 
     def render_invoice_tab(self):
         # Main container with custom width
@@ -286,8 +363,9 @@ class InvoiceApp:
                         use_container_width=True,
                         key="generate_button"):
                     
-                    print("\n\nDebug in Generate & Send Invoice - State before generate invoice:", self.state.dict())
-                    self.handle_generate_invoice()
+                    self.handle_generate_invoice(force=st.session_state.get('force_resend', False))
+                st.checkbox("Force resend", key="force_resend",
+                    help="Send the invoice again even if it was already delivered")
             
             with col3:
                 if st.button("🔄 Reset",
@@ -296,6 +374,8 @@ class InvoiceApp:
                         key="reset_button"):
                         self.reset_state()
 
+            self.render_invoice_job()
+
             # Current Record Display
             if self.state.customer['cust_unique_id']:
                 st.markdown("---")
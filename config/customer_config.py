@@ -2,7 +2,7 @@
 
 import os
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 @dataclass
 class CustomerConfig:
@@ -14,6 +14,66 @@ class CustomerConfig:
     CUSTOMER_DATA_FILE = "data/customer_records.csv"
     INVOICE_DATA_FILE = "data/invoice_records.csv"
 
+    # KYC storage engine: 'sqlite' (KYC_DB_FILE, seeded from KYC_DATA_FILE) or 'csv'
+    KYC_STORAGE_BACKEND = os.getenv('KYC_STORAGE_BACKEND', 'sqlite')
+    KYC_DB_FILE = "data/kyc_records.db"
+
+    # Reject reports written by the bulk KYC import
+    KYC_IMPORT_REPORT_DIR = "data/import_reports"
+
+    # Expired and expiring documents found by the last expiry scan
+    KYC_EXPIRY_FLAGS_FILE = "data/kyc_expiry_flags.csv"
+
+    # Append-only journal of KYC changes, with a full snapshot every N journal entries
+    # (taken in the background) of which the newest KYC_JOURNAL_SNAPSHOTS_KEPT are kept
+    KYC_JOURNAL_FILE = "data/kyc_journal.jsonl"
+    KYC_JOURNAL_SNAPSHOT_DIR = "data/kyc_journal_snapshots"
+    KYC_JOURNAL_SNAPSHOT_INTERVAL = 1000
+    KYC_JOURNAL_SNAPSHOTS_KEPT = int(os.getenv('KYC_JOURNAL_SNAPSHOTS_KEPT', 5))
+
+    # Local HTTP API of the headless service (python -m modules.service serve)
+    SERVICE_API_HOST = os.getenv('SERVICE_API_HOST', '127.0.0.1')
+    SERVICE_API_PORT = int(os.getenv('SERVICE_API_PORT', 8765))
+
+    # Background jobs: worker threads per job type, queued plus running jobs allowed per type,
+    # finished jobs kept for polling and how often the UI polls
+    JOB_POOL_SIZES: Dict[str, int] = field(default_factory=lambda: {
+        'invoice': 4,
+        'kyc_pdf_batch': 1
+    })
+    JOB_MAX_PENDING: int = 100
+    JOB_HISTORY_LIMIT: int = 1000
+    JOB_POLL_SECONDS: float = 1.0
+
+    # Outgoing mail server; SMTP_STARTTLS=0 for plain connections (e.g. a local test sink),
+    # login happens only when GMAIL_APP_PASSWORD is set
+    SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
+    SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '1').lower() not in ('0', 'false', 'no')
+    SMTP_TIMEOUT_SECONDS = float(os.getenv('SMTP_TIMEOUT_SECONDS', 30))
+
+    # An invoice email reserved in the send ledger but neither sent nor released within this
+    # time (the sending process died) may be reserved again
+    SEND_RESERVATION_TIMEOUT_SECONDS = float(os.getenv('SEND_RESERVATION_TIMEOUT_SECONDS', 300))
+
+    # Metrics (modules/metrics.py): Prometheus textfile rewritten every interval, also served
+    # at GET /metrics by the service API; an empty METRICS_TEXTFILE disables the textfile
+    METRICS_TEXTFILE = os.getenv('METRICS_TEXTFILE', 'data/metrics.prom')
+    METRICS_EXPORT_INTERVAL_SECONDS = float(os.getenv('METRICS_EXPORT_INTERVAL_SECONDS', 15))
+
+    # Structured event log (modules/event_log.py): minimum level and share of debug/info
+    # events emitted, warnings and errors are always logged
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.1))
+
+    # Data file commits (modules/file_commit.py): writes to the same CSV file arriving within
+    # this window are committed together with one rewrite or append; 0 commits each write alone
+    FILE_COMMIT_WINDOW_MS = float(os.getenv('FILE_COMMIT_WINDOW_MS', 2))
+
+    # Customer ID sequence store
+    CUSTOMER_ID_PREFIX = "CUST"
+    CUSTOMER_ID_SEQUENCE_DB = "data/kyc_sequences.db"
+
     # KYC Form Structure
     KYC_FIELDS: Dict[str, Dict] = field(default_factory=lambda: {
         'customer': {
@@ -97,6 +157,22 @@ class CustomerConfig:
         "Bank Transfer", "Cheque", "Cash", "Credit Card"
     ])
 
+    # Option list backing each 'select' field in KYC_FIELDS
+    KYC_SELECT_OPTIONS: Dict[str, str] = field(default_factory=lambda: {
+        'residential_status': 'RESIDENTIAL_STATUS_OPTIONS',
+        'gender': 'GENDER_OPTIONS',
+        'nationality': 'NATIONALITY_OPTIONS',
+        'investment_purpose': 'INVESTMENT_PURPOSE_OPTIONS',
+        'source_of_funds': 'SOURCE_OF_FUNDS_OPTIONS',
+        'payment_method': 'PAYMENT_METHOD_OPTIONS'
+    })
+
+    # (issue date, expiry date) pairs where expiry must fall after issue
+    KYC_DATE_PAIRS: List[Tuple[str, str]] = field(default_factory=lambda: [
+        ('passport_issue_date', 'passport_expiry_date'),
+        ('dual_passport_issue_date', 'dual_passport_expiry_date')
+    ])
+
     # KYC Status Options
     KYC_STATUS_OPTIONS: List[str] = field(default_factory=lambda: [
         'Pending',
@@ -128,10 +204,42 @@ class CustomerConfig:
         'occupation', 'sponsor_business_name', 'sponsor_business_address',
         'sponsor_business_landline', 'sponsor_business_mobile',
         # Customer Profile and Payment
-        'annual_income', 'investment_purpose', 'source_of_funds', 'payment_method'
+        'annual_income', 'investment_purpose', 'source_of_funds', 'payment_method',
+        # System
+        'last_updated'
     ])
 
+    # Fields covered by the KYC search index
+    KYC_SEARCH_FIELDS: List[str] = field(default_factory=lambda: [
+        'customer_id', 'full_name', 'passport_number', 'emirates_id', 'visa_uid'
+    ])
+
+    # KYC search results: top-K cap, rows per page and the columns shown in the grid
+    KYC_SEARCH_MAX_RESULTS: int = 500
+    KYC_SEARCH_PAGE_SIZE: int = 25
+    KYC_SEARCH_RESULT_COLUMNS: List[str] = field(default_factory=lambda: [
+        'customer_id', 'full_name', 'nationality', 'date_of_birth',
+        'passport_number', 'emirates_id', 'kyc_status'
+    ])
+
+    # Minimum fuzzy name score for search suggestions and duplicate screening
+    KYC_FUZZY_MATCH_THRESHOLD: float = 0.6
+    KYC_DUPLICATE_SCREEN_THRESHOLD: float = 0.8
+
+    # Identity documents tracked for expiry (field -> document label)
+    KYC_EXPIRY_FIELDS: Dict[str, str] = field(default_factory=lambda: {
+        'passport_expiry_date': 'Passport',
+        'dual_passport_expiry_date': 'Dual Passport',
+        'emirates_id_expiry': 'Emirates ID',
+        'visa_expiry': 'Visa'
+    })
+
+    # Documents expiring within this many days are flagged by the expiry scan
+    KYC_EXPIRY_WARNING_DAYS: int = 30
+    KYC_EXPIRY_SCAN_INTERVAL_HOURS: float = 24
+
     # Add new configuration for data types
+    # (storage types: dates are stored as ISO strings and parsed to datetime64 on load)
     KYC_FIELD_TYPES: Dict[str, str] = field(default_factory=lambda: {
         # System Fields
         'customer_id': 'str',
@@ -178,5 +286,8 @@ class CustomerConfig:
         'annual_income': 'int',
         'investment_purpose': 'str',
         'source_of_funds': 'str',
-        'payment_method': 'str'
+        'payment_method': 'str',
+
+        # Set on every insert/update, 'YYYY-MM-DD HH:MM:SS'
+        'last_updated': 'str'
     })
\ No newline at end of file
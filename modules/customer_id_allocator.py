@@ -0,0 +1,97 @@
+# modules/customer_id_allocator.py
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Optional
+from modules.metrics import ID_ALLOCATION_SECONDS, IDS_ALLOCATED
+
+class CustomerIDAllocator:
+    """
+    Persisted customer ID sequences with one counter per year.
+    Each allocation is a single atomic increment in SQLite (BEGIN IMMEDIATE
+    takes the write lock), so concurrent sessions and processes never receive
+    the same ID. IDs keep the CUST<year><sequence:03d> format; sequences past
+    999 simply grow a digit.
+    """
+    def __init__(self, db_file: str = 'data/kyc_sequences.db', prefix: str = 'CUST'):
+        self.db_file = db_file
+        self.prefix = prefix
+        self.ensure_db()
+
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are managed explicitly
+        return sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+
+
+    def ensure_db(self):
+        """Create the sequence table if it doesn't exist"""
+        directory = os.path.dirname(self.db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS customer_id_sequence ("
+                "year INTEGER PRIMARY KEY, last_value INTEGER NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+
+    def format_id(self, year: int, sequence: int) -> str:
+        return f"{self.prefix}{year}{sequence:03d}"
+
+
+    def parse_sequence(self, customer_id: str, year: int) -> Optional[int]:
+        """Return the sequence number of an ID issued in the given year"""
+        year_prefix = f"{self.prefix}{year}"
+        if not isinstance(customer_id, str) or not customer_id.startswith(year_prefix):
+            return None
+        suffix = customer_id[len(year_prefix):]
+        return int(suffix) if suffix.isdigit() else None
+
+
+    @ID_ALLOCATION_SECONDS.time()
+    def allocate(self, count: int = 1, year: Optional[int] = None,
+                 seed: Optional[Callable[[int], int]] = None) -> List[str]:
+        """
+        Reserve a block of count consecutive IDs for the year (default: current year).
+        seed(year) returns the last sequence already in use and is only called the
+        first time a year is allocated, e.g. to continue after existing records.
+        """
+        if count < 1:
+            return []
+        year = year or datetime.now().year
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT last_value FROM customer_id_sequence WHERE year = ?", (year,)
+            ).fetchone()
+
+            if row is None:
+                last_value = seed(year) if seed else 0
+                conn.execute(
+                    "INSERT INTO customer_id_sequence (year, last_value) VALUES (?, ?)",
+                    (year, last_value + count)
+                )
+            else:
+                last_value = row[0]
+                conn.execute(
+                    "UPDATE customer_id_sequence SET last_value = ? WHERE year = ?",
+                    (last_value + count, year)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        IDS_ALLOCATED.inc(count)
+        return [self.format_id(year, sequence) for sequence in range(last_value + 1, last_value + count + 1)]
@@ -4,11 +4,20 @@ import pandas as pd
 from datetime import datetime
 from typing import Optional, Dict, Any
 import os
+from config.customer_config import CustomerConfig
+from modules.receivables_summary import ReceivablesSummary
+from modules.file_commit import GroupCommit, atomic_write_csv, append_csv, file_signature
+from modules.metrics import csv_io
+from modules.event_log import log_event
 
 class DataManager:
     def __init__(self):
         self.csv_file = 'data/cust_file.csv'
+        # Writers of concurrent sessions and processes commit through the group committer
+        self.committer = GroupCommit(self.csv_file, self._apply_batch,
+                                     CustomerConfig().FILE_COMMIT_WINDOW_MS / 1000)
         self.ensure_data_file()
+        self.summary = ReceivablesSummary('data/receivables_summary.json')
 
 
     def ensure_data_file(self):
@@ -17,12 +26,64 @@ class DataManager:
             os.makedirs('data')
         
         if not os.path.exists(self.csv_file):
-            columns = [
-                'cust_unique_id', 'cust_tax_id', 'cust_fname', 'cust_lname',
-                'cust_email', 'transaction_id', 'transaction_date',
-                'billed_amount', 'currency', 'payment_due_date', 'payment_status'
-            ]
-            pd.DataFrame(columns=columns).to_csv(self.csv_file, index=False)
+            with self.committer.lock.exclusive():
+                if not os.path.exists(self.csv_file):
+                    columns = [
+                        'cust_unique_id', 'cust_tax_id', 'cust_fname', 'cust_lname',
+                        'cust_email', 'transaction_id', 'transaction_date',
+                        'billed_amount', 'currency', 'payment_due_date', 'payment_status'
+                    ]
+                    atomic_write_csv(pd.DataFrame(columns=columns), self.csv_file)
+
+
+    def _read_unlocked(self) -> pd.DataFrame:
+        with csv_io(self.csv_file, 'read'):
+            return pd.read_csv(self.csv_file)
+
+
+    def _read(self) -> pd.DataFrame:
+        with self.committer.lock.shared():
+            return self._read_unlocked()
+
+
+    def _apply_batch(self, changes):
+        """
+        Commit a batch of ('append', record) and ('status', transaction_id, status)
+        changes, called by the group committer with the ledger locked. A batch of
+        appends only is one append, anything else one atomic rewrite.
+        """
+        read_signature = file_signature(self.csv_file)
+        results = []
+        summary_changes = []
+
+        if all(change[0] == 'append' for change in changes):
+            records = [change[1] for change in changes]
+            append_csv(pd.DataFrame(records, columns=pd.read_csv(self.csv_file, nrows=0).columns), self.csv_file)
+            results = records
+            summary_changes = ReceivablesSummary.added_changes(records)
+        else:
+            df = self._read_unlocked()
+            for change in changes:
+                if change[0] == 'append':
+                    df.loc[len(df)] = change[1]
+                    results.append(change[1])
+                    summary_changes.extend(ReceivablesSummary.added_changes([change[1]]))
+                    continue
+                _, transaction_id, status = change
+                mask = df['transaction_id'] == transaction_id
+                if not mask.any():
+                    results.append(False)
+                    continue
+                rows_before = df.loc[mask].to_dict('records')
+                df.loc[mask, 'payment_status'] = status
+                results.append(True)
+                summary_changes.extend(ReceivablesSummary.status_changes(rows_before, status))
+            if summary_changes:
+                atomic_write_csv(df, self.csv_file)
+
+        if summary_changes:
+            self.summary.apply_changes(self.csv_file, read_signature, self._read_unlocked, summary_changes)
+        return results
 
 
     def get_customer(self, customer_id: str, workflow_state_class) -> Optional['workflow_state_class']:
@@ -31,7 +92,7 @@ class DataManager:
         Returns WorkflowState if found, None if not found
         """
         try:
-            df = pd.read_csv(self.csv_file)
+            df = self._read()
             customer_data = df[df['cust_unique_id'] == customer_id]
         
             if customer_data.empty:
@@ -61,10 +122,8 @@ class DataManager:
         except Exception as e:
             raise Exception(f"Error retrieving customer data: {str(e)}")
 
-    def save_record(self, workflow_state_dict):
-        """Save new record to CSV"""
-        df = pd.read_csv(self.csv_file)
-        
+    def save_record(self, workflow_state_dict, workflow_state_class):
+        """Save new record to CSV, returns it as a workflow_state_class instance"""
         record = {
             'cust_unique_id': workflow_state_dict['customer']['cust_unique_id'],
             'cust_tax_id': workflow_state_dict['customer']['cust_tax_id'],
@@ -80,11 +139,9 @@ class DataManager:
         }
         
 
-        # Add new record using loc
-        df.loc[len(df)] = record
-        print("*****\n\nDebugging point : df.head() : ", df.head(5))
-
-        df.to_csv(self.csv_file, index=False)
+        # Appended together with the records of concurrent sessions
+        commit = self.committer.submit(('append', record))
+        log_event('ledger_record_added', transaction_id=record['transaction_id'], batch_size=commit.batch_size)
 
         # Return updated WorkflowState
         return workflow_state_class(
@@ -110,17 +167,20 @@ class DataManager:
 
     def check_duplicate(self, cust_unique_id):
         """Check for duplicate customer ID"""
-        df = pd.read_csv(self.csv_file)
+        df = self._read()
         return cust_unique_id in df['cust_unique_id'].values
 
 
     def get_all_records(self):
         """Retrieve all records"""
-        return pd.read_csv(self.csv_file)
+        return self._read()
+
+
+    def update_payment_status(self, transaction_id, status) -> bool:
+        """Update payment status, returns False if the transaction doesn't exist"""
+        return self.committer.submit(('status', transaction_id, status)).result
 
 
-    def update_payment_status(self, transaction_id, status):
-        """Update payment status"""
-        df = pd.read_csv(self.csv_file)
-        df.loc[df['transaction_id'] == transaction_id, 'payment_status'] = status
-        df.to_csv(self.csv_file, index=False)
\ No newline at end of file
+    def get_receivables_summary(self):
+        """Receivables aggregates of the ledger, maintained incrementally by the writers"""
+        return self.summary.current(self.csv_file, self.get_all_records)
\ No newline at end of file
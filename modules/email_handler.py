@@ -5,16 +5,28 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 import os
+import time
+from config.customer_config import CustomerConfig
+from modules.metrics import SMTP_SEND_SECONDS
+from modules.event_log import log_event
 
 class EmailHandler:
+    # Bump whenever the subject, body or attachment layout changes so that
+    # the send ledger treats the new template as a separate delivery
+    TEMPLATE_VERSION = "v1"
+
     def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
+        config = CustomerConfig()
+        self.smtp_server = config.SMTP_HOST
+        self.smtp_port = config.SMTP_PORT
+        self.smtp_starttls = config.SMTP_STARTTLS
+        self.smtp_timeout = config.SMTP_TIMEOUT_SECONDS
         self.sender_email = os.getenv('GMAIL_USER')
         self.sender_password = os.getenv('GMAIL_APP_PASSWORD')
 
     def send_invoice(self, recipient_email, workflow_state_dict, invoice_path):
         """Send invoice email"""
+        started = time.perf_counter()
         try:
             msg = MIMEMultipart()
             msg['From'] = self.sender_email
@@ -39,13 +51,17 @@ Your Company Name"""
                 msg.attach(pdf)
 
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
+            with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.smtp_timeout) as server:
+                if self.smtp_starttls:
+                    server.starttls()
+                if self.sender_password:
+                    server.login(self.sender_email, self.sender_password)
                 server.send_message(msg)
 
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - started, outcome='sent')
             return True
 
         except Exception as e:
-            print(f"Email error: {str(e)}")
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - started, outcome='failed')
+            log_event('email_send_failed', level='error', error=str(e))
             return False
\ No newline at end of file
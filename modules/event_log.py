@@ -0,0 +1,60 @@
+# modules/event_log.py
+
+import sys
+import json
+import random
+import logging
+from datetime import datetime
+from config.customer_config import CustomerConfig
+
+LOGGER_NAME = 'invoice_app.events'
+
+_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR
+}
+
+
+def _build_logger() -> logging.Logger:
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        # Stderr keeps the JSON Lines output of the service CLI clean
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(CustomerConfig.LOG_LEVEL.upper())
+    return logger
+
+
+logger = _build_logger()
+
+
+def log_event(event: str, level: str = 'debug', sample_rate: float = None, **fields):
+    """
+    Emit one structured event as a JSON line: {"ts", "level", "event", **fields}.
+    Debug and info events are sampled (config LOG_SAMPLE_RATE unless sample_rate is
+    given), so hot paths can log every call without flooding the output;
+    each emitted line carries the rate it was sampled at.
+    """
+    levelno = _LEVELS[level]
+    if not logger.isEnabledFor(levelno):
+        return
+    rate = CustomerConfig.LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    if levelno < logging.WARNING:
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return
+    else:
+        rate = 1.0
+
+    record = {
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'level': level,
+        'event': event
+    }
+    if rate < 1:
+        record['sample_rate'] = rate
+    record.update(fields)
+    logger.log(levelno, json.dumps(record, default=str))
@@ -0,0 +1,194 @@
+# modules/file_commit.py
+
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Any, Optional, NamedTuple, Tuple
+import pandas as pd
+from modules.metrics import metrics, csv_io
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover the threads of one process
+    fcntl = None
+
+LOCK_WAIT_SECONDS = metrics.histogram('invoice_app_file_lock_wait_seconds', "Time spent waiting for a data file lock",
+                                      ['file', 'mode'])
+COMMIT_BATCH_SIZE = metrics.histogram('invoice_app_commit_batch_size', "Writes folded into one file commit", ['file'],
+                                      buckets=(1, 2, 4, 8, 16, 32, 64))
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) of the file, None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileLock:
+    """
+    Cross-process reader/writer lock of a data file, held on a <file>.lock
+    sidecar with flock(). Every acquisition opens its own descriptor, so the
+    lock also excludes threads of the same process. Not reentrant: code that
+    holds the lock must read and write the file directly.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_file = f"{path}.lock"
+        self._name = os.path.basename(path)
+        # Fallback without fcntl
+        self._thread_lock = threading.Lock()
+
+
+    @contextmanager
+    def _acquire(self, mode: str):
+        started = time.perf_counter()
+        if fcntl is None:
+            with self._thread_lock:
+                LOCK_WAIT_SECONDS.observe(time.perf_counter() - started, file=self._name, mode=mode)
+                yield
+            return
+
+        directory = os.path.dirname(self.lock_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if mode == 'exclusive' else fcntl.LOCK_SH)
+            LOCK_WAIT_SECONDS.observe(time.perf_counter() - started, file=self._name, mode=mode)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+
+    def exclusive(self):
+        return self._acquire('exclusive')
+
+
+    def shared(self):
+        return self._acquire('shared')
+
+
+def _fsync_directory(directory: str):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory or '.', os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_csv(df: pd.DataFrame, path: str):
+    """
+    Replace the file with df by writing a temporary file next to it and renaming
+    it over the original, so readers see either the old or the new file and a
+    crash never leaves a truncated one.
+    """
+    directory = os.path.dirname(path)
+    fd, temp_file = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory or '.')
+    try:
+        with csv_io(path, 'write'):
+            with os.fdopen(fd, 'w', newline='') as f:
+                df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, path)
+        _fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def append_csv(df: pd.DataFrame, path: str):
+    """Append rows without header in a single write, synced to disk"""
+    data = df.to_csv(index=False, header=False)
+    with csv_io(path, 'append'):
+        with open(path, 'a', newline='') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class CommitResult(NamedTuple):
+    """Outcome of one write: its result and the batch it was committed in"""
+    result: Any
+    # File signatures before and after the batch, see file_signature
+    before: Optional[Tuple[int, int]]
+    after: Optional[Tuple[int, int]]
+    batch_size: int
+
+
+class GroupCommit:
+    """
+    Serializes the writers of one data file across threads and processes and
+    folds writes that arrive within window_seconds of each other into a single
+    commit. The first writer to arrive becomes the leader: it waits for the
+    window, takes the queued writes, holds the file lock while apply_batch
+    reads the file once and applies them in arrival order with one rewrite or
+    append, then hands every writer its own result. Writers that arrive while
+    a commit is running form the next batch.
+
+    apply_batch(changes) returns one result per change; an exception instance
+    in that list is raised to that writer only, an exception raised by
+    apply_batch itself to every writer of the batch.
+    """
+    def __init__(self, path: str, apply_batch: Callable[[List[Any]], List[Any]], window_seconds: float = 0.002):
+        self.path = path
+        self.lock = FileLock(path)
+        self.apply_batch = apply_batch
+        self.window_seconds = window_seconds
+        self._condition = threading.Condition()
+        self._queue: List[dict] = []
+        self._leader_active = False
+
+
+    def submit(self, change: Any) -> CommitResult:
+        """Commit one change, blocks until it is on disk"""
+        request = {'change': change, 'done': False, 'outcome': None}
+        with self._condition:
+            self._queue.append(request)
+            while not request['done'] and self._leader_active:
+                self._condition.wait()
+            if not request['done']:
+                self._leader_active = True
+
+        if not request['done']:
+            self._lead()
+
+        outcome = request['outcome']
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+    def _lead(self):
+        if self.window_seconds > 0:
+            time.sleep(self.window_seconds)
+        with self._condition:
+            batch, self._queue = self._queue, []
+
+        try:
+            with self.lock.exclusive():
+                before = file_signature(self.path)
+                results = self.apply_batch([request['change'] for request in batch])
+                after = file_signature(self.path)
+            COMMIT_BATCH_SIZE.observe(len(batch), file=os.path.basename(self.path))
+            for request, result in zip(batch, results):
+                request['outcome'] = result if isinstance(result, BaseException) else \
+                    CommitResult(result, before, after, len(batch))
+        except BaseException as e:
+            for request in batch:
+                request['outcome'] = e
+        finally:
+            with self._condition:
+                for request in batch:
+                    request['done'] = True
+                self._leader_active = False
+                self._condition.notify_all()
@@ -4,6 +4,7 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from datetime import datetime
 import os
+from modules.metrics import pdf_render
 
 class InvoiceGenerator:
     def __init__(self):
@@ -11,6 +12,7 @@ class InvoiceGenerator:
         if not os.path.exists(self.invoice_dir):
             os.makedirs(self.invoice_dir)
 
+    @pdf_render('invoice')
     def generate_invoice(self, workflow_state_dict):
         """Generate PDF invoice"""
         filename = f"{self.invoice_dir}/INV_{workflow_state_dict['invoice']['transaction_id']}.pdf"
@@ -0,0 +1,141 @@
+# modules/job_runner.py
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+from modules.metrics import JOBS_ACTIVE, JOBS_FINISHED, JOB_SECONDS
+from modules.event_log import log_event
+
+class JobQueueFull(RuntimeError):
+    """Raised when a job type already has its maximum of queued and running jobs"""
+
+
+class JobRunner:
+    """
+    In-process background jobs, so slow work (invoice rendering and SMTP,
+    batch PDFs) runs off the Streamlit script thread. submit() returns a job
+    ID immediately; callers poll status() until the job has succeeded or
+    failed. Each job type has its own bounded thread pool and a cap on
+    queued plus running jobs, so a burst of one kind of work cannot starve
+    the others or grow the queue without limit. Finished jobs are kept for
+    polling up to history_limit, oldest dropped first.
+    """
+    ACTIVE = ('queued', 'running')
+
+    def __init__(self, pool_sizes: Dict[str, int], max_pending: int = 100, history_limit: int = 1000):
+        self.pool_sizes = dict(pool_sizes)
+        self.max_pending = max_pending
+        self.history_limit = history_limit
+        self._lock = threading.Lock()
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._jobs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+
+    def _pool(self, job_type: str) -> ThreadPoolExecutor:
+        pool = self._pools.get(job_type)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=self.pool_sizes[job_type], thread_name_prefix=f"job-{job_type}")
+            self._pools[job_type] = pool
+        return pool
+
+
+    def submit(self, job_type: str, fn: Callable, *args, **kwargs) -> str:
+        """Queue fn(*args, **kwargs) on the pool of job_type, returns the job ID"""
+        if job_type not in self.pool_sizes:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job['type'] == job_type and job['status'] in self.ACTIVE)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"Too many {job_type} jobs in progress ({pending}), try again shortly")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'type': job_type,
+                'status': 'queued',
+                'submitted_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'started_at': None,
+                'finished_at': None,
+                'duration_seconds': None,
+                'result': None,
+                'error': None
+            }
+            self._prune()
+            JOBS_ACTIVE.inc(type=job_type)
+            self._pool(job_type).submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+
+    def _run(self, job_id: str, fn: Callable, args: tuple, kwargs: dict):
+        job = self._jobs[job_id]
+        started = time.perf_counter()
+        with self._lock:
+            job['status'] = 'running'
+            job['started_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            result, error, status = fn(*args, **kwargs), None, 'succeeded'
+        except Exception as e:
+            result, error, status = None, str(e), 'failed'
+            log_event('job_failed', level='error', job_id=job_id, type=job['type'], error=error)
+        duration = time.perf_counter() - started
+        with self._lock:
+            job.update(
+                status=status,
+                result=result,
+                error=error,
+                finished_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                duration_seconds=round(duration, 3)
+            )
+        JOBS_ACTIVE.dec(type=job['type'])
+        JOBS_FINISHED.inc(type=job['type'], status=status)
+        JOB_SECONDS.observe(duration, type=job['type'])
+
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond history_limit (lock held)"""
+        excess = len(self._jobs) - self.history_limit
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job['status'] not in self.ACTIVE][:excess]:
+            del self._jobs[job_id]
+
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, None if the ID is unknown or was pruned"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+
+    def is_active(self, job_id: Optional[str]) -> bool:
+        job = self.status(job_id) if job_id else None
+        return job is not None and job['status'] in self.ACTIVE
+
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs per type and status"""
+        counts: Dict[str, Dict[str, int]] = {job_type: {} for job_type in self.pool_sizes}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job['type']][job['status']] = counts[job['type']].get(job['status'], 0) + 1
+        return counts
+
+
+    def shutdown(self, wait: bool = True):
+        """Wait for running jobs (if wait) and cancel the queued ones"""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+        with self._lock:
+            for job in self._jobs.values():
+                if job['status'] == 'queued':
+                    job.update(status='failed', error="Cancelled at shutdown")
+                    JOBS_ACTIVE.dec(type=job['type'])
+                    JOBS_FINISHED.inc(type=job['type'], status='cancelled')
@@ -0,0 +1,353 @@
+# modules/kyc_application_pdf.py
+
+import io
+import os
+import hashlib
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Any, List, Tuple, Optional
+from config.kyc_application_pdf_config import KYCApplicationPDFConfig
+from modules.kyc_dates import KYCDateColumns
+from modules.metrics import pdf_render
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+class KYCApplicationPDFTemplate:
+    """
+    Static layer of the KYC application: borders, title box, section header
+    bars, label cells and the word-wrapped declaration. The layout is drawn
+    once per config version into a list of PDF operators and stamped into
+    each document as a form XObject; only the customer values are drawn per
+    document, at the value slots recorded while laying out the template.
+    """
+    FORM_NAME = 'KYCApplicationStatic'
+    # Registered in this order on every canvas so internal font names (/F1, /F2)
+    # in the recorded operators match the document they are stamped into
+    FONTS = ('Helvetica', 'Helvetica-Bold')
+
+    _templates: Dict[str, 'KYCApplicationPDFTemplate'] = {}
+
+    def __init__(self, pdf_config: KYCApplicationPDFConfig):
+        self.pdf_config = pdf_config
+        self.width, self.height = A4
+        # (customer field, x, y) of every value drawn per customer
+        self.value_slots: List[Tuple[str, float, float]] = []
+        self.date_slot: Optional[Tuple[float, float]] = None
+        self.declaration_lines: List[str] = []
+        self.static_code = self._record_static_layer()
+
+
+    @staticmethod
+    def config_version(pdf_config: KYCApplicationPDFConfig) -> str:
+        """Fingerprint of every config value that affects the layout"""
+        return hashlib.sha1(repr(pdf_config).encode('utf-8')).hexdigest()
+
+
+    @classmethod
+    def for_config(cls, pdf_config: KYCApplicationPDFConfig) -> 'KYCApplicationPDFTemplate':
+        """Return the template of this config version, laying it out on first use"""
+        version = cls.config_version(pdf_config)
+        template = cls._templates.get(version)
+        if template is None:
+            template = cls(pdf_config)
+            cls._templates[version] = template
+        return template
+
+
+    def register_fonts(self, c: canvas.Canvas):
+        for font in self.FONTS:
+            c.setFont(font, 9)
+
+
+    def _record_static_layer(self) -> str:
+        """Lay out the static layer on a scratch canvas and keep its operators"""
+        c = canvas.Canvas(io.BytesIO(), pagesize=A4)
+        self.register_fonts(c)
+        start = len(c._code)
+
+        width, height = self.width, self.height
+
+        # Main border
+        c.rect(40, height-750, 515, 690)  # Adjust height as needed
+
+        # Title section border
+        c.rect(40, height-60, 515, 50)
+
+        # Title in red
+        c.setFillColorRGB(1, 0, 0)
+        c.setFont('Helvetica-Bold', 14)
+        c.drawCentredString(width/2, height-30, "KYC APPLICATION")
+
+        # Subtitle with proper spacing
+        subtitle = "(To be Filled by Each Purchaser Separately)"
+        c.setFont('Helvetica', 11)  # Reduced font size
+        text_width = c.stringWidth(subtitle, 'Helvetica', 11)
+        c.setFillColorRGB(1, 1, 0)  # Yellow background
+        c.rect((width-text_width)/2 - 2, height-50, text_width + 4, 16, fill=1)
+        c.setFillColorRGB(1, 0, 0)  # Red text
+        c.drawCentredString(width/2, height-45, subtitle)
+
+        y = height - 60
+        c.setFillColorRGB(0, 0, 0)
+
+        # Lay out sections
+        for section in self.pdf_config.PDF_SECTIONS:
+            if section == "Customer Information":
+                y = self._add_two_column_section(c, section, y)
+            elif section == "Declaration":
+                y = self._add_declaration(c, y)
+            else:
+                y = self._add_section(c, section, y)
+
+        return '\n'.join(c._code[start:])
+
+
+    def _add_section(self, canvas, section: str, y: float) -> float:
+        """Add a regular section with single column layout"""
+        # Section header with grid
+        canvas.rect(40, y-20, 515, 20)  # Grid for header
+        if section == "CUSTOMER INFORMATION":
+            canvas.setFillColorRGB(0, 0, 0)
+        else:
+            canvas.setFillColorRGB(0.9, 0.95, 1.0)
+            canvas.rect(40, y-20, 515, 20, fill=1)
+            canvas.setFillColorRGB(1, 0, 0)
+
+        canvas.setFont('Helvetica-Bold', 11)
+        canvas.drawCentredString(297, y-15, section)
+        canvas.setFillColorRGB(0, 0, 0)
+
+        y -= 20
+        canvas.setFont('Helvetica', 10)
+
+        is_merged_cell_active = False
+
+        # Draw fields with continuous grid
+        for label, key in self.pdf_config.PDF_FIELDS.get(section, []):
+            if label in ["Residential Address", "Home Address"] and not is_merged_cell_active:
+                # First row: Draw merged label cell and first value cell
+                is_merged_cell_active = True
+
+                # Draw merged label cell
+                canvas.rect(40, y-40, 210, 40)  # Merged cell for label
+                y_centered = y - 25  # Center position for the merged cell
+
+                canvas.setFont('Helvetica-Bold', 9)
+                canvas.drawString(45, y_centered, label)
+
+                # Draw first value cell
+                canvas.rect(250, y-20, 305, 20)
+                self.value_slots.append((key, 255, y-15))
+
+                y -= 20  # Move to next line position
+
+            elif is_merged_cell_active:
+                # Second row: Skip label, draw second value cell
+                is_merged_cell_active = False
+
+                canvas.rect(250, y-20, 305, 20)
+                self.value_slots.append((key, 255, y-15))
+
+                y -= 20  # Move to next line position
+
+            else:
+                # Normal field handling
+                canvas.rect(40, y-20, 210, 20)  # Label box
+                canvas.rect(250, y-20, 305, 20)  # Value box
+
+                canvas.setFont('Helvetica-Bold', 9)
+                canvas.drawString(45, y-15, label)
+                self.value_slots.append((key, 255, y-15))
+
+                y -= 20
+
+        return y
+
+
+    def _add_two_column_section(self, canvas, section: str, y: float) -> float:
+        """Add Customer Information section with two-column layout"""
+        # Section header
+        canvas.setFillColorRGB(0.9, 0.95, 1.0)
+        canvas.rect(40, y-20, 515, 20, fill=1)
+        canvas.setFillColorRGB(1, 0, 0)
+        canvas.setFont('Helvetica-Bold', 11)
+        canvas.drawCentredString(297, y-15, section)
+
+        y -= 25
+        canvas.setFont('Helvetica', 10)
+        canvas.setFillColorRGB(0, 0, 0)
+
+        # Two-column layout
+        fields = self.pdf_config.PDF_FIELDS.get(section, [])
+        mid_point = 297
+
+        for i in range(0, len(fields), 2):
+            # Vertical lines
+            canvas.line(mid_point, y, mid_point, y-20)  # Middle divider
+            canvas.line(145, y, 145, y-20)      # Left column divider
+            canvas.line(402, y, 402, y-20)      # Right column divider
+
+            # Horizontal line
+            canvas.line(40, y-20, 555, y-20)
+
+            # Left column
+            canvas.setFont('Helvetica-Bold', 9)
+            canvas.drawString(45, y-15, fields[i][0])
+            self.value_slots.append((fields[i][1], 150, y-15))
+
+            # Right column
+            if i+1 < len(fields):
+                canvas.setFont('Helvetica-Bold', 9)
+                canvas.drawString(302, y-15, fields[i+1][0])
+                self.value_slots.append((fields[i+1][1], 407, y-15))
+
+            y -= 20
+
+        return y
+
+
+    def wrap_declaration(self, max_width: float = 500) -> List[str]:
+        """Word-wrap the declaration text to the text box width"""
+        words = self.pdf_config.DECLARATION_TEXT.split()
+        lines = []
+        current_line = []
+        line_width = 0
+
+        for word in words:
+            word_width = stringWidth(word + " ", 'Helvetica', 10)
+            if line_width + word_width <= max_width:
+                current_line.append(word)
+                line_width += word_width
+            else:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+                line_width = word_width
+
+        if current_line:
+            lines.append(' '.join(current_line))
+        return lines
+
+
+    def _add_declaration(self, canvas, y: float) -> float:
+        """Add declaration section with proper formatting"""
+        # Section header
+        canvas.rect(40, y-20, 515, 20)
+        canvas.setFillColorRGB(0.9, 0.95, 1.0)
+        canvas.rect(40, y-20, 515, 20, fill=1)
+        canvas.setFillColorRGB(1, 0, 0)
+        canvas.setFont('Helvetica-Bold', 11)
+        canvas.drawCentredString(297, y-15, "Declaration")
+
+        y -= 20
+        canvas.setFillColorRGB(0, 0, 0)
+        canvas.setFont('Helvetica', 9)
+
+        # Declaration text box
+        self.declaration_lines = self.wrap_declaration()
+
+        # Calculate text box height
+        text_height = len(self.declaration_lines) * 15 + 10  # 15 points per line + padding
+        canvas.rect(40, y-text_height, 515, text_height)
+
+        # Draw text lines
+        text_y = y - 15
+        for line in self.declaration_lines:
+            canvas.drawString(45, text_y, line)
+            text_y -= 15
+
+        y -= text_height
+
+        # Signature fields, values are drawn per customer
+        signature_fields = ["Full Name of the Customer", "Signed as on Date", "Signature"]
+
+        for label in signature_fields:
+            canvas.rect(40, y-20, 210, 20)  # Label box
+            canvas.rect(250, y-20, 305, 20)  # Value box
+            canvas.setFont('Helvetica-Bold', 9)
+            canvas.drawString(45, y-15, label)
+            if label == "Full Name of the Customer":
+                self.value_slots.append(('full_name', 255, y-15))
+            elif label == "Signed as on Date":
+                self.date_slot = (255, y-15)
+            else:
+                canvas.setFont('Helvetica', 9)
+                canvas.drawString(255, y-15, "_____________________")
+            y -= 20
+
+        return y
+
+
+    def draw(self, c: canvas.Canvas):
+        """Define the static layer as a form XObject on the canvas and place it on the page"""
+        self.register_fonts(c)
+        c.beginForm(self.FORM_NAME)
+        c.addLiteral(self.static_code)
+        c.endForm()
+        c.doForm(self.FORM_NAME)
+
+
+class KYCApplicationPDFGenerator:
+    def __init__(self, pdf_config: KYCApplicationPDFConfig = None):
+        self.pdf_config = pdf_config or KYCApplicationPDFConfig()
+        os.makedirs(self.pdf_config.KYC_APPLICATION_PDF_DIR, exist_ok=True)
+
+
+    @property
+    def template(self) -> KYCApplicationPDFTemplate:
+        return KYCApplicationPDFTemplate.for_config(self.pdf_config)
+
+
+    def application_path(self, customer_id: str) -> str:
+        """Path of the KYC application PDF of a customer"""
+        filename = f"kyc_application_{customer_id}.pdf"
+        return os.path.join(self.pdf_config.KYC_APPLICATION_PDF_DIR, filename)
+
+
+    @staticmethod
+    def format_value(customer_data: Dict[str, Any], key: str) -> Optional[str]:
+        """Display text of a field value, None for missing values"""
+        is_date = key.endswith(('_date', 'Date'))
+        display_key = KYCDateColumns.display_column(key)
+        if is_date and display_key in customer_data:
+            # Pre-formatted when the record comes from the typed KYC dataset
+            value = customer_data[display_key]
+            return None if pd.isna(value) else value
+
+        value = customer_data.get(key, '')
+        if isinstance(value, datetime):
+            return None if pd.isna(value) else value.strftime('%d-%m-%Y' if is_date else '%Y-%m-%d')
+
+        value = str(value)
+        if is_date:
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').strftime('%d-%m-%Y')
+            except ValueError:
+                pass
+        if value.lower() == 'nan':
+            return None
+        return value
+
+
+    @pdf_render('kyc_application')
+    def generate(self, customer_data: Dict[str, Any]) -> str:
+        """Generate KYC application PDF, returns its path"""
+        filepath = self.application_path(customer_data['customer_id'])
+        template = self.template
+
+        c = canvas.Canvas(filepath, pagesize=A4)
+        template.draw(c)
+
+        # Customer values over the static layer
+        c.setFillColorRGB(0, 0, 0)
+        c.setFont('Helvetica', 9)
+        for key, x, y in template.value_slots:
+            value = self.format_value(customer_data, key)
+            if value:
+                c.drawString(x, y, value)
+        if template.date_slot:
+            c.drawString(*template.date_slot, datetime.now().strftime('%d-%m-%Y'))
+
+        c.save()
+        return filepath
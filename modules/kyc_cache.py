@@ -0,0 +1,118 @@
+# modules/kyc_cache.py
+
+import os
+import threading
+import pandas as pd
+from typing import Callable, Dict, Any, Optional, Tuple, Iterable
+from modules.file_commit import file_signature
+
+class KYCDataCache:
+    """
+    Process-wide cache of parsed KYC datasets shared by all Streamlit sessions.
+    Entries are keyed on the data file path and validated against the file's
+    mtime and size, so the CSV is only re-parsed after an external change.
+    Cached frames are shared and must be treated as read-only; writers copy
+    before modifying and hand the result back through put().
+
+    Derived structures (search indexes and the like) are built lazily from the
+    cached frame and live as long as it does. They are addressed by row
+    position and must implement refreshed(df, positions), returning the
+    structure for df, so that writers can update them incrementally instead of
+    rebuilding. Sessions keep querying a structure without the lock, together
+    with the frame get_derived returned it with: refreshed() either copies, or
+    updates shared state in place (called under the lock) and returns a view
+    bounded by len(df), in which case the previous view must stay bounded by
+    its own frame's row count.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+
+    def get(self, path: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Return the cached dataset, reloading it only if the file changed"""
+        key = os.path.abspath(path)
+        signature = file_signature(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and signature is not None and entry['signature'] == signature:
+                return entry['df']
+
+            df = loader()
+            if signature is not None:
+                self._entries[key] = {'signature': signature, 'df': df, 'derived': {}}
+            return df
+
+
+    def get_derived(self, path: str, loader: Callable[[], pd.DataFrame], name: str,
+                    builder: Callable[[pd.DataFrame], Any]) -> Tuple[pd.DataFrame, Any]:
+        """Return the cached dataset together with a structure derived from it"""
+        key = os.path.abspath(path)
+
+        with self._lock:
+            df = self.get(path, loader)
+            entry = self._entries.get(key)
+            if entry is None or entry['df'] is not df:
+                # File vanished or could not be cached, build a throwaway structure
+                return df, builder(df)
+
+            if name not in entry['derived']:
+                entry['derived'][name] = builder(df)
+            return df, entry['derived'][name]
+
+
+    def signature(self, path: str, df: pd.DataFrame) -> Optional[Tuple[int, int]]:
+        """File signature df was cached with, None if df is not the cached frame"""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+            return entry['signature'] if entry is not None and entry['df'] is df else None
+
+
+    def put(self, path: str, df: pd.DataFrame, changed_rows: Optional[Iterable[int]] = None,
+            signature: Optional[Tuple[int, int]] = None, base_signature: Optional[Tuple[int, int]] = None):
+        """
+        Write-through: store the frame that was just written to the file.
+        When the positions of inserted/updated rows are given, derived structures
+        are refreshed incrementally, otherwise they are dropped and rebuilt on demand.
+        signature is the file's signature right after the write, when the writer
+        knows it (the file may have changed again since). base_signature is the
+        version df was derived from: derived structures of any other version are
+        addressed by other row positions and are not refreshed, and a version
+        cached by another session since the write is kept.
+        """
+        key = os.path.abspath(path)
+        signature = signature or file_signature(path)
+
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and base_signature is not None and \
+                    previous['signature'] not in (base_signature, signature):
+                return
+            self._entries.pop(key, None)
+            if signature is None:
+                return
+
+            derived = {}
+            if previous is not None and changed_rows is not None and \
+                    (base_signature is None or previous['signature'] == base_signature):
+                changed_rows = list(changed_rows)
+                # Copy on write, readers of the previous frame still hold the old structures
+                derived = {
+                    name: structure.refreshed(df, changed_rows) for name, structure in previous['derived'].items()
+                }
+
+            self._entries[key] = {'signature': signature, 'df': df, 'derived': derived}
+
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drop one cached dataset, or all of them"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# Shared by every KYCManager in the process
+kyc_data_cache = KYCDataCache()
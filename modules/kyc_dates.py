@@ -0,0 +1,81 @@
+# modules/kyc_dates.py
+
+import pandas as pd
+from datetime import date, datetime
+from typing import Dict, Any, List
+from config.customer_config import CustomerConfig
+
+class KYCDateColumns:
+    """
+    Date columns of the KYC dataset. Stores keep dates as ISO strings; the load
+    path parses them once into datetime64 and adds a pre-formatted
+    <field>_display column per date, so forms, PDFs and filters work on typed
+    values instead of re-parsing strings. Writers serialize back to ISO.
+    """
+    STORAGE_FORMAT = '%Y-%m-%d'
+    DISPLAY_FORMAT = '%d-%m-%Y'
+    DISPLAY_SUFFIX = '_display'
+
+    def __init__(self, config: CustomerConfig):
+        self.fields: List[str] = [
+            name
+            for section in config.KYC_FIELDS.values()
+            for name, spec in section['fields'].items()
+            if spec['type'] == 'date'
+        ]
+
+
+    @classmethod
+    def display_column(cls, field: str) -> str:
+        return f"{field}{cls.DISPLAY_SUFFIX}"
+
+
+    def parse(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert ISO date columns to datetime64 and add their display columns (in place)"""
+        for field in self.fields:
+            if field not in df.columns:
+                continue
+            parsed = pd.to_datetime(df[field], format=self.STORAGE_FORMAT, errors='coerce')
+            df[field] = parsed
+            df[self.display_column(field)] = parsed.dt.strftime(self.DISPLAY_FORMAT)
+        return df
+
+
+    @classmethod
+    def to_timestamp(cls, value) -> pd.Timestamp:
+        """Typed value of a date given as ISO string, date or datetime (NaT if missing)"""
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return pd.NaT
+        if isinstance(value, (datetime, date)):
+            return pd.Timestamp(value)
+        return pd.to_datetime(value, format=cls.STORAGE_FORMAT, errors='coerce')
+
+
+    def typed_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Edited fields with dates converted to Timestamps, plus their display values"""
+        typed = dict(fields)
+        for field in self.fields:
+            if field in fields:
+                value = self.to_timestamp(fields[field])
+                typed[field] = value
+                typed[self.display_column(field)] = value.strftime(self.DISPLAY_FORMAT) if not pd.isna(value) else None
+        return typed
+
+
+    @classmethod
+    def to_storage_value(cls, value):
+        """ISO string for a date value, other values unchanged"""
+        if value is pd.NaT:
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.strftime(cls.STORAGE_FORMAT)
+        return value
+
+
+    def to_storage_frame(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """Copy of the stored columns with dates serialized as ISO strings"""
+        stored = df.reindex(columns=columns)
+        for field in self.fields:
+            if field in stored.columns and pd.api.types.is_datetime64_any_dtype(stored[field]):
+                stored[field] = stored[field].dt.strftime(self.STORAGE_FORMAT)
+        return stored
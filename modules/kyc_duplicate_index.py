@@ -0,0 +1,136 @@
+# modules/kyc_duplicate_index.py
+
+import copy
+import pandas as pd
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class KYCDuplicateIndex:
+    """
+    Hash index of normalized identity keys for O(1) duplicate detection.
+    The primary key is (name, date of birth, passport number); Emirates ID and
+    visa UID are indexed as secondary keys. Keys map to the row positions of
+    the cached KYC frame holding them, so a key stays a duplicate while any
+    of its rows remains. The index is maintained in place on insert and
+    update; refreshed() returns a view bounded by the new frame's row count,
+    and views of older frames ignore the rows appended since.
+    """
+    def __init__(self, df: pd.DataFrame):
+        # Position tuples are replaced, never modified, as readers may be iterating them
+        self.keys: Dict[Tuple, Tuple[int, ...]] = {}
+        self.row_keys: List[List[Tuple]] = []
+        # Rows of the frame this view belongs to
+        self.rows = len(df)
+        self.refresh_rows(df, range(len(df)))
+
+
+    @staticmethod
+    def _is_blank(value) -> bool:
+        if value is None:
+            return True
+        if isinstance(value, str):
+            return value.strip() == ''
+        try:
+            return bool(pd.isna(value))
+        except (TypeError, ValueError):
+            return False
+
+
+    @staticmethod
+    def normalize_name(name) -> str:
+        """Casefold and collapse whitespace"""
+        return ' '.join(str(name).casefold().split())
+
+
+    @staticmethod
+    def normalize_date(value) -> str:
+        """ISO date string from a date, datetime or YYYY-MM-DD string"""
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        return str(value).strip()[:10]
+
+
+    @staticmethod
+    def normalize_document(number) -> str:
+        """Uppercase document number without whitespace or dashes"""
+        return ''.join(str(number).upper().split()).replace('-', '')
+
+
+    @classmethod
+    def identity_keys(cls, full_name, date_of_birth, passport_number,
+                      emirates_id=None, visa_uid=None) -> List[Tuple]:
+        """All lookup keys of a record, primary key first"""
+        keys = []
+        if not any(cls._is_blank(v) for v in (full_name, date_of_birth, passport_number)):
+            keys.append((
+                'identity',
+                cls.normalize_name(full_name),
+                cls.normalize_date(date_of_birth),
+                cls.normalize_document(passport_number)
+            ))
+        if not cls._is_blank(emirates_id):
+            keys.append(('emirates_id', cls.normalize_document(emirates_id)))
+        if not cls._is_blank(visa_uid):
+            keys.append(('visa_uid', cls.normalize_document(visa_uid)))
+        return keys
+
+
+    @classmethod
+    def record_keys(cls, record) -> List[Tuple]:
+        return cls.identity_keys(
+            record.get('full_name'),
+            record.get('date_of_birth'),
+            record.get('passport_number'),
+            record.get('emirates_id'),
+            record.get('visa_uid')
+        )
+
+
+    def refresh_rows(self, df: pd.DataFrame, positions: Iterable[int]):
+        """Index inserted rows and re-index updated ones"""
+        positions = list(positions)
+        if not positions:
+            return
+
+        last = max(positions)
+        if last >= len(self.row_keys):
+            self.row_keys.extend([[] for _ in range(last + 1 - len(self.row_keys))])
+
+        columns = ['full_name', 'date_of_birth', 'passport_number', 'emirates_id', 'visa_uid']
+        rows = df.iloc[positions].reindex(columns=columns)
+        for position, record in zip(positions, rows.to_dict('records')):
+            # Only this row leaves its old keys, other rows holding them stay indexed
+            for key in self.row_keys[position]:
+                remaining = tuple(p for p in self.keys.get(key, ()) if p != position)
+                if remaining:
+                    self.keys[key] = remaining
+                else:
+                    self.keys.pop(key, None)
+
+            keys = self.record_keys(record)
+            for key in keys:
+                self.keys[key] = self.keys.get(key, ()) + (position,)
+            self.row_keys[position] = keys
+
+
+    def refreshed(self, df: pd.DataFrame, positions: Iterable[int]) -> 'KYCDuplicateIndex':
+        """Refresh the rows in place, returns the view of df; this view stays bounded to the previous frame"""
+        index = copy.copy(self)
+        index.rows = len(df)
+        index.refresh_rows(df, positions)
+        return index
+
+
+    def find_keys(self, keys: Iterable[Tuple]) -> Optional[Tuple[int, str]]:
+        """Return (earliest row position, matched key type) of a record holding one of keys, or None"""
+        for key in keys:
+            positions = [p for p in self.keys.get(key, ()) if p < self.rows]
+            if positions:
+                return min(positions), key[0]
+        return None
+
+
+    def find(self, full_name, date_of_birth, passport_number,
+             emirates_id=None, visa_uid=None) -> Optional[Tuple[int, str]]:
+        """Return (row position, matched key type) of an existing record, or None"""
+        return self.find_keys(self.identity_keys(full_name, date_of_birth, passport_number, emirates_id, visa_uid))
@@ -0,0 +1,201 @@
+# modules/kyc_expiry.py
+
+import os
+import copy
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, date
+from typing import Dict, Any, Iterable, Optional
+from modules.event_log import log_event
+
+class KYCExpiryIndex:
+    """
+    Sorted index of identity document expiry dates (passport, dual passport,
+    Emirates ID, visa). Expiry columns arrive as datetime64 from the KYC load
+    path and are kept as datetime64[D] in three parallel arrays ordered by
+    date, so "what expires between A and B" is two binary searches and a
+    slice. Entries refer to row positions of the cached KYC frame and are
+    replaced incrementally on insert and update.
+    """
+    def __init__(self, df: pd.DataFrame, fields: Dict[str, str]):
+        self.fields = [name for name in fields if name in df.columns]
+        self.labels = np.array([fields[name] for name in self.fields], dtype=object)
+        self.dates = np.empty(0, dtype='datetime64[D]')
+        self.positions = np.empty(0, dtype=np.int64)
+        self.field_codes = np.empty(0, dtype=np.int8)
+        self.refresh_rows(df, range(len(df)))
+
+
+    def _entries(self, df: pd.DataFrame, positions: np.ndarray):
+        """Parsed (date, position, field code) of every expiry date set in the rows"""
+        rows = df.iloc[positions]
+        dates, row_positions, codes = [], [], []
+        for code, name in enumerate(self.fields):
+            values = rows[name]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = pd.to_datetime(values, format='%Y-%m-%d', errors='coerce')
+            parsed = values.to_numpy(dtype='datetime64[D]')
+            valid = ~np.isnat(parsed)
+            dates.append(parsed[valid])
+            row_positions.append(positions[valid])
+            codes.append(np.full(valid.sum(), code, dtype=np.int8))
+
+        if not dates:
+            return self.dates[:0], self.positions[:0], self.field_codes[:0]
+        return np.concatenate(dates), np.concatenate(row_positions), np.concatenate(codes)
+
+
+    def refresh_rows(self, df: pd.DataFrame, positions: Iterable[int]):
+        """Replace the entries of inserted or updated rows"""
+        positions = np.fromiter(positions, dtype=np.int64)
+        if len(positions) == 0:
+            return
+
+        keep = ~np.isin(self.positions, positions)
+        dates, row_positions, codes = self._entries(df, positions)
+        order = np.argsort(dates, kind='stable')
+        dates, row_positions, codes = dates[order], row_positions[order], codes[order]
+
+        base_dates = self.dates[keep]
+        at = np.searchsorted(base_dates, dates, side='right')
+        self.dates = np.insert(base_dates, at, dates)
+        self.positions = np.insert(self.positions[keep], at, row_positions)
+        self.field_codes = np.insert(self.field_codes[keep], at, codes)
+
+
+    def refreshed(self, df: pd.DataFrame, positions: Iterable[int]) -> 'KYCExpiryIndex':
+        """Copy with the rows refreshed; refresh_rows builds new arrays, so this index stays intact"""
+        index = copy.copy(self)
+        index.refresh_rows(df, positions)
+        return index
+
+
+    @staticmethod
+    def _day(value) -> np.datetime64:
+        if value is None:
+            value = date.today()
+        return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+    def between(self, df: pd.DataFrame, start, end) -> pd.DataFrame:
+        """Documents expiring from start to end (inclusive), soonest first"""
+        lo = np.searchsorted(self.dates, self._day(start), side='left')
+        hi = np.searchsorted(self.dates, self._day(end), side='right')
+        return self._to_frame(df, slice(lo, hi))
+
+
+    def expiring_within(self, df: pd.DataFrame, days: int, as_of=None, include_expired: bool = False) -> pd.DataFrame:
+        """Documents expiring in the next N days, optionally with those already expired"""
+        today = self._day(as_of)
+        lo = 0 if include_expired else np.searchsorted(self.dates, today, side='left')
+        hi = np.searchsorted(self.dates, today + np.timedelta64(days, 'D'), side='right')
+        return self._to_frame(df, slice(lo, hi), today)
+
+
+    def expired(self, df: pd.DataFrame, as_of=None) -> pd.DataFrame:
+        """Documents whose expiry date is before as_of (default: today)"""
+        today = self._day(as_of)
+        hi = np.searchsorted(self.dates, today, side='left')
+        return self._to_frame(df, slice(0, hi), today)
+
+
+    def count_within(self, days: int, as_of=None) -> Dict[str, int]:
+        """Number of expired documents and of documents expiring in the next N days"""
+        today = self._day(as_of)
+        expired = np.searchsorted(self.dates, today, side='left')
+        upcoming = np.searchsorted(self.dates, today + np.timedelta64(days, 'D'), side='right')
+        return {'expired': int(expired), 'expiring': int(upcoming - expired)}
+
+
+    def _to_frame(self, df: pd.DataFrame, selection: slice, today: Optional[np.datetime64] = None) -> pd.DataFrame:
+        today = self._day(None) if today is None else today
+        positions = self.positions[selection]
+        dates = self.dates[selection]
+        return pd.DataFrame({
+            'customer_id': df['customer_id'].to_numpy()[positions],
+            'full_name': df['full_name'].to_numpy()[positions],
+            'document': self.labels[self.field_codes[selection]] if len(positions) else np.empty(0, dtype=object),
+            'expiry_date': np.datetime_as_string(dates, unit='D'),
+            'days_left': (dates - today).astype(np.int64)
+        })
+
+
+class KYCExpiryScanner:
+    """
+    Scheduled compliance scan. Each run flags every document that has expired
+    or expires within the warning window and writes the flags to
+    CustomerConfig.KYC_EXPIRY_FLAGS_FILE. One scanner thread runs per process,
+    however many KYCManager instances ask for it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_scan: Optional[Dict[str, Any]] = None
+
+
+    def scan(self, kyc_manager, as_of=None) -> Dict[str, Any]:
+        """Flag expired and expiring documents, returns the scan summary"""
+        config = kyc_manager.config
+        flags = kyc_manager.get_expiring_documents(config.KYC_EXPIRY_WARNING_DAYS, include_expired=True, as_of=as_of)
+        flags['status'] = np.where(flags['days_left'] < 0, 'Expired', 'Expiring')
+        scanned_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        flags['scanned_at'] = scanned_at
+
+        # Write to a temporary file first so readers never see a partial scan
+        flags_file = config.KYC_EXPIRY_FLAGS_FILE
+        os.makedirs(os.path.dirname(flags_file) or '.', exist_ok=True)
+        temp_file = f"{flags_file}.tmp"
+        flags.to_csv(temp_file, index=False)
+        os.replace(temp_file, flags_file)
+
+        self.last_scan = {
+            'scanned_at': scanned_at,
+            'expired': int((flags['status'] == 'Expired').sum()),
+            'expiring': int((flags['status'] == 'Expiring').sum()),
+            'flags_file': flags_file
+        }
+        log_event('kyc_expiry_scan', level='info', sample_rate=1, expired=self.last_scan['expired'],
+                  expiring=self.last_scan['expiring'], warning_days=config.KYC_EXPIRY_WARNING_DAYS)
+        return self.last_scan
+
+
+    def start(self, kyc_manager, interval_hours: float):
+        """Start the periodic scan in a daemon thread, no-op if already running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(kyc_manager, interval_hours * 3600),
+                name='kyc-expiry-scanner',
+                daemon=True
+            )
+            self._thread.start()
+
+
+    def stop(self):
+        self._stop.set()
+
+
+    def _run(self, kyc_manager, interval_seconds: float):
+        while True:
+            try:
+                self.scan(kyc_manager)
+            except Exception as e:
+                log_event('kyc_expiry_scan_failed', level='error', error=str(e))
+            if self._stop.wait(interval_seconds):
+                return
+
+
+# Shared by every KYCManager in the process
+expiry_scanner = KYCExpiryScanner()
+
+
+if __name__ == "__main__":
+    # One-off scan, e.g. from cron: python -m modules.kyc_expiry
+    from modules.kyc_manager import KYCManager
+
+    expiry_scanner.scan(KYCManager())
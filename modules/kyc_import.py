@@ -0,0 +1,161 @@
+# modules/kyc_import.py
+
+import os
+import pandas as pd
+from datetime import datetime, date
+from typing import Dict, Any, Iterator, List, Optional
+from modules.kyc_duplicate_index import KYCDuplicateIndex
+from modules.event_log import log_event
+from modules.validator import parse_number
+
+class KYCBulkImporter:
+    """
+    Bulk import of KYC applicants from CSV or XLSX spreadsheets.
+    The file is streamed in chunks, each chunk is validated against
+    CustomerConfig.KYC_FIELDS in one vectorized pass and deduplicated within the
+    batch and against existing records through the duplicate index. Accepted
+    rows get a block of customer IDs and are committed in a single write;
+    rejected rows are listed with their reasons in a reject report.
+    """
+    def __init__(self, kyc_manager, chunk_size: int = 5000):
+        self.kyc_manager = kyc_manager
+        self.config = kyc_manager.config
+        self.validator = kyc_manager.validator
+        self.chunk_size = chunk_size
+        self.date_fields = [
+            name
+            for section in self.config.KYC_FIELDS.values()
+            for name, spec in section['fields'].items()
+            if spec['type'] == 'date'
+        ]
+
+
+    def iter_chunks(self, source, file_name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Stream a CSV or XLSX file (path or file object) as DataFrame chunks"""
+        name = file_name or (source if isinstance(source, str) else getattr(source, 'name', ''))
+        if str(name).lower().endswith(('.xlsx', '.xlsm')):
+            yield from self._iter_xlsx_chunks(source)
+        else:
+            yield from pd.read_csv(
+                source,
+                dtype=str,
+                chunksize=self.chunk_size,
+                na_values=['nan', 'None', ''],
+                keep_default_na=True
+            )
+
+
+    def _iter_xlsx_chunks(self, source) -> Iterator[pd.DataFrame]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else '' for cell in next(rows, [])]
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+
+
+    def _to_record(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a validated spreadsheet row into a KYC record"""
+        record = {}
+        for column in self.config.KYC_CSV_HEADERS:
+            value = row.get(column)
+            if value is not None and not isinstance(value, str) and pd.isna(value):
+                value = None
+            if isinstance(value, str):
+                value = value.strip() or None
+            if value is not None and column in self.date_fields and isinstance(value, (datetime, date)):
+                value = value.strftime('%Y-%m-%d')
+            elif value is not None and column != 'annual_income':
+                # Spreadsheet cells such as phone numbers may arrive as numbers
+                value = str(value)
+            record[column] = value
+
+        if record.get('annual_income') is not None:
+            # Validated as a finite whole number, so the conversion is exact
+            record['annual_income'] = int(parse_number(record['annual_income']))
+        return record
+
+
+    def import_file(self, source, file_name: Optional[str] = None,
+                    reject_report_path: Optional[str] = None) -> Dict[str, Any]:
+        """Import all applicants of a spreadsheet, returns a summary of the run"""
+        # The index refers to row positions of this frame
+        existing_data, duplicate_index = self.kyc_manager.get_derived('duplicate_index', KYCDuplicateIndex)
+        # Keys of rows accepted so far in this batch -> source row number
+        batch_keys: Dict[tuple, int] = {}
+        accepted: List[Dict[str, Any]] = []
+        rejects: List[Dict[str, Any]] = []
+        total = 0
+
+        for chunk in self.iter_chunks(source, file_name):
+            chunk.columns = [str(column).strip() for column in chunk.columns]
+            # Spreadsheet row numbers, counting the header as row 1
+            row_numbers = range(total + 2, total + 2 + len(chunk))
+            total += len(chunk)
+
+            errors = self.validator.error_lists(self.validator.validate_dataframe(chunk))
+            rows = chunk.to_dict('records')
+
+            for row_number, row, row_errors in zip(row_numbers, rows, errors):
+                if row_errors:
+                    rejects.append({'row': row_number, 'full_name': row.get('full_name'), 'reason': '; '.join(row_errors)})
+                    continue
+
+                record = self._to_record(row)
+                keys = duplicate_index.record_keys(record)
+
+                existing = duplicate_index.find_keys(keys)
+                if existing is not None:
+                    existing_id = existing_data.iloc[existing[0]]['customer_id']
+                    rejects.append({'row': row_number, 'full_name': record['full_name'],
+                                    'reason': f"Duplicate of existing Customer ID: {existing_id}"})
+                    continue
+
+                first_seen = next((batch_keys[key] for key in keys if key in batch_keys), None)
+                if first_seen is not None:
+                    rejects.append({'row': row_number, 'full_name': record['full_name'],
+                                    'reason': f"Duplicate of row {first_seen} in this file"})
+                    continue
+
+                for key in keys:
+                    batch_keys[key] = row_number
+                accepted.append(record)
+
+        customer_ids = []
+        if accepted:
+            customer_ids = self.kyc_manager.allocate_customer_ids(len(accepted))
+            for record, customer_id in zip(accepted, customer_ids):
+                record['customer_id'] = customer_id
+                record['kyc_status'] = 'Pending'
+            # Single commit for the whole batch
+            self.kyc_manager.insert_kyc_records(self.kyc_manager.read_kyc_data(), accepted)
+
+        report_path = None
+        if rejects:
+            report_path = reject_report_path or os.path.join(
+                self.config.KYC_IMPORT_REPORT_DIR,
+                f"kyc_import_rejects_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            )
+            os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+            pd.DataFrame(rejects, columns=['row', 'full_name', 'reason']).to_csv(report_path, index=False)
+
+        log_event('kyc_import_finished', level='info', sample_rate=1, rows=total, imported=len(accepted),
+                  rejected=len(rejects))
+        return {
+            'total': total,
+            'imported': len(accepted),
+            'rejected': len(rejects),
+            'customer_ids': customer_ids,
+            'rejects': rejects,
+            'reject_report': report_path
+        }
@@ -0,0 +1,313 @@
+# modules/kyc_journal.py
+
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime, date, time
+from typing import Dict, Any, List, Optional, Iterable
+from modules.kyc_dates import KYCDateColumns
+from modules.file_commit import FileLock
+from modules.event_log import log_event
+
+class KYCChangeJournal:
+    """
+    Append-only journal of KYC changes, one JSON line per event:
+    {"ts": ..., "customer_id": ..., "op": "baseline"|"insert"|"update", "changes": {field: value}}.
+    Updates only carry the fields that actually changed, so the journal grows
+    with edits rather than with copies of the table. A per-customer index of
+    line offsets makes reconstructing one record as of any moment a handful of
+    seeks; periodic full snapshots bound the replay needed to rebuild the whole
+    table as of a date.
+
+    The journal is written under lock, the KYC store's file lock: the store
+    appends the events of a commit batch while it holds that lock (see
+    write_events), so the journal follows the store's commit order. Snapshots
+    are taken in a background thread every snapshot_interval entries, only the
+    newest snapshots_kept are kept.
+    """
+    TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+    _journals: Dict[str, 'KYCChangeJournal'] = {}
+    _journals_lock = threading.Lock()
+
+    def __init__(self, journal_file: str, snapshot_dir: str, snapshot_interval: int = 1000,
+                 snapshots_kept: int = 5, lock: Optional[FileLock] = None):
+        self.journal_file = journal_file
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self.snapshots_kept = snapshots_kept
+        # Cross-process lock of the journal, the store's file lock when a store writes it
+        self.lock = lock or FileLock(journal_file)
+        self._lock = threading.RLock()
+        # customer_id -> [(ts, byte offset)] in journal order
+        self.offsets: Dict[str, List[tuple]] = {}
+        self._indexed_size = 0
+        self._entries_since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+
+    @classmethod
+    def for_file(cls, journal_file: str, snapshot_dir: str, snapshot_interval: int = 1000,
+                 snapshots_kept: int = 5, lock: Optional[FileLock] = None) -> 'KYCChangeJournal':
+        """Process-wide journal of a file, shared so the offset index is built once"""
+        key = os.path.abspath(journal_file)
+        with cls._journals_lock:
+            journal = cls._journals.get(key)
+            if journal is None:
+                journal = cls(journal_file, snapshot_dir, snapshot_interval, snapshots_kept, lock)
+                cls._journals[key] = journal
+            return journal
+
+
+    @staticmethod
+    def _plain(value):
+        """JSON-safe value: NaN -> None, dates -> ISO strings, numpy scalars -> Python scalars"""
+        if value is None:
+            return None
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        if isinstance(value, (datetime, date)):
+            return KYCDateColumns.to_storage_value(value)
+        return value.item() if hasattr(value, 'item') else value
+
+
+    @classmethod
+    def _as_timestamp(cls, as_of) -> str:
+        """Journal timestamp for a datetime, a date (end of that day) or a string"""
+        if as_of is None:
+            return datetime.now().strftime(cls.TIMESTAMP_FORMAT)
+        if isinstance(as_of, datetime):
+            return as_of.strftime(cls.TIMESTAMP_FORMAT)
+        if isinstance(as_of, date):
+            return datetime.combine(as_of, time.max).strftime(cls.TIMESTAMP_FORMAT)
+        as_of = str(as_of).strip()
+        # A bare YYYY-MM-DD means the end of that day
+        return f"{as_of} 23:59:59" if len(as_of) == 10 else as_of
+
+
+    def exists(self) -> bool:
+        return os.path.exists(self.journal_file)
+
+
+    def write_events(self, events: Iterable[Dict[str, Any]]):
+        """
+        Append events to the journal; the caller holds self.lock exclusively
+        (the store's group commit does). Starts a background snapshot when
+        snapshot_interval entries were written since the last one.
+        """
+        lines = ''.join(json.dumps(event, default=str) + '\n' for event in events)
+        if not lines:
+            return
+        directory = os.path.dirname(self.journal_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One write in append mode per batch keeps lines from interleaving
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        with self._lock:
+            self._entries_since_snapshot += lines.count('\n')
+            if self._entries_since_snapshot >= self.snapshot_interval:
+                self._entries_since_snapshot = 0
+                self._snapshot_in_background()
+
+
+    def record_baseline(self, df: pd.DataFrame, ts: Optional[str] = None):
+        """Journal the state of existing records once, when journaling starts"""
+        ts = ts or self._as_timestamp(None)
+        with self.lock.exclusive():
+            # Another process may have started the journal meanwhile
+            if self.exists():
+                return
+            self.write_events(
+                {'ts': ts, 'customer_id': record['customer_id'], 'op': 'baseline',
+                 'changes': {k: self._plain(v) for k, v in record.items() if self._plain(v) is not None}}
+                for record in df.to_dict('records')
+            )
+
+
+    def insert_events(self, records: List[Dict[str, Any]], ts: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Journal events of newly inserted records with their non-empty fields"""
+        ts = ts or self._as_timestamp(None)
+        return [
+            {'ts': ts, 'customer_id': record['customer_id'], 'op': 'insert',
+             'changes': {k: self._plain(v) for k, v in record.items() if self._plain(v) is not None}}
+            for record in records
+        ]
+
+
+    def update_events(self, customer_id: str, before: Dict[str, Any], fields: Dict[str, Any],
+                      ts: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Journal event of the fields of an edit that differ from the record before it, none if nothing changed"""
+        changes = {}
+        for column, value in fields.items():
+            value = self._plain(value)
+            if value != self._plain(before.get(column)):
+                changes[column] = value
+        if not changes:
+            return []
+        return [{'ts': ts or self._as_timestamp(None), 'customer_id': customer_id, 'op': 'update', 'changes': changes}]
+
+
+    def _refresh_index(self):
+        """Index journal lines appended since the last call (by any process)"""
+        if not self.exists():
+            return
+        with self._lock:
+            size = os.path.getsize(self.journal_file)
+            if size <= self._indexed_size:
+                return
+            with open(self.journal_file, 'rb') as f:
+                f.seek(self._indexed_size)
+                offset = self._indexed_size
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Partially written line, index it next time
+                        break
+                    event = json.loads(line)
+                    self.offsets.setdefault(event['customer_id'], []).append((event['ts'], offset))
+                    offset += len(line)
+            self._indexed_size = offset
+
+
+    def history(self, customer_id: str) -> List[Dict[str, Any]]:
+        """All journal events of a customer, oldest first"""
+        if not self.exists():
+            return []
+        self._refresh_index()
+        events = []
+        with open(self.journal_file, 'rb') as f:
+            for _, offset in self.offsets.get(customer_id, []):
+                f.seek(offset)
+                events.append(json.loads(f.readline()))
+        return events
+
+
+    def record_as_of(self, customer_id: str, as_of=None) -> Optional[Dict[str, Any]]:
+        """Reconstruct one record as it was at as_of, None if it didn't exist yet"""
+        if not self.exists():
+            return None
+        as_of = self._as_timestamp(as_of)
+        self._refresh_index()
+        record = None
+        with open(self.journal_file, 'rb') as f:
+            for ts, offset in self.offsets.get(customer_id, []):
+                if ts > as_of:
+                    continue
+                f.seek(offset)
+                event = json.loads(f.readline())
+                if event['op'] in ('baseline', 'insert'):
+                    record = dict(event['changes'])
+                else:
+                    record = dict(record or {}, **event['changes'])
+        return record
+
+
+    @staticmethod
+    def _stamp(ts: str) -> str:
+        """Digits of a timestamp, as used in snapshot file names"""
+        return ''.join(ch for ch in ts if ch.isdigit())
+
+
+    def _latest_snapshot(self, as_of: str, end: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Most recent snapshot taken at or before as_of, and at or before journal byte end"""
+        if not os.path.isdir(self.snapshot_dir):
+            return None
+        # snapshot_<journal offset>_<timestamp>.json, offsets grow with time
+        for name in sorted(os.listdir(self.snapshot_dir), reverse=True):
+            if not (name.startswith('snapshot_') and name.endswith('.json')):
+                continue
+            _, offset, stamp = name[:-len('.json')].split('_')
+            if stamp > self._stamp(as_of) or (end is not None and int(offset) > end):
+                continue
+            try:
+                with open(os.path.join(self.snapshot_dir, name), encoding='utf-8') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                # Pruned meanwhile, an older one will do
+                continue
+        return None
+
+
+    def _replay(self, as_of: str, end: Optional[int] = None) -> Dict[str, Any]:
+        """State of all records at as_of: latest earlier snapshot plus the events after it, up to byte end"""
+        snapshot = self._latest_snapshot(as_of, end)
+        records = snapshot['records'] if snapshot else {}
+        offset = snapshot['offset'] if snapshot else 0
+
+        if self.exists():
+            with open(self.journal_file, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n') or (end is not None and offset >= end):
+                        break
+                    offset += len(line)
+                    event = json.loads(line)
+                    if event['ts'] > as_of:
+                        continue
+                    customer_id = event['customer_id']
+                    if event['op'] in ('baseline', 'insert'):
+                        records[customer_id] = dict(event['changes'])
+                    else:
+                        records[customer_id] = dict(records.get(customer_id, {}), **event['changes'])
+        return records
+
+
+    def table_as_of(self, as_of=None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Reconstruct the whole KYC table as it was at as_of"""
+        records = self._replay(self._as_timestamp(as_of))
+        return pd.DataFrame(list(records.values()), columns=columns)
+
+
+    def snapshot(self) -> str:
+        """Write a full snapshot of the journal's current state, returns its path"""
+        # Writers append whole lines under the lock, so this offset is at a line boundary
+        with self.lock.shared():
+            ts = self._as_timestamp(None)
+            offset = os.path.getsize(self.journal_file) if self.exists() else 0
+        # Replayed without the lock, writes may continue past the offset meanwhile
+        records = self._replay(ts, end=offset)
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"snapshot_{offset:012d}_{self._stamp(ts)}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'ts': ts, 'offset': offset, 'records': records}, f, default=str)
+        os.replace(temp_path, path)
+        self._prune_snapshots()
+
+        log_event('kyc_journal_snapshot', level='info', sample_rate=1, records=len(records), offset=offset)
+        return path
+
+
+    def _prune_snapshots(self):
+        """Delete all but the newest snapshots_kept snapshots; older dates are replayed from the journal"""
+        names = sorted(
+            name for name in os.listdir(self.snapshot_dir)
+            if name.startswith('snapshot_') and name.endswith('.json')
+        )
+        for name in names[:-self.snapshots_kept] if self.snapshots_kept > 0 else names:
+            try:
+                os.remove(os.path.join(self.snapshot_dir, name))
+            except FileNotFoundError:
+                # Pruned by another process
+                pass
+
+
+    def _snapshot_in_background(self):
+        """Start a snapshot thread unless one is already running (self._lock held)"""
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return
+        self._snapshot_thread = threading.Thread(target=self._run_snapshot, name='kyc-journal-snapshot', daemon=True)
+        self._snapshot_thread.start()
+
+
+    def _run_snapshot(self):
+        try:
+            self.snapshot()
+        except Exception as e:
+            log_event('kyc_journal_snapshot_failed', level='error', error=str(e))
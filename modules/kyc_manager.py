@@ -8,17 +8,56 @@ import uuid
 from typing import Dict, Any, Optional, Tuple
 from config.customer_config import CustomerConfig
 from config.kyc_application_pdf_config import KYCApplicationPDFConfig
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
+from modules.kyc_validator import KYCValidator
+from modules.kyc_cache import kyc_data_cache
+from modules.kyc_search_index import KYCSearchIndex
+from modules.kyc_name_matcher import KYCNameMatcher
+from modules.customer_id_allocator import CustomerIDAllocator
+from modules.kyc_duplicate_index import KYCDuplicateIndex
+from modules.kyc_store import create_kyc_store
+from modules.kyc_import import KYCBulkImporter
+from modules.kyc_expiry import KYCExpiryIndex, expiry_scanner
+from modules.kyc_journal import KYCChangeJournal
+from modules.kyc_dates import KYCDateColumns
+from modules.systems import systems
+from modules.metrics import SEARCH_SECONDS, SEARCH_RESULTS
+from modules.event_log import log_event
 import csv
 
 class KYCManager:
+    """
+    KYC records, search, PDFs and the KYC tab. One instance is shared by all
+    sessions (see modules.systems); per-user state lives in st.session_state
+    and is set up per session by initialize_session_state().
+    """
     def __init__(self):
         self.config = CustomerConfig()
         self.pdf_config = KYCApplicationPDFConfig()
+        self.validator = KYCValidator(self.config)
+        self.dates = KYCDateColumns(self.config)
+        self.id_allocator = CustomerIDAllocator(self.config.CUSTOMER_ID_SEQUENCE_DB, self.config.CUSTOMER_ID_PREFIX)
+        self.store = create_kyc_store(self.config)
+        # Guarded by the store's lock and written in the store's commits
+        self.journal = KYCChangeJournal.for_file(
+            self.config.KYC_JOURNAL_FILE,
+            self.config.KYC_JOURNAL_SNAPSHOT_DIR,
+            self.config.KYC_JOURNAL_SNAPSHOT_INTERVAL,
+            self.config.KYC_JOURNAL_SNAPSHOTS_KEPT,
+            lock=self.store.committer.lock
+        )
+        self.store.journal = self.journal
+        self._pdf_generator = None
         self.setup_data_store()
         self.setup_pdf_directories()
-        self.initialize_session_state()
+
+
+    @property
+    def pdf_generator(self):
+        """KYC application PDF generator, reportlab is only imported when a PDF is first generated"""
+        if self._pdf_generator is None:
+            from modules.kyc_application_pdf import KYCApplicationPDFGenerator
+            self._pdf_generator = KYCApplicationPDFGenerator(self.pdf_config)
+        return self._pdf_generator
 
 
     def get_data_types(self) -> Dict[str, str]:
@@ -28,53 +67,117 @@ class KYCManager:
 
     # Helper function to safely parse dates
     def parse_date(self, date_str):
-        if pd.isna(date_str) or date_str is None:
+        if date_str is None or pd.isna(date_str):
             return None
+        if isinstance(date_str, datetime):
+            # Typed value from the KYC dataset, nothing to parse
+            return date_str.date()
         try:
             return datetime.strptime(str(date_str), '%Y-%m-%d').date()
         except:
             return None
 
 
+    @staticmethod
+    def format_date(value) -> Optional[str]:
+        """Format a date widget value as ISO string, None if not set"""
+        return value.strftime('%Y-%m-%d') if value else None
+
+
     def setup_data_store(self):
         """Initialize data storage and create files if they don't exist"""
         try:
             # Create data directory if it doesn't exist
             os.makedirs(self.config.DATA_DIR, exist_ok=True)
-        
-            # Create KYC file with headers if it doesn't exist
-            if not os.path.exists(self.config.KYC_DATA_FILE):
-                # Create empty DataFrame with correct data types
-                df = pd.DataFrame(columns=self.config.KYC_CSV_HEADERS).astype(self.get_data_types())
-                        
-                # Create directory if it doesn't exist (in case KYC_DATA_FILE includes subdirectories)
-                os.makedirs(os.path.dirname(self.config.KYC_DATA_FILE), exist_ok=True)
-            
-                # Save empty DataFrame with headers
-                df.to_csv(self.config.KYC_DATA_FILE, index=False)
-                print(f"Created new KYC data file: {self.config.KYC_DATA_FILE}")
+
+            # Create the KYC store (file or database) if it doesn't exist
+            self.store.setup()
+
+            # Start the change journal from the records that already exist
+            if not self.journal.exists():
+                self.journal.record_baseline(self.store.load())
        
         except Exception as e:
             st.session_state.message = ("error", f"Error setting up data store: {str(e)}")
             raise
 
 
+    def load_kyc_data(self) -> pd.DataFrame:
+        """Load all KYC records from the store, dates parsed once into datetime64 with display columns"""
+        return self.dates.parse(self.store.load())
+
+
     def read_kyc_data(self) -> pd.DataFrame:
-        """Centralized method to read KYC data with correct types"""
+        """
+        Centralized method to read KYC data with correct types.
+        Served from the process-wide cache; the returned frame is shared, copy before modifying.
+        """
         try:
-            return pd.read_csv(
-                self.config.KYC_DATA_FILE,
-                dtype=self.get_data_types(),
-                na_values=['nan', 'None', ''],
-                keep_default_na=True
-            )
+            return kyc_data_cache.get(self.store.data_file, self.load_kyc_data)
         except FileNotFoundError:
-            return pd.DataFrame(columns=self.config.KYC_CSV_HEADERS).astype(self.get_data_types())
+            return self.dates.parse(pd.DataFrame(columns=self.config.KYC_CSV_HEADERS).astype(self.get_data_types()))
         except Exception as e:
             st.session_state.message = ("error", f"Error reading KYC data: {str(e)}")
             raise
 
 
+    def get_derived(self, name: str, builder) -> Tuple[pd.DataFrame, Any]:
+        """Return the cached KYC data with a structure derived from it (e.g. search index)"""
+        return kyc_data_cache.get_derived(self.store.data_file, self.load_kyc_data, name, builder)
+
+
+    def insert_kyc_records(self, df: pd.DataFrame, records: list) -> pd.DataFrame:
+        """
+        Append new records to the store and the shared cache.
+        df is the current KYC data; returns the frame including the new records.
+        """
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        records = [dict(record, last_updated=updated_at) for record in records]
+        base_signature = kyc_data_cache.signature(self.store.data_file, df)
+        new_rows = self.dates.parse(pd.DataFrame(records).reindex(columns=self.config.KYC_CSV_HEADERS))
+        df = pd.concat([df, new_rows.reindex(columns=df.columns)], ignore_index=True)
+        commit = self.store.insert_records(df, records, self.journal.insert_events(records, ts=updated_at))
+        self._cache_written(df, range(len(df) - len(records), len(df)), base_signature, commit)
+        return df
+
+
+    def update_kyc_record(self, df: pd.DataFrame, customer_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Apply an edit to one record in the store and the shared cache.
+        df is the current KYC data; it is copied, never modified.
+        """
+        mask = df['customer_id'] == customer_id
+        if not mask.any():
+            return False
+
+        before = df.loc[mask].iloc[0].to_dict()
+        base_signature = kyc_data_cache.signature(self.store.data_file, df)
+        df = df.copy()
+        fields = {column: value for column, value in fields.items() if column in df.columns}
+        fields['last_updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for column, value in self.dates.typed_fields(fields).items():
+            df.loc[mask, column] = value
+
+        journal_events = self.journal.update_events(customer_id, before, fields, ts=fields['last_updated'])
+        commit = self.store.update_record(df, customer_id, fields, journal_events)
+        self._cache_written(df, mask.to_numpy().nonzero()[0], base_signature, commit)
+        return True
+
+
+    def _cache_written(self, df: pd.DataFrame, changed_rows, base_signature, commit):
+        """
+        Hand a written frame to the shared cache. A write is only cached when
+        it was committed alone on top of the version df was derived from;
+        otherwise the store holds writes df doesn't know about, and the next
+        read reloads it.
+        """
+        if commit.batch_size == 1 and base_signature is not None and commit.before == base_signature:
+            kyc_data_cache.put(self.store.data_file, df, changed_rows, signature=commit.after,
+                              base_signature=base_signature)
+        else:
+            kyc_data_cache.invalidate(self.store.data_file)
+
+
     def setup_pdf_directories(self):
         """Create necessary directory for PDF storage"""
         os.makedirs(self.pdf_config.KYC_APPLICATION_PDF_DIR, exist_ok=True)
@@ -94,6 +197,13 @@ class KYCManager:
         if 'selected_customer_id' not in st.session_state:
             st.session_state.selected_customer_id = None
 
+        # Search paging, reset to the first page when the search term changes
+        if 'kyc_search_term' not in st.session_state:
+            st.session_state.kyc_search_term = ''
+
+        if 'kyc_search_page' not in st.session_state:
+            st.session_state.kyc_search_page = 1
+
         if 'is_update_mode' not in st.session_state: 
             st.session_state.is_update_mode = False
 
@@ -102,60 +212,46 @@ class KYCManager:
             st.session_state.message = None
 
 
-    def generate_customer_id(self) -> str:
-        """Generate sequential customer ID in format CUSTYEARXXX"""
-        try:
-            current_year = datetime.now().year
-    
-            # Read the CSV file
-            df = self.read_kyc_data()
-        
-            # If file is empty, return first ID
-            if df.empty:
-                return f"CUST{current_year}001"
+    def last_sequence_in_data(self, year: int) -> int:
+        """Highest sequence already used in the KYC data for the year (seeds the allocator)"""
+        df = self.read_kyc_data()
+        year_prefix = f"{self.config.CUSTOMER_ID_PREFIX}{year}"
+        ids = df['customer_id'].dropna()
+        sequences = pd.to_numeric(
+            ids[ids.str.startswith(year_prefix)].str.slice(len(year_prefix)), errors='coerce'
+        ).dropna()
+        return int(sequences.max()) if not sequences.empty else 0
 
-            # Get all IDs for current year
-            current_year_pattern = f"CUST{current_year}"
-            current_year_ids = df[df['customer_id'].str.startswith(current_year_pattern, na=False)]
 
-            # If no IDs for current year, return first ID
-            if current_year_ids.empty:
-                return f"CUST{current_year}001"
+    def allocate_customer_ids(self, count: int) -> list:
+        """Reserve a block of sequential customer IDs in format CUSTYEARXXX"""
+        return self.id_allocator.allocate(count, seed=self.last_sequence_in_data)
 
-            # Get the last ID and increment
-            last_id = current_year_ids['customer_id'].max()
-            print(f"Last ID found: {last_id}")
-        
-            # Extract sequence number
-            sequence = int(last_id[-3:]) + 1
-        
-            # Generate new ID
-            new_id = f"CUST{current_year}{sequence:03d}"
-            print(f"Generated new ID: {new_id}")
-        
+
+    def generate_customer_id(self) -> str:
+        """Generate sequential customer ID in format CUSTYEARXXX"""
+        try:
+            new_id = self.allocate_customer_ids(1)[0]
+            log_event('kyc_customer_id_generated', customer_id=new_id)
             return new_id
 
         except Exception as e:
-            print(f"Error in generate_customer_id: {str(e)}")
+            log_event('kyc_customer_id_failed', level='error', error=str(e))
             st.session_state.message = ("error", f"Error generating customer ID: {str(e)}")
             return ""
 
 
-    def check_duplicate(self, full_name: str, date_of_birth: str, passport_number: str) -> Tuple[bool, Optional[Dict]]:
-        """Check for duplicate records based on name, DOB and passport"""
+    def check_duplicate(self, full_name: str, date_of_birth: str, passport_number: str,
+                        emirates_id: Optional[str] = None, visa_uid: Optional[str] = None) -> Tuple[bool, Optional[Dict]]:
+        """Check for duplicate records based on name, DOB and passport, or Emirates ID / visa UID"""
         try:
-            df = self.read_kyc_data()
-        
-            # Case-insensitive comparison
-            mask = (
-                df['full_name'].str.lower() == full_name.lower() &
-                df['date_of_birth'] == date_of_birth &
-                df['passport_number'].str.lower() == passport_number.lower()
-            )
-        
-            matches = df[mask]
-            if not matches.empty:
-                return True, matches.iloc[0].to_dict()
+            df, index = self.get_derived('duplicate_index', KYCDuplicateIndex)
+
+            match = index.find(full_name, date_of_birth, passport_number, emirates_id, visa_uid)
+            if match is not None:
+                position, matched_on = match
+                log_event('kyc_duplicate_found', matched_on=matched_on)
+                return True, df.iloc[position].to_dict()
             return False, None
         
         except Exception as e:
@@ -163,71 +259,192 @@ class KYCManager:
             return False, None
 
 
-    def save_kyc_record(self, kyc_data: Dict[str, Any]) -> Tuple[bool, str]:
-        """Save KYC record to CSV"""
+    def save_kyc_record(self, kyc_data: Dict[str, Any], update: Optional[bool] = None) -> Tuple[bool, str]:
+        """
+        Save KYC record to CSV. update selects editing an existing record over
+        creating one; by default it follows the form's update mode.
+        """
+        if update is None:
+            update = st.session_state.is_update_mode
         try:
+            validation_errors = self.validator.validate_record(kyc_data)
+            if validation_errors:
+                return False, "Validation failed: " + "; ".join(validation_errors)
+
             # Read with proper types
             df = self.read_kyc_data()
 
             # Update existing record
-            if st.session_state.is_update_mode and kyc_data.get('customer_id'):
-                print(f"Updating record: {kyc_data['customer_id']}")
-                mask = df['customer_id'] == kyc_data['customer_id']
-                if df[mask].empty:
+            if update and kyc_data.get('customer_id'):
+                log_event('kyc_record_updating', customer_id=kyc_data['customer_id'])
+                if not self.update_kyc_record(df, kyc_data['customer_id'], kyc_data):
                     return False, f"Error: Customer ID {kyc_data['customer_id']} not found"
 
-                # Update each field individually
-                for column in df.columns:
-                    if column in kyc_data:
-                        df.loc[mask, column] = kyc_data[column]
-                
-                df.to_csv(self.config.KYC_DATA_FILE, index=False)
                 return True, f"Customer record updated successfully: {kyc_data['customer_id']}"
             
             # New Record
             else:
-                print("Creating new record")
+                log_event('kyc_record_creating')
                 # Check for duplicates
                 is_duplicate, existing_record = self.check_duplicate(
                     kyc_data['full_name'],
                     kyc_data['date_of_birth'],
-                    kyc_data['passport_number']
+                    kyc_data['passport_number'],
+                    kyc_data.get('emirates_id'),
+                    kyc_data.get('visa_uid')
                 )
             
                 if is_duplicate:
                     return False, f"Duplicate record found with Customer ID: {existing_record['customer_id']}"
+
+                # Screen for transliteration variants of the name with the same date of birth
+                similar = self.screen_duplicates(kyc_data['full_name'], kyc_data['date_of_birth'])
             
                 # Generate new customer ID
                 cust_id = self.generate_customer_id()
+                if not cust_id:
+                    return False, "Error generating customer ID"
 
                 kyc_data['customer_id'] = cust_id
                 kyc_data['kyc_status'] = 'Pending'
                 
                 # Add new record
-                df = pd.concat([df, pd.DataFrame([kyc_data])], ignore_index=True)
-                df.to_csv(self.config.KYC_DATA_FILE, index=False)
+                self.insert_kyc_records(df, [kyc_data])
 
-                return True, f"New KYC record created with Customer ID: {kyc_data['customer_id']}"
+                message = f"New KYC record created with Customer ID: {kyc_data['customer_id']}"
+                if not similar.empty:
+                    candidates = ", ".join(
+                        f"{row.customer_id} ({row.full_name}, {row.match_score:.0%})" for row in similar.itertuples()
+                    )
+                    message += f". Possible duplicates for review: {candidates}"
+                return True, message
 
         except Exception as e:
-            print(f"Error saving record: {str(e)}")
+            log_event('kyc_record_save_failed', level='error', error=str(e))
             return False, f"Error saving KYC record: {str(e)}"
 
 
+    def import_kyc_file(self, source, file_name: Optional[str] = None) -> Dict[str, Any]:
+        """Bulk import applicants from a CSV/XLSX file, returns the import summary"""
+        return KYCBulkImporter(self).import_file(source, file_name=file_name)
+
+
+    def generate_kyc_applications(self, kyc_status: Optional[str] = 'Completed', customer_ids: Optional[list] = None,
+                                  force: bool = False) -> Dict[str, Any]:
+        """Batch-generate application PDFs in parallel, returns the run manifest"""
+        from modules.kyc_pdf_batch import KYCPDFBatchGenerator
+        return KYCPDFBatchGenerator(self).run(kyc_status=kyc_status, customer_ids=customer_ids, force=force)
+
+
     def search_records(self, search_term: str) -> pd.DataFrame:
-        """Search KYC records"""
+        """Search KYC records by substring of customer ID, name, passport, Emirates ID or visa UID"""
         try:
-            df = self.read_kyc_data()
-
             if search_term:
-                mask = df.apply(lambda x: x.astype(str).str.contains(search_term, case=False)).any(axis=1)
-                return df[mask]
-            return df
+                df, index = self.get_derived(
+                    'search_index', lambda data: KYCSearchIndex(data, self.config.KYC_SEARCH_FIELDS)
+                )
+                with SEARCH_SECONDS.time(kind='substring'):
+                    positions = index.search(search_term)
+                SEARCH_RESULTS.observe(len(positions), kind='substring')
+                return df.iloc[positions]
+            return self.read_kyc_data()
         except Exception as e:
             st.session_state.message = ("error", f"Search error: {str(e)}")
             return pd.DataFrame(columns=self.config.KYC_CSV_HEADERS).astype(self.get_data_types())
 
 
+    def search_ranked(self, search_term: str, limit: Optional[int] = None) -> Tuple[pd.DataFrame, int]:
+        """Best search hits first (at most limit, default KYC_SEARCH_MAX_RESULTS), with the total number of hits"""
+        df, index = self.get_derived(
+            'search_index', lambda data: KYCSearchIndex(data, self.config.KYC_SEARCH_FIELDS)
+        )
+        with SEARCH_SECONDS.time(kind='ranked'):
+            ranked, total = index.search_ranked(search_term, limit=limit or self.config.KYC_SEARCH_MAX_RESULTS)
+        SEARCH_RESULTS.observe(total, kind='ranked')
+        return df.iloc[ranked], total
+
+
+    def search_page(self, search_term: str, page: int = 1, page_size: Optional[int] = None) -> Tuple[pd.DataFrame, int, int]:
+        """
+        One page of the top-ranked search hits, projected to KYC_SEARCH_RESULT_COLUMNS.
+        Returns (page rows, number of ranked hits available for paging, total hits).
+        """
+        page_size = page_size or self.config.KYC_SEARCH_PAGE_SIZE
+        try:
+            ranked, total = self.search_ranked(search_term)
+            start = (max(page, 1) - 1) * page_size
+            return self.project_results(ranked.iloc[start:start + page_size]), len(ranked), total
+        except Exception as e:
+            st.session_state.message = ("error", f"Search error: {str(e)}")
+            return pd.DataFrame(columns=self.config.KYC_SEARCH_RESULT_COLUMNS), 0, 0
+
+
+    def project_results(self, results: pd.DataFrame, extra_columns: Optional[list] = None) -> pd.DataFrame:
+        """Columns of the results grid, dates taken from their pre-formatted display columns"""
+        columns = self.config.KYC_SEARCH_RESULT_COLUMNS + (extra_columns or [])
+        projected = results[[
+            self.dates.display_column(column) if column in self.dates.fields else column
+            for column in columns
+        ]]
+        projected.columns = columns
+        return projected
+
+
+    def find_similar_names(self, full_name: str, limit: int = 10, min_score: Optional[float] = None) -> pd.DataFrame:
+        """Rank KYC records by fuzzy/phonetic similarity to full_name, adds a match_score column"""
+        if min_score is None:
+            min_score = self.config.KYC_FUZZY_MATCH_THRESHOLD
+
+        df, matcher = self.get_derived('name_matcher', KYCNameMatcher)
+        with SEARCH_SECONDS.time(kind='fuzzy'):
+            matches = matcher.match(full_name, limit=limit, min_score=min_score)
+        SEARCH_RESULTS.observe(len(matches), kind='fuzzy')
+
+        results = df.iloc[[match['position'] for match in matches]].copy()
+        results['match_score'] = [match['score'] for match in matches]
+        return results
+
+
+    def screen_duplicates(self, full_name: str, date_of_birth: str, limit: int = 5) -> pd.DataFrame:
+        """Find records with a closely matching name and the same date of birth"""
+        try:
+            similar = self.find_similar_names(
+                full_name, limit=limit, min_score=self.config.KYC_DUPLICATE_SCREEN_THRESHOLD
+            )
+            return similar[similar['date_of_birth'] == self.dates.to_timestamp(date_of_birth)]
+        except Exception as e:
+            log_event('kyc_duplicate_screen_failed', level='warning', error=str(e))
+            return pd.DataFrame(columns=self.config.KYC_CSV_HEADERS + ['match_score'])
+
+
+    def get_expiring_documents(self, days: int, include_expired: bool = False, as_of=None) -> pd.DataFrame:
+        """Identity documents expiring in the next N days (and optionally already expired), soonest first"""
+        df, index = self.get_derived(
+            'expiry_index', lambda data: KYCExpiryIndex(data, self.config.KYC_EXPIRY_FIELDS)
+        )
+        return index.expiring_within(df, days, as_of=as_of, include_expired=include_expired)
+
+
+    def get_record_history(self, customer_id: str) -> list:
+        """Journaled changes of a customer record, oldest first"""
+        return self.journal.history(customer_id)
+
+
+    def get_record_as_of(self, customer_id: str, as_of) -> Optional[Dict[str, Any]]:
+        """A customer record as it was at a point in time (date = end of that day)"""
+        return self.journal.record_as_of(customer_id, as_of)
+
+
+    def get_kyc_data_as_of(self, as_of) -> pd.DataFrame:
+        """The whole KYC table as it was at a point in time"""
+        return self.journal.table_as_of(as_of, columns=self.config.KYC_CSV_HEADERS)
+
+
+    def start_expiry_scanner(self):
+        """Start the process-wide scheduled expiry scan (once per process)"""
+        expiry_scanner.start(self, self.config.KYC_EXPIRY_SCAN_INTERVAL_HOURS)
+
+
     def render_kyc_form(self, customer_id: Optional[str] = None, existing_data: Optional[Dict] = None):
         """Render KYC form"""
         with st.form("kyc_form"):
@@ -459,20 +676,20 @@ class KYCManager:
                     # Customer Information
                     'gender': gender,
                     'nationality': nationality,
-                    'date_of_birth': date_of_birth.strftime('%Y-%m-%d'),
+                    'date_of_birth': self.format_date(date_of_birth),
                     'place_of_birth': place_of_birth,
                     'passport_number': passport_number,
                     'passport_issue_place': passport_issue_place,
-                    'passport_issue_date': passport_issue_date.strftime('%Y-%m-%d'),
-                    'passport_expiry_date': passport_expiry_date.strftime('%Y-%m-%d'),
+                    'passport_issue_date': self.format_date(passport_issue_date),
+                    'passport_expiry_date': self.format_date(passport_expiry_date),
                     'dual_nationality': dual_nationality,
                     'dual_passport_number': dual_passport_number,
-                    'dual_passport_issue_date': dual_passport_issue_date.strftime('%Y-%m-%d') if dual_passport_issue_date else None,
-                    'dual_passport_expiry_date': dual_passport_expiry_date.strftime('%Y-%m-%d') if dual_passport_expiry_date else None,
+                    'dual_passport_issue_date': self.format_date(dual_passport_issue_date),
+                    'dual_passport_expiry_date': self.format_date(dual_passport_expiry_date),
                     'emirates_id': emirates_id,
-                    'emirates_id_expiry': emirates_id_expiry.strftime('%Y-%m-%d'),
+                    'emirates_id_expiry': self.format_date(emirates_id_expiry),
                     'visa_uid': visa_uid,
-                    'visa_expiry': visa_expiry.strftime('%Y-%m-%d'),
+                    'visa_expiry': self.format_date(visa_expiry),
                     # Customer Occupation
                     'occupation': occupation,
                     'sponsor_business_name': sponsor_business_name,
@@ -488,11 +705,11 @@ class KYCManager:
                 
                 # Handle update vs new record
                 if st.session_state.is_update_mode:
-                    print(f"Updating record for customer ID: {customer_id}")
                     kyc_data['customer_id'] = customer_id  # Ensure customer_id is set for update
                     kyc_data['kyc_status'] = kyc_status    # Preserve the selected status
                 
-                print("\n\nDebugging: in kyc_manager: kyc_data : ", kyc_data)
+                log_event('kyc_form_submitted', update=st.session_state.is_update_mode,
+                          customer_id=kyc_data.get('customer_id'))
                 success, message = self.save_kyc_record(kyc_data)
                 if success:
                     st.session_state.message = ("success", message)
@@ -598,9 +815,11 @@ class KYCManager:
                 st.rerun()  # Changed from experimental_rerun to rerun
 
             # Message display area - right below the buttons
+        self.report_batch_job()
+
         if 'message' in st.session_state and st.session_state.message:
             msg_type, msg_text = st.session_state.message
-            print("\n\nDebugging : msg_text :", msg_text)
+            log_event('kyc_message_shown', message_type=msg_type, message=msg_text)
             
             # Create a dedicated message container with custom styling
             message_styles = {
@@ -641,14 +860,36 @@ class KYCManager:
             )
             st.markdown("</div>", unsafe_allow_html=True)
         
+            if search_term != st.session_state.kyc_search_term:
+                st.session_state.kyc_search_term = search_term
+                st.session_state.kyc_search_page = 1
+
             # Show search results if search term is entered
             if search_term:
-                results = self.search_records(search_term)
+                page_size = self.config.KYC_SEARCH_PAGE_SIZE
+                results, ranked_count, total = self.search_page(
+                    search_term, page=st.session_state.kyc_search_page, page_size=page_size
+                )
+                if results.empty and ranked_count > 0:
+                    # Page no longer exists (fewer hits than before), go back to the first one
+                    st.session_state.kyc_search_page = 1
+                    results, ranked_count, total = self.search_page(search_term, page=1, page_size=page_size)
+                if results.empty and total == 0 and len(search_term.strip()) >= 3:
+                    # No substring hit, suggest similar names (transliteration variants)
+                    similar = self.find_similar_names(search_term)
+                    results = self.project_results(similar, ['match_score'])
+                    ranked_count = total = len(results)
+                    if not results.empty:
+                        st.info("No exact matches found, showing similar names")
                 if not results.empty:
                     st.markdown("<div class='info-box'>", unsafe_allow_html=True)
 
-                    # Add selection dropdown
-                    customer_options = [f"{row['customer_id']} - {row['full_name']}" for _, row in results.iterrows()]
+                    # Add selection dropdown for the rows of this page only
+                    customer_ids = results['customer_id'].tolist()
+                    customer_options = [
+                        f"{customer_id} - {full_name}"
+                        for customer_id, full_name in zip(customer_ids, results['full_name'].tolist())
+                    ]
                     selected_index = st.selectbox(
                         "Select a customer record:",
                         range(len(customer_options)),
@@ -656,12 +897,119 @@ class KYCManager:
                     )
 
                     # Store selected customer ID
-                    st.session_state.selected_customer_id = results.iloc[selected_index]['customer_id']
+                    st.session_state.selected_customer_id = customer_ids[selected_index]
                     
                     # Display results
-                    st.dataframe(results, use_container_width=True)
+                    st.dataframe(results, use_container_width=True, hide_index=True)
+
+                    # Pagination over the top-ranked hits
+                    page = st.session_state.kyc_search_page
+                    page_count = max(1, -(-ranked_count // page_size))
+                    first = (page - 1) * page_size + 1
+                    caption = f"Showing {first}-{first + len(results) - 1} of {total} matches"
+                    if total > ranked_count:
+                        caption += f" (top {ranked_count} by relevance, refine the search to see others)"
+                    st.caption(caption)
+
+                    if page_count > 1:
+                        prev_col, page_col, next_col = st.columns([1, 2, 1])
+                        with prev_col:
+                            if st.button("Previous", key="search_prev_btn", disabled=page <= 1):
+                                st.session_state.kyc_search_page = page - 1
+                                st.rerun()
+                        with page_col:
+                            st.markdown(f"<div style='text-align:center'>Page {page} of {page_count}</div>",
+                                        unsafe_allow_html=True)
+                        with next_col:
+                            if st.button("Next", key="search_next_btn", disabled=page >= page_count):
+                                st.session_state.kyc_search_page = page + 1
+                                st.rerun()
                     st.markdown("</div>", unsafe_allow_html=True)
     
+            # Bulk import of applicant spreadsheets
+            with st.expander("Bulk Import"):
+                uploaded_file = st.file_uploader(
+                    "Upload KYC applicants (CSV or XLSX)",
+                    type=['csv', 'xlsx'],
+                    key="kyc_import_file"
+                )
+                if uploaded_file is not None and st.button("Import", key="import_btn"):
+                    try:
+                        summary = self.import_kyc_file(uploaded_file, file_name=uploaded_file.name)
+                        message = f"Imported {summary['imported']} of {summary['total']} rows"
+                        if summary['rejected']:
+                            message += f", {summary['rejected']} rejected (report: {summary['reject_report']})"
+                        st.session_state.message = ("warning" if summary['rejected'] else "success", message)
+                    except Exception as e:
+                        st.session_state.message = ("error", f"Import failed: {str(e)}")
+                    st.rerun()
+
+            # Batch generation of application PDFs
+            with st.expander("Batch Application PDFs"):
+                batch_status = st.selectbox(
+                    "KYC Status",
+                    options=[option for option in self.config.KYC_STATUS_OPTIONS if option],
+                    key="pdf_batch_status"
+                )
+                batch_force = st.checkbox("Regenerate up-to-date PDFs", key="pdf_batch_force")
+                job_runner = systems.get('job_runner')
+                if job_runner.is_active(st.session_state.get('kyc_batch_job_id')):
+                    self.render_batch_job(job_runner)
+                elif st.button("Generate PDFs", key="pdf_batch_btn"):
+                    try:
+                        # Runs in the background, the expander polls it until it finishes
+                        st.session_state.kyc_batch_job_id = job_runner.submit(
+                            'kyc_pdf_batch', self.generate_kyc_applications, kyc_status=batch_status, force=batch_force
+                        )
+                    except Exception as e:
+                        st.session_state.message = ("error", f"Batch generation failed: {str(e)}")
+                    st.rerun()
+
+            # Compliance view of expired and expiring identity documents
+            with st.expander("Document Expiry"):
+                expiry_days = st.number_input(
+                    "Expiring within (days)",
+                    min_value=0,
+                    value=self.config.KYC_EXPIRY_WARNING_DAYS,
+                    step=1,
+                    key="expiry_days"
+                )
+                include_expired = st.checkbox("Include expired documents", value=True, key="expiry_include_expired")
+                expiring = self.get_expiring_documents(int(expiry_days), include_expired=include_expired)
+                if expiring.empty:
+                    st.info("No documents in this window")
+                else:
+                    st.dataframe(expiring, use_container_width=True)
+                if expiry_scanner.last_scan:
+                    st.caption(
+                        f"Last scan {expiry_scanner.last_scan['scanned_at']}: "
+                        f"{expiry_scanner.last_scan['expired']} expired, {expiry_scanner.last_scan['expiring']} expiring"
+                    )
+
+
+            # Audit trail of the selected customer from the change journal
+            if st.session_state.selected_customer_id:
+                with st.expander(f"Record History - {st.session_state.selected_customer_id}"):
+                    history = self.get_record_history(st.session_state.selected_customer_id)
+                    if not history:
+                        st.info("No journaled changes for this customer")
+                    else:
+                        st.dataframe(
+                            pd.DataFrame([
+                                {'timestamp': event['ts'], 'change': event['op'],
+                                 'fields': ', '.join(f"{k}: {v}" for k, v in event['changes'].items())}
+                                for event in history
+                            ]),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                        as_of = st.date_input("Show record as of", value=datetime.now().date(), key="history_as_of")
+                        record = self.get_record_as_of(st.session_state.selected_customer_id, as_of)
+                        if record is None:
+                            st.info(f"Record did not exist on {as_of.strftime('%d-%m-%Y')}")
+                        else:
+                            st.json(record)
+    
         # Show form if we're in add/edit mode
         if st.session_state.show_form:
             self.render_kyc_form(
@@ -670,253 +1018,51 @@ class KYCManager:
             )
 
 
+    def report_batch_job(self):
+        """Turn a finished batch PDF job of this session into the tab message"""
+        job_id = st.session_state.get('kyc_batch_job_id')
+        if not job_id:
+            return
+        job_runner = systems.get('job_runner')
+        job = job_runner.status(job_id)
+        if job is not None and job['status'] in job_runner.ACTIVE:
+            return
+
+        st.session_state.kyc_batch_job_id = None
+        if job is None:
+            return
+        if job['status'] == 'failed':
+            st.session_state.message = ("error", f"Batch generation failed: {job['error']}")
+            return
+
+        manifest = job['result']
+        message = (f"Generated {manifest['generated']} PDFs, skipped {manifest['skipped']} "
+                   f"up-to-date in {manifest['total_seconds']}s")
+        if manifest['failed']:
+            message += f", {manifest['failed']} failed (manifest: {manifest['manifest_path']})"
+        st.session_state.message = ("warning" if manifest['failed'] else "success", message)
+
+
+    def render_batch_job(self, job_runner):
+        """Progress of this session's batch PDF job, reruns the page once it has finished"""
+        job_id = st.session_state.kyc_batch_job_id
+
+        @st.fragment(run_every=self.config.JOB_POLL_SECONDS)
+        def poll_batch_job():
+            job = job_runner.status(job_id)
+            if job is not None and job['status'] in job_runner.ACTIVE:
+                st.info(f"Generating PDFs ({job['status']})...")
+            else:
+                st.rerun()
+
+        poll_batch_job()
+
+
     def generate_kyc_application(self, customer_data: Dict[str, Any]) -> Tuple[bool, str]:
         """Generate KYC application PDF"""
         try:
-            filename = f"kyc_application_{customer_data['customer_id']}.pdf"
-            filepath = os.path.join(self.pdf_config.KYC_APPLICATION_PDF_DIR, filename)
-        
-            c = canvas.Canvas(filepath, pagesize=A4)
-            width, height = A4
-
-            # Main border
-            c.rect(40, height-750, 515, 690)  # Adjust height as needed
-            
-            # Title section border
-            c.rect(40, height-60, 515, 50)
-            
-            # Title in red
-            c.setFillColorRGB(1, 0, 0)
-            c.setFont('Helvetica-Bold', 14)
-            c.drawCentredString(width/2, height-30, "KYC APPLICATION")
-            
-            # Subtitle with proper spacing
-            subtitle = "(To be Filled by Each Purchaser Separately)"
-            c.setFont('Helvetica', 11)  # Reduced font size
-            text_width = c.stringWidth(subtitle, 'Helvetica', 11)
-            c.setFillColorRGB(1, 1, 0)  # Yellow background
-            c.rect((width-text_width)/2 - 2, height-50, text_width + 4, 16, fill=1)
-            c.setFillColorRGB(1, 0, 0)  # Red text
-            c.drawCentredString(width/2, height-45, subtitle)
-
-            y = height - 60
-            c.setFillColorRGB(0, 0, 0)
-
-            # Generate sections
-            for section in self.pdf_config.PDF_SECTIONS:
-                if section == "Customer Information":
-                    y = self._add_two_column_section(c, section, customer_data, y)
-                elif section == "Declaration":
-                    y = self._add_declaration(c, customer_data, y)
-                else:
-                    y = self._add_section(c, section, customer_data, y)
-
-            c.save()
+            filepath = self.pdf_generator.generate(customer_data)
             return True, f"PDF generated successfully: {filepath}"
     
         except Exception as e:
             return False, f"Error generating PDF: {str(e)}"
-
-
-    def _add_section(self, canvas, section: str, data: Dict[str, Any], y: int) -> int:
-        """Add a regular section with single column layout"""
-        # Section header with grid
-        canvas.rect(40, y-20, 515, 20)  # Grid for header
-        if section == "CUSTOMER INFORMATION":
-            canvas.setFillColorRGB(0, 0, 0)
-        else:
-            canvas.setFillColorRGB(0.9, 0.95, 1.0)
-            canvas.rect(40, y-20, 515, 20, fill=1)
-            canvas.setFillColorRGB(1, 0, 0)
-
-        canvas.setFont('Helvetica-Bold', 11)
-        canvas.drawCentredString(297, y-15, section)
-        canvas.setFillColorRGB(0, 0, 0)
-    
-        y -= 20
-        canvas.setFont('Helvetica', 10)
-
-        is_merged_cell_active = False
-    
-        # Draw fields with continuous grid
-        for label, key in self.pdf_config.PDF_FIELDS.get(section, []):
-            if label in ["Residential Address", "Home Address"] and not is_merged_cell_active:
-                # First row: Draw merged label cell and first value
-                is_merged_cell_active = True
-            
-                # Draw merged label cell
-                canvas.rect(40, y-40, 210, 40)  # Merged cell for label
-                y_centered = y - 25  # Center position for the merged cell
-
-                canvas.setFont('Helvetica-Bold', 9)
-                canvas.drawString(45, y_centered, label)
-            
-                # Draw first value cell
-                canvas.rect(250, y-20, 305, 20)
-                canvas.setFont('Helvetica', 9)
-                value = str(data.get(key, '')) 
-                if not pd.isna(value) and value.lower() != 'nan':
-                    canvas.drawString(255, y-15, value)
-            
-                y -= 20  # Move to next line position
-            
-            elif is_merged_cell_active:
-                # Second row: Skip label but draw second value
-                is_merged_cell_active = False
-            
-                # Draw only second value cell
-                canvas.rect(250, y-20, 305, 20)
-                canvas.setFont('Helvetica', 9)
-                value = str(data.get(key, '')) 
-                if not pd.isna(value) and value.lower() != 'nan':
-                    canvas.drawString(255, y-15, value)
-            
-                y -= 20  # Move to next line position
-            
-            else:
-                # Normal field handling
-                canvas.rect(40, y-20, 210, 20)  # Label box
-                canvas.rect(250, y-20, 305, 20)  # Value box
-            
-                canvas.setFont('Helvetica-Bold', 9)
-                canvas.drawString(45, y-15, label)
-
-                canvas.setFont('Helvetica', 9)
-                value = str(data.get(key, ''))
-                if isinstance(value, str) and key.endswith(('_date', 'Date')):
-                    try:
-                        value = datetime.strptime(value, '%Y-%m-%d').strftime('%d-%m-%Y')
-                    except:
-                        pass
-                if not pd.isna(value) and value.lower() != 'nan':
-                    canvas.drawString(255, y-15, value)
-            
-                y -= 20
-    
-        return y
-
-
-    def _add_two_column_section(self, canvas, section: str, data: Dict[str, Any], y: int) -> int:
-        """Add Customer Information section with two-column layout"""
-        # Section header
-        canvas.setFillColorRGB(0.9, 0.95, 1.0)
-        canvas.rect(40, y-20, 515, 20, fill=1)
-        canvas.setFillColorRGB(1, 0, 0)
-        canvas.setFont('Helvetica-Bold', 11)
-        canvas.drawCentredString(297, y-15, section)
-        
-        y -= 25
-        canvas.setFont('Helvetica', 10)
-        canvas.setFillColorRGB(0, 0, 0)
-    
-        # Two-column layout
-        fields = self.pdf_config.PDF_FIELDS.get(section, [])
-        mid_point = 297
-    
-        for i in range(0, len(fields), 2):
-            # Vertical lines
-            canvas.line(mid_point, y, mid_point, y-20)  # Middle divider
-            canvas.line(145, y, 145, y-20)      # Left column divider
-            canvas.line(402, y, 402, y-20)      # Right column divider
-            
-            # Horizontal line
-            canvas.line(40, y-20, 555, y-20)
-            
-            # Left column
-            canvas.setFont('Helvetica-Bold', 9)
-            canvas.drawString(45, y-15, fields[i][0])
-
-            canvas.setFont('Helvetica', 9)
-            value = str(data.get(fields[i][1], ''))
-            if isinstance(value, str) and fields[i][1].endswith(('_date', 'Date')):
-                try:
-                    value = datetime.strptime(value, '%Y-%m-%d').strftime('%d-%m-%Y')
-                except:
-                    pass
-            if not pd.isna(value) and value.lower() != 'nan':
-                canvas.drawString(150, y-15, value)
-            
-            # Right column
-            if i+1 < len(fields):
-                canvas.setFont('Helvetica-Bold', 9)
-                canvas.drawString(302, y-15, fields[i+1][0])
-
-                canvas.setFont('Helvetica', 9)
-                value = str(data.get(fields[i+1][1], ''))
-                if isinstance(value, str) and fields[i+1][1].endswith(('_date', 'Date')):
-                    try:
-                        value = datetime.strptime(value, '%Y-%m-%d').strftime('%d-%m-%Y')
-                    except:
-                        pass
-                if not pd.isna(value) and value.lower() != 'nan':
-                    canvas.drawString(407, y-15, value)
-            
-            y -= 20
-    
-        return y
-
-
-    def _add_declaration(self, canvas, data: Dict[str, Any], y: int) -> int:
-        """Add declaration section with proper formatting"""
-        # Section header
-        canvas.rect(40, y-20, 515, 20)
-        canvas.setFillColorRGB(0.9, 0.95, 1.0)
-        canvas.rect(40, y-20, 515, 20, fill=1)
-        canvas.setFillColorRGB(1, 0, 0)
-        canvas.setFont('Helvetica-Bold', 11)
-        canvas.drawCentredString(297, y-15, "Declaration")
-        
-        y -= 20
-        canvas.setFillColorRGB(0, 0, 0)
-        canvas.setFont('Helvetica', 9)
-        
-        # Declaration text box with word wrapping
-        declaration_text = self.pdf_config.DECLARATION_TEXT
-        words = declaration_text.split()
-        lines = []
-        current_line = []
-        line_width = 0
-        max_width = 500  # Maximum width for text
-
-        for word in words:
-            word_width = canvas.stringWidth(word + " ", 'Helvetica', 10)
-            if line_width + word_width <= max_width:
-                current_line.append(word)
-                line_width += word_width
-            else:
-                lines.append(' '.join(current_line))
-                current_line = [word]
-                line_width = word_width
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-
-        # Calculate text box height
-        text_height = len(lines) * 15 + 10  # 15 points per line + padding
-        canvas.rect(40, y-text_height, 515, text_height)
-        
-        # Draw text lines
-        text_y = y - 15
-        for line in lines:
-            canvas.drawString(45, text_y, line)
-            text_y -= 15
-        
-        y -= text_height
-        
-        # Signature fields
-        signature_fields = [
-            ("Full Name of the Customer", data.get('full_name', '')),
-            ("Signed as on Date", datetime.now().strftime('%d-%m-%Y')),
-            ("Signature", "_____________________")
-        ]
-        
-        for label, value in signature_fields:
-            canvas.rect(40, y-20, 210, 20)  # Label box
-            canvas.rect(250, y-20, 305, 20)  # Value box
-            canvas.setFont('Helvetica-Bold', 9)
-            canvas.drawString(45, y-15, label)
-            canvas.setFont('Helvetica', 9)
-            canvas.drawString(255, y-15, value)
-            y -= 20
-        
-        return y
\ No newline at end of file
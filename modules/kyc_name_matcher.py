@@ -0,0 +1,173 @@
+# modules/kyc_name_matcher.py
+
+import re
+import copy
+import heapq
+import unicodedata
+import pandas as pd
+from collections import defaultdict, Counter
+from typing import List, Dict, Any, Iterable
+
+class KYCNameMatcher:
+    """
+    Fuzzy and phonetic matching of customer names.
+    Candidates come from a trigram index and a phonetic-key index, so a lookup
+    only scores the rows sharing grams or sound-alike tokens with the query and
+    never computes distances against the whole KYC table. Like KYCSearchIndex,
+    the indexes are updated in place and refreshed() returns a view bounded by
+    the new frame's row count.
+    """
+    NGRAM_SIZE = 3
+    # Trigrams shared by more rows than this are too common to narrow candidates
+    MAX_POSTING_SIZE = 20000
+    # Upper bound of rows scored per query
+    CANDIDATE_LIMIT = 500
+    # A sound-alike token counts as this many shared trigrams when picking candidates
+    PHONETIC_HIT_WEIGHT = 3
+    TRIGRAM_WEIGHT = 0.7
+    PHONETIC_WEIGHT = 0.3
+
+    # Transliteration variants folded before computing phonetic keys
+    TRANSLITERATIONS = [
+        ('aa', 'a'), ('ee', 'i'), ('ii', 'i'), ('oo', 'u'), ('ou', 'u'),
+        ('ph', 'f'), ('kh', 'k'), ('gh', 'g'), ('bh', 'b'), ('dh', 'd'),
+        ('th', 't'), ('sh', 's'), ('ch', 'c'), ('q', 'k'), ('w', 'v'),
+        ('z', 's'), ('y', 'i')
+    ]
+    SOUNDEX_CODES = {
+        **dict.fromkeys('bfpv', '1'),
+        **dict.fromkeys('cgjksx', '2'),
+        **dict.fromkeys('dt', '3'),
+        'l': '4',
+        **dict.fromkeys('mn', '5'),
+        'r': '6'
+    }
+
+    def __init__(self, df: pd.DataFrame, name_field: str = 'full_name'):
+        self.name_field = name_field
+        self.names: List[str] = []
+        self.gram_postings = defaultdict(list)
+        self.key_postings = defaultdict(list)
+        # Rows of the frame this view belongs to
+        self.rows = len(df)
+        self.refresh_rows(df, range(len(df)))
+
+
+    @staticmethod
+    def normalize(name) -> str:
+        """Casefold, strip accents and punctuation, collapse whitespace"""
+        if name is None or (not isinstance(name, str) and pd.isna(name)):
+            return ''
+        text = unicodedata.normalize('NFKD', str(name))
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+        return ' '.join(re.sub(r'[^0-9a-z]+', ' ', text).split())
+
+
+    def trigrams(self, normalized: str) -> frozenset:
+        """Trigrams of the name with word boundaries padded"""
+        n = self.NGRAM_SIZE
+        padded = f"  {normalized} "
+        return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1)) if normalized else frozenset()
+
+
+    @classmethod
+    def phonetic_key(cls, token: str) -> str:
+        """Soundex code of a token after folding common transliteration variants"""
+        for source, target in cls.TRANSLITERATIONS:
+            token = token.replace(source, target)
+        if not token:
+            return ''
+
+        code = token[0]
+        previous = cls.SOUNDEX_CODES.get(token[0], '')
+        for ch in token[1:]:
+            digit = cls.SOUNDEX_CODES.get(ch, '')
+            if digit and digit != previous:
+                code += digit
+            # h separates nothing in Soundex, vowels reset the previous code
+            if ch != 'h':
+                previous = digit
+        return (code + '000')[:4]
+
+
+    def phonetic_keys(self, normalized: str) -> frozenset:
+        return frozenset(self.phonetic_key(token) for token in normalized.split() if token)
+
+
+    def refresh_rows(self, df: pd.DataFrame, positions: Iterable[int]):
+        """Index inserted rows and re-index updated ones"""
+        positions = list(positions)
+        if not positions:
+            return
+
+        last = max(positions)
+        if last >= len(self.names):
+            self.names.extend([''] * (last + 1 - len(self.names)))
+
+        values = df[self.name_field].iloc[positions] if self.name_field in df.columns else [None] * len(positions)
+        for position, name in zip(positions, values):
+            normalized = self.normalize(name)
+            previous = self.names[position]
+            # Postings are append-only; stale entries only cost a low score
+            for gram in self.trigrams(normalized) - self.trigrams(previous):
+                self.gram_postings[gram].append(position)
+            for key in self.phonetic_keys(normalized) - self.phonetic_keys(previous):
+                self.key_postings[key].append(position)
+            self.names[position] = normalized
+
+
+    def refreshed(self, df: pd.DataFrame, positions: Iterable[int]) -> 'KYCNameMatcher':
+        """Refresh the rows in place, returns the view of df; this view stays bounded to the previous frame"""
+        matcher = copy.copy(self)
+        matcher.rows = len(df)
+        matcher.refresh_rows(df, positions)
+        return matcher
+
+
+    def score(self, query_grams: frozenset, query_keys: frozenset, position: int) -> float:
+        """Weighted trigram Dice coefficient and phonetic token overlap"""
+        normalized = self.names[position]
+        grams = self.trigrams(normalized)
+        total = len(query_grams) + len(grams)
+        dice = 2 * len(query_grams & grams) / total if total else 0.0
+        keys = self.phonetic_keys(normalized)
+        phonetic = len(query_keys & keys) / max(len(query_keys), len(keys)) if keys and query_keys else 0.0
+        return self.TRIGRAM_WEIGHT * dice + self.PHONETIC_WEIGHT * phonetic
+
+
+    def match(self, name: str, limit: int = 10, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Return up to limit ranked candidates as dicts with position, name and score"""
+        normalized = self.normalize(name)
+        if not normalized:
+            return []
+        query_grams = self.trigrams(normalized)
+        query_keys = self.phonetic_keys(normalized)
+
+        # Candidate generation: count shared trigrams and sound-alike tokens
+        # from the indexes, then keep only the best CANDIDATE_LIMIT rows
+        shared = Counter()
+        postings = [self.gram_postings.get(gram, []) for gram in query_grams]
+        selective = [p for p in postings if len(p) <= self.MAX_POSTING_SIZE] or postings
+        for posting in selective:
+            shared.update(set(posting))
+        for key in query_keys:
+            posting = self.key_postings.get(key, [])
+            if len(posting) <= self.MAX_POSTING_SIZE:
+                for position in set(posting):
+                    shared[position] += self.PHONETIC_HIT_WEIGHT
+        # Rows appended after this view's frame are not part of it
+        rows = self.rows
+        candidates = [pos for pos, _ in heapq.nlargest(self.CANDIDATE_LIMIT,
+                                                       ((pos, count) for pos, count in shared.items() if pos < rows),
+                                                       key=lambda item: item[1])]
+
+        scored = []
+        for position in candidates:
+            score = self.score(query_grams, query_keys, position)
+            if score >= min_score and score > 0:
+                scored.append((score, position))
+
+        return [
+            {'position': position, 'name': self.names[position], 'score': round(score, 4)}
+            for score, position in heapq.nlargest(limit, scored)
+        ]
@@ -0,0 +1,133 @@
+# modules/kyc_pdf_batch.py
+
+import os
+import json
+import time
+import multiprocessing
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+from config.kyc_application_pdf_config import KYCApplicationPDFConfig
+from modules.kyc_application_pdf import KYCApplicationPDFGenerator
+from modules.event_log import log_event
+
+# One generator per worker process, created on first use
+_worker_generator = None
+
+
+def render_application(customer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one KYC application PDF (runs inside a worker process)"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = KYCApplicationPDFGenerator(KYCApplicationPDFConfig())
+
+    started = time.perf_counter()
+    try:
+        filepath = _worker_generator.generate(customer_data)
+        return {
+            'customer_id': customer_data['customer_id'],
+            'status': 'generated',
+            'file_path': filepath,
+            'seconds': round(time.perf_counter() - started, 4)
+        }
+    except Exception as e:
+        return {
+            'customer_id': customer_data['customer_id'],
+            'status': 'failed',
+            'error': str(e),
+            'seconds': round(time.perf_counter() - started, 4)
+        }
+
+
+class KYCPDFBatchGenerator:
+    """
+    Regenerates KYC application PDFs for many customers across a process pool.
+    Records are selected by kyc_status or an explicit ID list; a record is
+    skipped when its PDF is already newer than the record's last_updated time.
+    Every run writes a JSON manifest with per-record status and timings next
+    to the PDFs.
+    """
+    def __init__(self, kyc_manager, max_workers: Optional[int] = None):
+        self.kyc_manager = kyc_manager
+        self.pdf_generator = kyc_manager.pdf_generator
+        self.max_workers = max_workers
+
+
+    def select_records(self, kyc_status: Optional[str] = None, customer_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """Select records by KYC status (case-insensitive) and/or customer IDs"""
+        df = self.kyc_manager.read_kyc_data()
+        mask = pd.Series(True, index=df.index)
+        if kyc_status:
+            mask &= df['kyc_status'].str.lower() == kyc_status.lower()
+        if customer_ids:
+            mask &= df['customer_id'].isin(customer_ids)
+        return df[mask]
+
+
+    def is_up_to_date(self, record: Dict[str, Any]) -> bool:
+        """True if the record's PDF exists and is newer than the record"""
+        filepath = self.pdf_generator.application_path(record['customer_id'])
+        if not os.path.exists(filepath):
+            return False
+
+        pdf_modified = os.path.getmtime(filepath)
+        last_updated = pd.to_datetime(record.get('last_updated'), errors='coerce')
+        if pd.isna(last_updated):
+            # Records saved before last_updated was tracked: fall back to the data store's modification time
+            return pdf_modified >= os.path.getmtime(self.kyc_manager.store.data_file)
+        return datetime.fromtimestamp(pdf_modified) >= last_updated.to_pydatetime()
+
+
+    def run(self, kyc_status: Optional[str] = 'Completed', customer_ids: Optional[List[str]] = None,
+            force: bool = False) -> Dict[str, Any]:
+        """Render the selected PDFs in parallel, returns the manifest"""
+        started_at = datetime.now()
+        started = time.perf_counter()
+        records = self.select_records(kyc_status, customer_ids).to_dict('records')
+
+        results = []
+        pending = []
+        for record in records:
+            if not force and self.is_up_to_date(record):
+                results.append({
+                    'customer_id': record['customer_id'],
+                    'status': 'skipped',
+                    'file_path': self.pdf_generator.application_path(record['customer_id']),
+                    'seconds': 0.0
+                })
+            else:
+                pending.append(record)
+
+        if pending:
+            # Spawned, not forked: the app process runs threads (sessions, jobs, the expiry
+            # scanner) whose held locks a forked child would inherit in the locked state
+            with ProcessPoolExecutor(max_workers=self.max_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(render_application, record) for record in pending]
+                for future in as_completed(futures):
+                    results.append(future.result())
+
+        manifest = {
+            'started_at': started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'kyc_status': kyc_status,
+            'customer_ids': customer_ids,
+            'selected': len(records),
+            'generated': sum(1 for r in results if r['status'] == 'generated'),
+            'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+            'failed': sum(1 for r in results if r['status'] == 'failed'),
+            'total_seconds': round(time.perf_counter() - started, 4),
+            'results': sorted(results, key=lambda r: r['customer_id'])
+        }
+
+        manifest_path = os.path.join(
+            self.kyc_manager.pdf_config.KYC_APPLICATION_PDF_DIR,
+            f"manifest_{started_at.strftime('%Y%m%d_%H%M%S_%f')}.json"
+        )
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        manifest['manifest_path'] = manifest_path
+
+        log_event('kyc_pdf_batch_finished', level='info', sample_rate=1, generated=manifest['generated'],
+                  skipped=manifest['skipped'], failed=manifest['failed'], total_seconds=manifest['total_seconds'])
+        return manifest
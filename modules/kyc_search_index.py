@@ -0,0 +1,126 @@
+# modules/kyc_search_index.py
+
+import copy
+import heapq
+import pandas as pd
+from collections import defaultdict
+from typing import List, Iterable, Optional, Tuple
+
+class KYCSearchIndex:
+    """
+    Inverted trigram index for case-insensitive substring search over the
+    identity fields of the KYC dataset.
+    Postings hold row positions of the cached frame. Every candidate is verified
+    against the row's indexed text, so postings left behind by an update are
+    harmless and rows are refreshed by simply indexing their new text.
+    Postings and texts are updated in place, so a save costs only the grams of
+    the rows it touched. refreshed() returns a view bounded by the new frame's
+    row count; views of older frames keep their own bound and never return the
+    rows appended since (an updated row is matched on its latest text).
+    """
+    NGRAM_SIZE = 3
+    # Separates fields so that a match never spans two of them
+    FIELD_SEPARATOR = '\x1f'
+
+    def __init__(self, df: pd.DataFrame, fields: List[str]):
+        self.fields = [f for f in fields if f in df.columns]
+        self.documents: List[str] = []
+        self.postings = defaultdict(list)
+        # Rows of the frame this view belongs to
+        self.rows = len(df)
+        self.refresh_rows(df, range(len(df)))
+
+
+    def _row_texts(self, df: pd.DataFrame, positions: List[int]) -> List[str]:
+        """Build the lowercase searchable text of the given rows"""
+        columns = [
+            df[field].iloc[positions].astype(object).where(df[field].iloc[positions].notna(), '')
+            for field in self.fields
+        ]
+        return [
+            self.FIELD_SEPARATOR.join(str(value) for value in values).lower()
+            for values in zip(*columns)
+        ]
+
+
+    def _ngrams(self, text: str) -> set:
+        n = self.NGRAM_SIZE
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+    def refresh_rows(self, df: pd.DataFrame, positions: Iterable[int]):
+        """Index inserted rows and re-index updated ones"""
+        positions = list(positions)
+        if not positions:
+            return
+
+        last = max(positions)
+        if last >= len(self.documents):
+            self.documents.extend([''] * (last + 1 - len(self.documents)))
+
+        for position, text in zip(positions, self._row_texts(df, positions)):
+            known = self._ngrams(self.documents[position])
+            self.documents[position] = text
+            for gram in self._ngrams(text) - known:
+                self.postings[gram].append(position)
+
+
+    def refreshed(self, df: pd.DataFrame, positions: Iterable[int]) -> 'KYCSearchIndex':
+        """Refresh the rows in place, returns the view of df; this view stays bounded to the previous frame"""
+        index = copy.copy(self)
+        index.rows = len(df)
+        index.refresh_rows(df, positions)
+        return index
+
+
+    def search(self, term: str) -> List[int]:
+        """Return the sorted row positions whose indexed fields contain term"""
+        term = term.strip().lower()
+        rows = self.rows
+        if not term:
+            return list(range(rows))
+
+        documents = self.documents
+        if len(term) < self.NGRAM_SIZE:
+            # Too short for the index, fall back to scanning the prebuilt texts
+            return [pos for pos, text in enumerate(documents[:rows]) if term in text]
+
+        # The rarest trigram yields the smallest candidate set
+        smallest = None
+        for gram in self._ngrams(term):
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            if smallest is None or len(posting) < len(smallest):
+                smallest = posting
+
+        return sorted({pos for pos in smallest if pos < rows and term in documents[pos]})
+
+
+    def _rank(self, term: str, position: int) -> int:
+        """Relevance tier of a match: whole field, field prefix, word start, anywhere"""
+        sep = self.FIELD_SEPARATOR
+        text = sep + self.documents[position] + sep
+        if sep + term + sep in text:
+            return 0
+        if sep + term in text:
+            return 1
+        if ' ' + term in text:
+            return 2
+        return 3
+
+
+    def search_ranked(self, term: str, limit: Optional[int] = None) -> Tuple[List[int], int]:
+        """
+        Return the row positions of the best matches (at most limit), ordered by
+        relevance tier and then row order, together with the total match count
+        """
+        positions = self.search(term)
+        term = term.strip().lower()
+        if not term:
+            return positions[:limit], len(positions)
+
+        key = lambda position: (self._rank(term, position), position)
+        if limit is not None and len(positions) > limit:
+            return heapq.nsmallest(limit, positions, key=key), len(positions)
+        return sorted(positions, key=key), len(positions)
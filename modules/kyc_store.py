@@ -0,0 +1,366 @@
+# modules/kyc_store.py
+
+import os
+import sqlite3
+import pandas as pd
+from datetime import date, datetime
+from typing import Dict, Any, List, Iterable, Optional
+from config.customer_config import CustomerConfig
+from modules.kyc_dates import KYCDateColumns
+from modules.metrics import csv_io
+from modules.file_commit import GroupCommit, CommitResult, atomic_write_csv, append_csv
+from modules.event_log import log_event
+
+
+def _write_journal(journal, changes: List[tuple], results: List[Any]):
+    """Journal the events of the changes of a batch that succeeded, with the store still locked"""
+    events = [event for change, result in zip(changes, results) if result is None for event in change[-1]]
+    if journal is not None and events:
+        journal.write_events(events)
+
+
+class CSVKYCStore:
+    """
+    KYC records kept in a single CSV file.
+    Writes of all sessions and processes go through a group committer: inserts
+    append rows to the file, updates are re-applied to the file as it is on disk
+    and rewrite it atomically, concurrent writes share one append or rewrite.
+    The journal events of a write are appended in the same commit.
+    """
+    def __init__(self, config: CustomerConfig):
+        self.config = config
+        self.data_file = config.KYC_DATA_FILE
+        self.dates = KYCDateColumns(config)
+        self.committer = GroupCommit(self.data_file, self._apply_batch, config.FILE_COMMIT_WINDOW_MS / 1000)
+        # Change journal written under the store's lock, set by KYCManager
+        self.journal = None
+
+
+    def setup(self):
+        """Create the CSV with headers if it doesn't exist, add columns missing from an older file"""
+        directory = os.path.dirname(self.data_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.committer.lock.exclusive():
+            if not os.path.exists(self.data_file):
+                df = pd.DataFrame(columns=self.config.KYC_CSV_HEADERS).astype(self.config.KYC_FIELD_TYPES)
+                atomic_write_csv(df, self.data_file)
+                log_event('kyc_store_created', level='info', sample_rate=1, path=self.data_file)
+                return
+
+            existing = pd.read_csv(self.data_file, nrows=0).columns
+            missing = [column for column in self.config.KYC_CSV_HEADERS if column not in existing]
+            if missing:
+                df = self._load_unlocked()
+                for column in missing:
+                    df[column] = pd.Series(dtype=self.config.KYC_FIELD_TYPES.get(column, 'str'), index=df.index)
+                atomic_write_csv(df, self.data_file)
+                log_event('kyc_store_columns_added', level='info', sample_rate=1, path=self.data_file, columns=missing)
+
+
+    def _load_unlocked(self) -> pd.DataFrame:
+        with csv_io(self.data_file, 'read'):
+            return pd.read_csv(
+                self.data_file,
+                dtype=self.config.KYC_FIELD_TYPES,
+                na_values=['nan', 'None', ''],
+                keep_default_na=True
+            )
+
+
+    def load(self) -> pd.DataFrame:
+        """Parse the CSV with correct types"""
+        with self.committer.lock.shared():
+            return self._load_unlocked()
+
+
+    def _storage_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored columns of an edit, dates as ISO strings"""
+        return {
+            column: self.dates.to_storage_value(self.dates.to_timestamp(value)) if column in self.dates.fields else value
+            for column, value in fields.items()
+            if column in self.config.KYC_CSV_HEADERS and column != 'customer_id'
+        }
+
+
+    def _apply_batch(self, changes: List[tuple]) -> List[None]:
+        """
+        Commit ('insert', records, journal_events) and ('update', customer_id,
+        fields, journal_events) changes, called by the group committer with the
+        file locked. Inserts alone are one append; with updates the file is
+        reloaded, edited and rewritten once. The journal is appended after the file.
+        """
+        headers = self.config.KYC_CSV_HEADERS
+        results = [None] * len(changes)
+        if all(change[0] == 'insert' for change in changes):
+            records = [record for change in changes for record in change[1]]
+            append_csv(self.dates.to_storage_frame(pd.DataFrame(records), headers), self.data_file)
+            _write_journal(self.journal, changes, results)
+            return results
+
+        df = self._load_unlocked()
+        for change in changes:
+            if change[0] == 'insert':
+                new_rows = self.dates.to_storage_frame(pd.DataFrame(change[1]), headers)
+                df = pd.concat([df, new_rows.reindex(columns=df.columns)], ignore_index=True)
+                continue
+            _, customer_id, fields, _ = change
+            mask = df['customer_id'] == customer_id
+            for column, value in self._storage_fields(fields).items():
+                df.loc[mask, column] = value
+        atomic_write_csv(self.dates.to_storage_frame(df, headers), self.data_file)
+        _write_journal(self.journal, changes, results)
+        return results
+
+
+    def insert_records(self, df: pd.DataFrame, records: List[Dict[str, Any]],
+                       journal_events: Iterable[Dict[str, Any]] = ()) -> CommitResult:
+        """Persist new records; df is the full frame already including them"""
+        return self.committer.submit(('insert', records, list(journal_events)))
+
+
+    def update_record(self, df: pd.DataFrame, customer_id: str, fields: Dict[str, Any],
+                      journal_events: Iterable[Dict[str, Any]] = ()) -> CommitResult:
+        """
+        Persist an edited record. df is the caller's frame with the edit applied;
+        the edit itself is applied to the file as it is on disk, so concurrent
+        writes of other sessions are kept.
+        """
+        return self.committer.submit(('update', customer_id, fields, list(journal_events)))
+
+
+    def export_csv(self, path: str):
+        """Write all records to a CSV file for interchange"""
+        self.load().to_csv(path, index=False)
+
+
+class SQLiteKYCStore:
+    """
+    KYC records kept in SQLite with indexes on customer_id, passport_number
+    and kyc_status. Inserts and edits are row-level statements, so saving one
+    customer no longer rewrites the whole table. They go through a group
+    committer like the CSV store's writes, so every write knows the database's
+    signature before and after it and concurrent writes share one transaction,
+    which also appends their journal events before it commits.
+    The CSV file remains the interchange format: it seeds an empty database and
+    can be exported at any time.
+    """
+    TABLE = 'kyc_records'
+
+    def __init__(self, config: CustomerConfig):
+        self.config = config
+        self.data_file = config.KYC_DB_FILE
+        self.columns = list(config.KYC_CSV_HEADERS)
+        self.committer = GroupCommit(self.data_file, self._apply_batch, config.FILE_COMMIT_WINDOW_MS / 1000)
+        # Change journal written under the store's lock, set by KYCManager
+        self.journal = None
+
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.data_file, timeout=30)
+
+
+    def _sql_type(self, column: str) -> str:
+        return 'INTEGER' if self.config.KYC_FIELD_TYPES.get(column) == 'int' else 'TEXT'
+
+
+    @staticmethod
+    def _to_sql_value(value):
+        if value is None:
+            return None
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        if isinstance(value, (datetime, date)):
+            return KYCDateColumns.to_storage_value(value)
+        # numpy scalars are not understood by sqlite3
+        return value.item() if hasattr(value, 'item') else value
+
+
+    def setup(self):
+        """Create table and indexes, add new columns and migrate from CSV if the table is empty"""
+        directory = os.path.dirname(self.data_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            with conn:
+                # One write transaction: a concurrent setup in another process waits here,
+                # so only one of them finds the table empty and migrates
+                conn.execute('BEGIN IMMEDIATE')
+                column_defs = ', '.join(
+                    f'"{column}" {self._sql_type(column)}' + (' PRIMARY KEY' if column == 'customer_id' else '')
+                    for column in self.columns
+                )
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {self.TABLE} ({column_defs})')
+
+                # Columns added to KYC_CSV_HEADERS after the table was created
+                existing = {row[1] for row in conn.execute(f'PRAGMA table_info({self.TABLE})')}
+                for column in self.columns:
+                    if column not in existing:
+                        conn.execute(f'ALTER TABLE {self.TABLE} ADD COLUMN "{column}" {self._sql_type(column)}')
+
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_kyc_passport_number ON {self.TABLE} (passport_number)')
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_kyc_status ON {self.TABLE} (kyc_status)')
+
+                is_empty = conn.execute(f'SELECT 1 FROM {self.TABLE} LIMIT 1').fetchone() is None
+                if is_empty and os.path.exists(self.config.KYC_DATA_FILE):
+                    self.migrate_from_csv(self.config.KYC_DATA_FILE, conn)
+        finally:
+            conn.close()
+
+
+    def migrate_from_csv(self, csv_file: str, conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Load all records of a KYC CSV into the database, returns number of rows.
+        With conn the rows are inserted in the caller's transaction.
+        """
+        csv_store = CSVKYCStore(self.config)
+        csv_store.data_file = csv_file
+        df = csv_store.load()
+        if conn is not None:
+            self._execute_insert(conn, df.to_dict('records'))
+        else:
+            self._insert_rows(df.to_dict('records'))
+        log_event('kyc_store_migrated', level='info', sample_rate=1, records=len(df), source=csv_file,
+                  path=self.data_file)
+        return len(df)
+
+
+    def load(self) -> pd.DataFrame:
+        """Read all records in insertion order with correct types"""
+        column_list = ', '.join(f'"{column}"' for column in self.columns)
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(f'SELECT {column_list} FROM {self.TABLE} ORDER BY rowid', conn)
+        finally:
+            conn.close()
+
+        for column, dtype in self.config.KYC_FIELD_TYPES.items():
+            if column not in df.columns:
+                continue
+            if dtype == 'str':
+                # Series(dtype=str) keeps missing values as NaN, astype(str) would not
+                df[column] = pd.Series(df[column].to_numpy(dtype=object), index=df.index, dtype=str)
+            else:
+                df[column] = df[column].astype(dtype)
+        return df
+
+
+    def _execute_insert(self, conn: sqlite3.Connection, records: Iterable[Dict[str, Any]]):
+        placeholders = ', '.join('?' for _ in self.columns)
+        column_list = ', '.join(f'"{column}"' for column in self.columns)
+        rows = [
+            tuple(self._to_sql_value(record.get(column)) for column in self.columns)
+            for record in records
+        ]
+        conn.executemany(f'INSERT INTO {self.TABLE} ({column_list}) VALUES ({placeholders})', rows)
+
+
+    def _execute_update(self, conn: sqlite3.Connection, customer_id: str, fields: Dict[str, Any]):
+        columns = [column for column in fields if column in self.columns and column != 'customer_id']
+        if not columns:
+            return
+        assignments = ', '.join(f'"{column}" = ?' for column in columns)
+        values = [self._to_sql_value(fields[column]) for column in columns] + [customer_id]
+        conn.execute(f'UPDATE {self.TABLE} SET {assignments} WHERE customer_id = ?', values)
+
+
+    def _insert_rows(self, records: Iterable[Dict[str, Any]]):
+        conn = self._connect()
+        try:
+            with conn:
+                self._execute_insert(conn, records)
+        finally:
+            conn.close()
+
+
+    def _apply_batch(self, changes: List[tuple]) -> List[Optional[sqlite3.Error]]:
+        """
+        Commit ('insert', records, journal_events) and ('update', customer_id,
+        fields, journal_events) changes in one transaction, called by the group
+        committer with the database locked. Each change runs in its own savepoint:
+        a change that fails is rolled back alone and its error returned as its
+        result, the others are committed. The journal events of the committed
+        changes are appended before the commit, so a failed journal write rolls
+        the batch back.
+        """
+        results: List[Optional[sqlite3.Error]] = []
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                for change in changes:
+                    conn.execute('SAVEPOINT kyc_change')
+                    try:
+                        if change[0] == 'insert':
+                            self._execute_insert(conn, change[1])
+                        else:
+                            self._execute_update(conn, change[1], change[2])
+                        results.append(None)
+                    except sqlite3.Error as e:
+                        conn.execute('ROLLBACK TO kyc_change')
+                        results.append(e)
+                    conn.execute('RELEASE kyc_change')
+                _write_journal(self.journal, changes, results)
+        finally:
+            conn.close()
+
+        failed = [result for result in results if result is not None]
+        if failed:
+            log_event('kyc_store_changes_failed', level='warning', path=self.data_file, failed=len(failed),
+                      batch_size=len(changes), error=str(failed[0]))
+        return results
+
+
+    def insert_records(self, df: pd.DataFrame, records: List[Dict[str, Any]],
+                       journal_events: Iterable[Dict[str, Any]] = ()) -> CommitResult:
+        """Persist new records with row-level INSERTs"""
+        return self.committer.submit(('insert', records, list(journal_events)))
+
+
+    def update_record(self, df: pd.DataFrame, customer_id: str, fields: Dict[str, Any],
+                      journal_events: Iterable[Dict[str, Any]] = ()) -> CommitResult:
+        """Persist an edited record with a single row-level UPDATE"""
+        return self.committer.submit(('update', customer_id, fields, list(journal_events)))
+
+
+    def export_csv(self, path: str):
+        """Write all records to a CSV file for interchange"""
+        self.load().to_csv(path, index=False)
+
+
+def create_kyc_store(config: CustomerConfig):
+    """Return the KYC store selected by CustomerConfig.KYC_STORAGE_BACKEND"""
+    backends = {
+        'csv': CSVKYCStore,
+        'sqlite': SQLiteKYCStore
+    }
+    if config.KYC_STORAGE_BACKEND not in backends:
+        raise ValueError(f"Unknown KYC storage backend: {config.KYC_STORAGE_BACKEND}")
+    return backends[config.KYC_STORAGE_BACKEND](config)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m modules.kyc_store migrate | export <csv_path>
+    action = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    config = CustomerConfig()
+    store = SQLiteKYCStore(config)
+
+    if action == 'migrate':
+        store.setup()
+    elif action == 'export' and len(sys.argv) > 2:
+        # No default path: exporting over KYC_DATA_FILE would replace the CSV the database was seeded from
+        csv_path = sys.argv[2]
+        store.setup()
+        store.export_csv(csv_path)
+        print(f"Exported KYC records to {csv_path}")
+    else:
+        print("Usage: python -m modules.kyc_store migrate | export <csv_path>")
+        sys.exit(1)
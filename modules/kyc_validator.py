@@ -0,0 +1,192 @@
+# modules/kyc_validator.py
+
+import math
+import numpy as np
+import pandas as pd
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional, Callable
+from config.customer_config import CustomerConfig
+from modules.validator import error_lists, parse_number, parse_numbers
+
+class KYCValidator:
+    """
+    Validation engine compiled from CustomerConfig.KYC_FIELDS.
+    The schema is compiled once into per-field checkers that are shared by
+    single-record validation (form, API) and DataFrame validation (bulk import).
+    """
+    DATE_FORMAT = '%Y-%m-%d'
+    # Whole numbers above this are not exact as floats and would be silently altered
+    MAX_WHOLE_NUMBER = 2 ** 53
+
+    def __init__(self, config: Optional[CustomerConfig] = None):
+        self.config = config or CustomerConfig()
+        self.checks = self.compile_schema()
+        self.date_pairs = [
+            (issue, expiry, self.labels[issue], self.labels[expiry])
+            for issue, expiry in self.config.KYC_DATE_PAIRS
+        ]
+        self.error_messages = [message for check in self.checks for message in check['messages']]
+        self.error_messages += [
+            f"{expiry_label} must be after {issue_label}"
+            for _, _, issue_label, expiry_label in self.date_pairs
+        ]
+
+
+    def compile_schema(self) -> List[Dict[str, Any]]:
+        """Flatten KYC_FIELDS into one checker per field"""
+        self.labels = {}
+        checks = []
+        for section in self.config.KYC_FIELDS.values():
+            for name, spec in section['fields'].items():
+                label = spec['label']
+                self.labels[name] = label
+                check = {
+                    'field': name,
+                    'label': label,
+                    'type': spec['type'],
+                    'required': spec['required'],
+                    'required_message': f"{label} is required",
+                    'messages': [f"{label} is required"] if spec['required'] else []
+                }
+
+                if spec['type'] == 'date':
+                    check['invalid_message'] = f"{label} is not a valid date"
+                    check['is_valid'] = self._is_valid_date
+                elif spec['type'] == 'number':
+                    # Numbers stored as integers must be whole, they are never truncated
+                    check['whole'] = self.config.KYC_FIELD_TYPES.get(name) == 'int'
+                    if check['whole']:
+                        check['invalid_message'] = f"{label} must be a non-negative whole number"
+                        check['is_valid'] = self._is_valid_whole_number
+                    else:
+                        check['invalid_message'] = f"{label} must be a non-negative number"
+                        check['is_valid'] = self._is_valid_number
+                elif spec['type'] == 'select':
+                    options = getattr(self.config, self.config.KYC_SELECT_OPTIONS[name])
+                    check['options'] = frozenset(options)
+                    check['invalid_message'] = f"{label} must be one of: {', '.join(options)}"
+                    check['is_valid'] = check['options'].__contains__
+
+                if 'invalid_message' in check:
+                    check['messages'].append(check['invalid_message'])
+                checks.append(check)
+
+        return checks
+
+
+    @staticmethod
+    def _is_missing(value) -> bool:
+        if value is None:
+            return True
+        if isinstance(value, str):
+            return value.strip() == ''
+        try:
+            return bool(pd.isna(value))
+        except (TypeError, ValueError):
+            return False
+
+
+    @staticmethod
+    def _to_date(value) -> Optional[date]:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.strptime(str(value), KYCValidator.DATE_FORMAT).date()
+        except ValueError:
+            return None
+
+
+    @staticmethod
+    def _is_valid_date(value) -> bool:
+        return KYCValidator._to_date(value) is not None
+
+
+    @staticmethod
+    def _is_valid_number(value) -> bool:
+        # Same parser as validate_dataframe
+        number = parse_number(value)
+        # Rejects inf and overflowing values such as 1e400
+        return number is not None and math.isfinite(number) and number >= 0
+
+
+    @classmethod
+    def _is_valid_whole_number(cls, value) -> bool:
+        return cls._is_valid_number(value) and parse_number(value).is_integer() and \
+            parse_number(value) <= cls.MAX_WHOLE_NUMBER
+
+
+    def validate_record(self, kyc_data: Dict[str, Any]) -> Optional[List[str]]:
+        """Validate a single KYC record, returns list of errors or None"""
+        errors = []
+        for check in self.checks:
+            value = kyc_data.get(check['field'])
+            if self._is_missing(value):
+                if check['required']:
+                    errors.append(check['required_message'])
+            elif 'is_valid' in check and not check['is_valid'](value):
+                errors.append(check['invalid_message'])
+
+        for issue, expiry, issue_label, expiry_label in self.date_pairs:
+            issue_date = self._to_date(kyc_data.get(issue))
+            expiry_date = self._to_date(kyc_data.get(expiry))
+            if issue_date and expiry_date and expiry_date <= issue_date:
+                errors.append(f"{expiry_label} must be after {issue_label}")
+
+        return errors if errors else None
+
+
+    @staticmethod
+    def _missing_mask(column: pd.Series) -> pd.Series:
+        return column.isna() | (column.astype(str).str.strip() == '')
+
+
+    def validate_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Validate KYC rows in bulk.
+        Returns a boolean error matrix with one column per error message,
+        using the same rules as validate_record.
+        """
+        errors = pd.DataFrame(False, index=df.index, columns=self.error_messages)
+        empty = pd.Series(None, index=df.index, dtype=object)
+        parsed_dates = {}
+
+        for check in self.checks:
+            column = df[check['field']] if check['field'] in df.columns else empty
+            missing = self._missing_mask(column)
+            if check['required']:
+                errors[check['required_message']] = missing
+
+            if check['type'] == 'date':
+                parsed = self._parse_date_column(column)
+                parsed_dates[check['field']] = parsed
+                errors[check['invalid_message']] = ~missing & parsed.isna()
+            elif check['type'] == 'number':
+                numeric, _ = parse_numbers(column)
+                valid = np.isfinite(numeric) & (numeric >= 0)
+                if check['whole']:
+                    valid &= (numeric % 1 == 0) & (numeric <= self.MAX_WHOLE_NUMBER)
+                errors[check['invalid_message']] = ~missing & ~valid
+            elif check['type'] == 'select':
+                errors[check['invalid_message']] = ~missing & ~column.isin(check['options'])
+
+        for issue, expiry, issue_label, expiry_label in self.date_pairs:
+            issue_dates = parsed_dates.get(issue, pd.Series(pd.NaT, index=df.index))
+            expiry_dates = parsed_dates.get(expiry, pd.Series(pd.NaT, index=df.index))
+            errors[f"{expiry_label} must be after {issue_label}"] = (
+                issue_dates.notna() & expiry_dates.notna() & (expiry_dates <= issue_dates)
+            )
+
+        return errors
+
+
+    def _parse_date_column(self, column: pd.Series) -> pd.Series:
+        """Parse a date column, accepting ISO strings and date/datetime values"""
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return column
+        as_text = column.map(lambda v: v.strftime(self.DATE_FORMAT) if isinstance(v, date) else v)
+        return pd.to_datetime(as_text, format=self.DATE_FORMAT, errors='coerce')
+
+
+    error_lists = staticmethod(error_lists)
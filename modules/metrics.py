@@ -0,0 +1,265 @@
+# modules/metrics.py
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple, Iterable, Optional, List
+from modules.event_log import log_event
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    TYPE = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or bytes written"""
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. jobs in progress"""
+    TYPE = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations (durations, sizes) in cumulative buckets, with sum and count"""
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block (or decorated call) in seconds, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+    def snapshot(self, **labels) -> Optional[Dict[str, object]]:
+        """Per-bucket counts (not cumulative), sum and count of one label set"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return None if state is None else {'counts': list(state['counts']), 'sum': state['sum'], 'count': state['count']}
+
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state['counts']))) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound == float("inf") else repr(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {repr(float(state['sum']))}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Dependency-free process-wide metrics: counters, gauges and histograms
+    with labels, exported in the Prometheus text format. Metrics are
+    declared once by name; declaring an existing name returns the same
+    metric, so modules can declare what they use at import time.
+    Observations are in-memory and per process (batch PDF worker processes
+    are not included).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._exporter: Optional[threading.Thread] = None
+
+
+    def _register(self, cls, name: str, help_text: str, labelnames: Iterable[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.TYPE}")
+            return metric
+
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+    def write_textfile(self, path: str):
+        """Write the metrics for a node-exporter style textfile collector, atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_file, path)
+
+
+    def start_textfile_export(self, path: str, interval_seconds: float):
+        """Rewrite the textfile every interval in a daemon thread, no-op if already running"""
+        with self._lock:
+            if self._exporter is not None and self._exporter.is_alive():
+                return
+            self._exporter = threading.Thread(
+                target=self._export_loop, args=(path, interval_seconds), name='metrics-textfile', daemon=True
+            )
+            self._exporter.start()
+
+
+    def _export_loop(self, path: str, interval_seconds: float):
+        while True:
+            try:
+                self.write_textfile(path)
+            except Exception as e:
+                log_event('metrics_export_failed', level='warning', error=str(e))
+            time.sleep(interval_seconds)
+
+
+# Shared by every module in the process
+metrics = MetricsRegistry()
+
+# Hot-path metrics, declared here so the export lists them before their first observation
+CSV_IO_SECONDS = metrics.histogram('invoice_app_csv_io_seconds', "CSV read/write duration", ['file', 'op'])
+CSV_IO_BYTES = metrics.counter('invoice_app_csv_io_bytes_total', "Bytes read from or written to CSV files", ['file', 'op'])
+PDF_RENDER_SECONDS = metrics.histogram('invoice_app_pdf_render_seconds', "PDF render duration", ['kind'])
+PDF_RENDER_FAILURES = metrics.counter('invoice_app_pdf_render_failures_total', "PDF renders that raised", ['kind'])
+SMTP_SEND_SECONDS = metrics.histogram('invoice_app_smtp_send_seconds', "SMTP send duration", ['outcome'])
+SEARCH_SECONDS = metrics.histogram('invoice_app_search_seconds', "Search query duration", ['kind'])
+SEARCH_RESULTS = metrics.histogram('invoice_app_search_results', "Hits per search query", ['kind'],
+                                   buckets=(0, 1, 5, 10, 25, 100, 500, 1000, 10000))
+ID_ALLOCATION_SECONDS = metrics.histogram('invoice_app_customer_id_allocation_seconds', "Customer ID block allocation duration")
+IDS_ALLOCATED = metrics.counter('invoice_app_customer_ids_allocated_total', "Customer IDs handed out")
+JOBS_ACTIVE = metrics.gauge('invoice_app_jobs_active', "Background jobs queued or running", ['type'])
+JOBS_FINISHED = metrics.counter('invoice_app_jobs_finished_total', "Background jobs finished", ['type', 'status'])
+JOB_SECONDS = metrics.histogram('invoice_app_job_seconds', "Background job run time", ['type'])
+
+
+@contextmanager
+def pdf_render(kind: str):
+    """Time a PDF render and count the ones that raise; also usable as a decorator"""
+    try:
+        with PDF_RENDER_SECONDS.time(kind=kind):
+            yield
+    except Exception:
+        PDF_RENDER_FAILURES.inc(kind=kind)
+        raise
+
+
+@contextmanager
+def csv_io(path: str, op: str):
+    """Time a CSV read or write and count the bytes of the file it read or produced"""
+    name = os.path.basename(path)
+    size_before = os.path.getsize(path) if op == 'append' and os.path.exists(path) else 0
+    with CSV_IO_SECONDS.time(file=name, op=op):
+        yield
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    CSV_IO_BYTES.inc(size - size_before, file=name, op=op)
@@ -0,0 +1,363 @@
+# modules/receivables_summary.py
+
+import os
+import json
+import heapq
+import tempfile
+import threading
+import pandas as pd
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional, Iterable, Callable
+from modules.file_commit import file_signature
+from modules.event_log import log_event
+
+class ReceivablesSummary:
+    """
+    Materialized receivables aggregates of the invoice ledger, kept in a small
+    JSON file next to it: count and amount per currency and payment status,
+    outstanding (pending) invoices bucketed by due date and the top debtors per
+    currency. DataManager folds each write into the summary (a new record, a
+    status change), so the Overview tab reads it without scanning the ledger.
+    Overdue figures are derived at read time from the due-date buckets, which
+    stay small (one per due date).
+
+    The outstanding amount per customer, needed to maintain the top debtors,
+    is kept in memory only: per currency a dict of amounts plus a max-heap
+    with lazily discarded stale entries, so a write costs O(log customers)
+    and the JSON file stays small. The published summary is replaced, never
+    modified, so readers can hold on to it without the lock.
+
+    The summary records the ledger's file signature; if the ledger changed
+    behind its back it is reloaded from the JSON file (another process folded
+    the change) or, failing that (a manual edit), rebuilt from a full scan on
+    the next read or write. The in-memory debtors carry their own signature
+    and are rebuilt from the ledger when another process wrote in between.
+    """
+    OUTSTANDING_STATUSES = ('pending', 'overdue')
+
+    def __init__(self, summary_file: str, top_debtors: int = 10):
+        self.summary_file = summary_file
+        self.top_debtors = top_debtors
+        self._lock = threading.RLock()
+        self.summary: Optional[Dict[str, Any]] = self._load_file()
+        # currency -> customer ID -> outstanding amount, and customer ID -> name
+        self._outstanding: Dict[str, Dict[str, float]] = {}
+        self._names: Dict[str, str] = {}
+        # currency -> heap of (-amount, customer ID), may hold stale entries
+        self._heaps: Dict[str, List[tuple]] = {}
+        self._debtors_signature = None
+
+
+    def _load_file(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.summary_file, encoding='utf-8') as f:
+                summary = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # Files written before debtors were kept in memory only
+        summary.pop('debtors', None)
+        return summary
+
+
+    def _save(self):
+        """Write the summary atomically, readers never see a partial file"""
+        directory = os.path.dirname(self.summary_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Unique temporary name, processes may rebuild the summary at the same time
+        fd, temp_file = tempfile.mkstemp(prefix=f".{os.path.basename(self.summary_file)}.", suffix='.tmp',
+                                         dir=directory or '.')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.summary, f)
+        os.replace(temp_file, self.summary_file)
+
+
+    @staticmethod
+    def _signature(ledger_file: str) -> Optional[List[int]]:
+        signature = file_signature(ledger_file)
+        return list(signature) if signature is not None else None
+
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            'ledger_signature': None,
+            'updated_at': None,
+            'records': 0,
+            # currency -> status -> {count, amount}
+            'by_currency_status': {},
+            # due date -> {count, amounts: currency -> amount}, pending invoices only
+            'pending_by_due_date': {},
+            # currency -> [[customer ID, name, amount]], largest first
+            'top_debtors': {}
+        }
+
+
+    @staticmethod
+    def _text(value) -> str:
+        return '' if value is None or pd.isna(value) else str(value)
+
+
+    def _apply(self, summary: Dict[str, Any], row: Dict[str, Any], sign: int, debtors: bool = True) -> Optional[str]:
+        """
+        Add (sign=1) or remove (sign=-1) one ledger row, returns the currency if
+        debtors changed. summary is a shallow copy of the published summary;
+        the entries touched are copied before they are changed.
+        """
+        currency = self._text(row.get('currency')) or 'USD'
+        status = self._text(row.get('payment_status')).lower()
+        amount = float(row.get('billed_amount') or 0)
+        summary['records'] += sign
+
+        statuses = summary['by_currency_status'][currency] = dict(summary['by_currency_status'].get(currency, {}))
+        totals = statuses.get(status, {'count': 0, 'amount': 0.0})
+        statuses[status] = {'count': totals['count'] + sign, 'amount': round(totals['amount'] + sign * amount, 2)}
+        if statuses[status]['count'] <= 0:
+            del statuses[status]
+            if not statuses:
+                del summary['by_currency_status'][currency]
+
+        if status == 'pending':
+            due_date = self._text(row.get('payment_due_date'))
+            bucket = summary['pending_by_due_date'].get(due_date, {'count': 0, 'amounts': {}})
+            amounts = dict(bucket['amounts'])
+            amounts[currency] = round(amounts.get(currency, 0.0) + sign * amount, 2)
+            summary['pending_by_due_date'][due_date] = {'count': bucket['count'] + sign, 'amounts': amounts}
+            if bucket['count'] + sign <= 0:
+                del summary['pending_by_due_date'][due_date]
+
+        if status not in self.OUTSTANDING_STATUSES or not debtors:
+            return None
+
+        customer_id = self._text(row.get('cust_unique_id'))
+        if sign > 0:
+            name = f"{self._text(row.get('cust_fname'))} {self._text(row.get('cust_lname'))}".strip()
+            self._names[customer_id] = name or self._names.get(customer_id, '')
+        amounts = self._outstanding.setdefault(currency, {})
+        outstanding = round(amounts.get(customer_id, 0.0) + sign * amount, 2)
+        if outstanding > 0:
+            amounts[customer_id] = outstanding
+            heapq.heappush(self._heaps.setdefault(currency, []), (-outstanding, customer_id))
+        else:
+            amounts.pop(customer_id, None)
+        return currency
+
+
+    def _top(self, currency: str) -> List[list]:
+        """Largest debtors of a currency, dropping the stale heap entries found on the way"""
+        amounts = self._outstanding.get(currency, {})
+        heap = self._heaps.get(currency, [])
+        if len(heap) > 2 * len(amounts) + 64:
+            # Mostly stale entries, start over from the live amounts
+            heap = self._heaps[currency] = [(-amount, customer_id) for customer_id, amount in amounts.items()]
+            heapq.heapify(heap)
+
+        top, kept = [], []
+        while heap and len(top) < self.top_debtors:
+            entry = heapq.heappop(heap)
+            customer_id = entry[1]
+            if amounts.get(customer_id) == -entry[0] and all(customer_id != kept_id for kept_id, _ in kept):
+                kept.append((customer_id, entry))
+                top.append([customer_id, self._names.get(customer_id, ''), -entry[0]])
+        for _, entry in kept:
+            heapq.heappush(heap, entry)
+        return top
+
+
+    def _refresh_top_debtors(self, summary: Dict[str, Any], currencies: Iterable[str]):
+        for currency in set(currencies):
+            summary['top_debtors'][currency] = self._top(currency)
+            if not summary['top_debtors'][currency]:
+                del summary['top_debtors'][currency]
+
+
+    def _finish(self, summary: Dict[str, Any], signature):
+        summary['ledger_signature'] = list(signature) if signature else None
+        summary['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.summary = summary
+        self._save()
+
+
+    @classmethod
+    def _frame(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Ledger columns the summary is built from, normalized like _apply does row by row"""
+        def text(column):
+            if column not in df.columns:
+                return pd.Series('', index=df.index)
+            return df[column].fillna('').astype(str)
+
+        return pd.DataFrame({
+            'currency': text('currency').replace('', 'USD'),
+            'status': text('payment_status').str.lower(),
+            'amount': pd.to_numeric(df['billed_amount'], errors='coerce').fillna(0.0)
+                      if 'billed_amount' in df.columns else 0.0,
+            'due_date': text('payment_due_date'),
+            'customer_id': text('cust_unique_id'),
+            'name': (text('cust_fname') + ' ' + text('cust_lname')).str.strip()
+        })
+
+
+    def _rebuild_debtors(self, frame: pd.DataFrame, signature):
+        outstanding = frame[frame['status'].isin(self.OUTSTANDING_STATUSES)]
+        sums = outstanding.groupby(['currency', 'customer_id'])['amount'].sum().round(2)
+        sums = sums[sums > 0]
+        self._outstanding = {
+            currency: amounts.droplevel(0).to_dict() for currency, amounts in sums.groupby(level=0)
+        }
+        named = outstanding[outstanding['name'] != ''].drop_duplicates('customer_id', keep='last')
+        self._names = dict(zip(named['customer_id'], named['name']))
+        self._heaps = {}
+        for currency, amounts in self._outstanding.items():
+            heap = self._heaps[currency] = [(-amount, customer_id) for customer_id, amount in amounts.items()]
+            heapq.heapify(heap)
+        self._debtors_signature = list(signature) if signature else None
+
+
+    def rebuild(self, ledger_file: str, df: pd.DataFrame, signature=None) -> Dict[str, Any]:
+        """
+        Recompute the summary from the whole ledger with grouped aggregations.
+        signature is that of the ledger version df was read from, defaults to
+        the ledger's current one.
+        """
+        if signature is None:
+            signature = self._signature(ledger_file)
+        frame = self._frame(df)
+        summary = self._empty()
+        summary['records'] = len(frame)
+
+        totals = frame.groupby(['currency', 'status'])['amount'].agg(['size', 'sum'])
+        for (currency, status), row in totals.iterrows():
+            summary['by_currency_status'].setdefault(currency, {})[status] = {
+                'count': int(row['size']), 'amount': round(float(row['sum']), 2)
+            }
+
+        pending = frame[frame['status'] == 'pending']
+        for due_date, count in pending.groupby('due_date').size().items():
+            summary['pending_by_due_date'][due_date] = {'count': int(count), 'amounts': {}}
+        for (due_date, currency), amount in pending.groupby(['due_date', 'currency'])['amount'].sum().items():
+            summary['pending_by_due_date'][due_date]['amounts'][currency] = round(float(amount), 2)
+
+        with self._lock:
+            self._rebuild_debtors(frame, signature)
+            self._refresh_top_debtors(summary, self._outstanding)
+            self._finish(summary, signature)
+            log_event('receivables_summary_rebuilt', level='info', sample_rate=1, rows=len(df))
+            return summary
+
+
+    def _in_sync(self, signature) -> bool:
+        """Whether the summary matches the ledger version with this signature, reloading the file if needed"""
+        expected = list(signature) if signature else None
+        if self.summary is not None and self.summary['ledger_signature'] == expected:
+            return True
+        on_disk = self._load_file()
+        if on_disk is not None and on_disk['ledger_signature'] == expected:
+            self.summary = on_disk
+            return True
+        return False
+
+
+    def current(self, ledger_file: str, loader: Callable[[], pd.DataFrame]) -> Dict[str, Any]:
+        """
+        The summary of the ledger as it is on disk, rebuilt only if the ledger
+        changed externally. loader() takes the ledger's shared lock, so it is
+        never called holding _lock: writers hold the ledger lock while they
+        wait for _lock in apply_changes.
+        """
+        summary = self.summary
+        signature = self._signature(ledger_file)
+        if summary is not None and summary['ledger_signature'] == signature:
+            return summary
+        with self._lock:
+            if self._in_sync(signature):
+                return self.summary
+
+        # If a write lands after the signature was taken, df is newer than the
+        # signature recorded; the next write or read sees the mismatch and rebuilds
+        df = loader()
+        return self.rebuild(ledger_file, df, signature)
+
+
+    def apply_changes(self, ledger_file: str, read_signature, loader: Callable[[], pd.DataFrame], changes: List[tuple]):
+        """
+        Fold the (row, sign) changes of a ledger commit (one or more writes, see
+        added_changes and status_changes) into the summary. read_signature is
+        the ledger's signature before the write; a summary that wasn't in sync
+        with that version is rebuilt from loader(), the ledger as written.
+        Called with the ledger locked, so loader() must read it without locking.
+        """
+        with self._lock:
+            if not self._in_sync(read_signature):
+                self.rebuild(ledger_file, loader())
+                return
+
+            expected = list(read_signature) if read_signature else None
+            debtors_in_sync = self._debtors_signature == expected
+            # Copy on write: only the containers and entries touched are copied,
+            # readers may still hold the previous summary
+            summary = dict(self.summary,
+                           by_currency_status=dict(self.summary['by_currency_status']),
+                           pending_by_due_date=dict(self.summary['pending_by_due_date']),
+                           top_debtors=dict(self.summary['top_debtors']))
+            currencies = [self._apply(summary, row, sign, debtors=debtors_in_sync) for row, sign in changes]
+            signature = self._signature(ledger_file)
+            if debtors_in_sync:
+                self._debtors_signature = list(signature) if signature else None
+                self._refresh_top_debtors(summary, filter(None, currencies))
+            else:
+                # The summary was folded by another process, the debtors are rebuilt from the ledger as written
+                self._rebuild_debtors(self._frame(loader()), signature)
+                summary['top_debtors'] = {}
+                self._refresh_top_debtors(summary, self._outstanding)
+            self._finish(summary, signature)
+
+
+    @staticmethod
+    def added_changes(records: List[Dict[str, Any]]) -> List[tuple]:
+        """Changes of newly appended ledger records"""
+        return [(record, 1) for record in records]
+
+
+    @staticmethod
+    def status_changes(rows_before: List[Dict[str, Any]], status: str) -> List[tuple]:
+        """Changes of a payment status update of the given ledger rows"""
+        changes = []
+        for row in rows_before:
+            changes.append((row, -1))
+            changes.append((dict(row, payment_status=status), 1))
+        return changes
+
+
+    @staticmethod
+    def totals_frame(summary: Dict[str, Any]) -> pd.DataFrame:
+        """Count and amount per currency and payment status"""
+        return pd.DataFrame(
+            [
+                {'currency': currency, 'status': status, 'count': totals['count'], 'amount': totals['amount']}
+                for currency, statuses in sorted(summary['by_currency_status'].items())
+                for status, totals in sorted(statuses.items())
+            ],
+            columns=['currency', 'status', 'count', 'amount']
+        )
+
+
+    @staticmethod
+    def overdue(summary: Dict[str, Any], as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Overdue invoices: marked 'overdue', or pending past their due date.
+        Returns {'count': n, 'amounts': {currency: amount}}.
+        """
+        today = (as_of or date.today()).strftime('%Y-%m-%d')
+        count, amounts = 0, {}
+        for currency, statuses in summary['by_currency_status'].items():
+            totals = statuses.get('overdue')
+            if totals:
+                count += totals['count']
+                amounts[currency] = round(amounts.get(currency, 0.0) + totals['amount'], 2)
+        for due_date, bucket in summary['pending_by_due_date'].items():
+            # ISO dates compare as strings; empty due dates never count as overdue
+            if due_date and due_date < today:
+                count += bucket['count']
+                for currency, amount in bucket['amounts'].items():
+                    amounts[currency] = round(amounts.get(currency, 0.0) + amount, 2)
+        return {'count': count, 'amounts': amounts}
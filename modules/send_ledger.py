@@ -0,0 +1,170 @@
+# send_ledger.py
+
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import os
+from config.customer_config import CustomerConfig
+from modules.metrics import csv_io
+from modules.file_commit import GroupCommit, atomic_write_csv, append_csv, file_signature
+
+class SendLedger:
+    """
+    Idempotency index of delivered invoice emails.
+    A delivery is keyed by (transaction_id, template_version, recipient), so
+    re-running the workflow for an invoice that was already sent is a no-op
+    unless the caller forces a resend.
+
+    The ledger is an append-only log of delivery events: a sender reserves the
+    key before calling SMTP, then records it as sent or releases it. The
+    reservation is decided under the ledger's commit lock against the ledger
+    as it is on disk, so two sessions or processes never both send the same
+    invoice. Reservations older than SEND_RESERVATION_TIMEOUT_SECONDS (the
+    sender died) can be taken over. A delivery stays recorded once sent: a
+    forced resend that is released again does not make the invoice unsent.
+    """
+    COLUMNS = ['transaction_id', 'template_version', 'recipient', 'sent_at', 'status']
+    TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+    RESERVED, SENT, RELEASED = 'reserved', 'sent', 'released'
+
+    def __init__(self, ledger_file: str = 'data/send_ledger.csv'):
+        config = CustomerConfig()
+        self.ledger_file = ledger_file
+        self.reservation_timeout = timedelta(seconds=config.SEND_RESERVATION_TIMEOUT_SECONDS)
+        self.committer = GroupCommit(ledger_file, self._apply_batch, config.FILE_COMMIT_WINDOW_MS / 1000)
+        self.ensure_ledger_file()
+        # (file signature, key -> (status, time, last sent_at)), replaced as a whole
+        self._state = (file_signature(ledger_file), self.load_index())
+
+
+    def ensure_ledger_file(self):
+        """Create ledger file if it doesn't exist, add the status column to an older one"""
+        directory = os.path.dirname(self.ledger_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with self.committer.lock.exclusive():
+            if not os.path.exists(self.ledger_file):
+                pd.DataFrame(columns=self.COLUMNS).to_csv(self.ledger_file, index=False)
+            elif 'status' not in pd.read_csv(self.ledger_file, nrows=0).columns:
+                # Ledgers written before reservations only hold deliveries
+                df = pd.read_csv(self.ledger_file, dtype=str)
+                df['status'] = self.SENT
+                atomic_write_csv(df[self.COLUMNS], self.ledger_file)
+
+
+    @staticmethod
+    def make_key(transaction_id, template_version, recipient) -> Tuple[str, str, str]:
+        """Build the idempotency key; recipients are compared case-insensitively"""
+        return (str(transaction_id), str(template_version), str(recipient).strip().lower())
+
+
+    def _fold(self, index, key, status, at):
+        """Apply one event to the index; the last delivery is kept across later reservations and releases"""
+        _, _, sent_at = index.get(key, (None, None, None))
+        index[key] = (status, at, at if status == self.SENT else sent_at)
+
+
+    def _read_index(self):
+        with csv_io(self.ledger_file, 'read'):
+            df = pd.read_csv(self.ledger_file, dtype=str)
+        index = {}
+        for row in df.itertuples(index=False):
+            self._fold(index, self.make_key(row.transaction_id, row.template_version, row.recipient),
+                       row.status, row.sent_at)
+        return index
+
+
+    def load_index(self):
+        """Load the latest event and last delivery of every key into an in-memory index"""
+        with self.committer.lock.shared():
+            return self._read_index()
+
+
+    def _index(self):
+        signature, index = self._state
+        current = file_signature(self.ledger_file)
+        if current != signature:
+            # Appended by another process
+            index = self.load_index()
+            self._state = (current, index)
+        return index
+
+
+    def get_sent_at(self, transaction_id, template_version, recipient) -> Optional[str]:
+        """Return the delivery timestamp if this invoice was already sent"""
+        _, _, sent_at = self._index().get(self.make_key(transaction_id, template_version, recipient), (None, None, None))
+        return sent_at
+
+
+    def is_sent(self, transaction_id, template_version, recipient) -> bool:
+        """Check whether this invoice was already delivered to the recipient"""
+        return self.get_sent_at(transaction_id, template_version, recipient) is not None
+
+
+    def reserve(self, transaction_id, template_version, recipient, force: bool = False) -> Tuple[bool, Optional[str]]:
+        """
+        Reserve a delivery before sending it. Returns (True, None) when the
+        caller may send, (False, sent_at) when it was already sent (unless
+        force) and (False, None) while another sender holds the reservation.
+        """
+        key = self.make_key(transaction_id, template_version, recipient)
+        return self.committer.submit((self.RESERVED, key, force)).result
+
+
+    def record_sent(self, transaction_id, template_version, recipient, sent_at: Optional[str] = None) -> str:
+        """Record a successful delivery, finalizing its reservation"""
+        sent_at = sent_at or datetime.now().strftime(self.TIME_FORMAT)
+        key = self.make_key(transaction_id, template_version, recipient)
+        self.committer.submit((self.SENT, key, sent_at))
+        return sent_at
+
+
+    def release(self, transaction_id, template_version, recipient):
+        """Drop the reservation of a delivery that was not sent, an earlier delivery stays recorded"""
+        key = self.make_key(transaction_id, template_version, recipient)
+        self.committer.submit((self.RELEASED, key, None))
+
+
+    def _reservation_result(self, index, key, force: bool) -> Tuple[bool, Optional[str]]:
+        status, at, sent_at = index.get(key, (None, None, None))
+        if sent_at is not None and not force:
+            return False, sent_at
+        if status == self.RESERVED:
+            reserved_at = pd.to_datetime(at, format=self.TIME_FORMAT, errors='coerce')
+            if not pd.isna(reserved_at) and datetime.now() - reserved_at < self.reservation_timeout:
+                return False, None
+        return True, None
+
+
+    def _apply_batch(self, changes):
+        """
+        Decide reservations and append the events of a group commit in one
+        write, called with the ledger locked
+        """
+        signature, index = self._state
+        if file_signature(self.ledger_file) != signature:
+            index = self._read_index()
+        # Readers may still hold the previous index
+        index = dict(index)
+
+        now = datetime.now().strftime(self.TIME_FORMAT)
+        rows, results = [], []
+        for status, key, value in changes:
+            if status == self.RESERVED:
+                result = self._reservation_result(index, key, force=value)
+                results.append(result)
+                if not result[0]:
+                    continue
+                value = now
+            else:
+                results.append(None)
+                value = value or now
+            self._fold(index, key, status, value)
+            rows.append(list(key) + [value, status])
+
+        # Append only, the ledger is never rewritten
+        if rows:
+            append_csv(pd.DataFrame(rows, columns=self.COLUMNS), self.ledger_file)
+        self._state = (file_signature(self.ledger_file), index)
+        return results
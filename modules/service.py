@@ -0,0 +1,267 @@
+# modules/service.py
+
+import sys
+import json
+import argparse
+import contextlib
+from datetime import datetime, date
+from typing import Dict, Any, Iterable, Iterator, Optional
+from modules.systems import systems
+
+class InvoiceService:
+    """
+    Headless operations over the shared DataManager, WorkflowManager and
+    KYCManager, for schedulers and scripts rather than Streamlit buttons.
+    Every operation takes a JSON-style payload and returns a JSON-safe dict
+    with 'ok' and 'message'; failures are reported in the result instead of
+    raised, so one bad line of a batch never stops the rest.
+
+    Payload fields:
+      submit         cust_unique_id, cust_tax_id, cust_fname, cust_lname, cust_email,
+                     billed_amount, currency (USD), payment_status (pending)
+      search         customer_id
+      generate       customer_id                   invoice PDF only
+      send           customer_id, force (false)    generate and email, skips invoices already sent
+      update_status  transaction_id, status
+      kyc_search     term, limit (KYC_SEARCH_PAGE_SIZE)
+      kyc_save       record, update (false)
+      kyc_import     path
+    """
+    PAYMENT_STATUSES = ['pending', 'paid', 'overdue', 'cancelled']
+
+    def __init__(self):
+        self.operations = {
+            'submit': self.submit,
+            'search': self.search,
+            'generate': self.generate,
+            'send': self.send,
+            'update_status': self.update_status,
+            'kyc_search': self.kyc_search,
+            'kyc_save': self.kyc_save,
+            'kyc_import': self.kyc_import
+        }
+
+
+    @property
+    def data_manager(self):
+        return systems.get('data_manager')
+
+
+    @property
+    def workflow_manager(self):
+        return systems.get('workflow_manager')
+
+
+    @property
+    def kyc_manager(self):
+        return systems.get('kyc_manager')
+
+
+    @staticmethod
+    def _plain(value):
+        """JSON-safe value: numpy scalars -> Python scalars, dates -> ISO strings, NaN -> None"""
+        if isinstance(value, dict):
+            return {key: InvoiceService._plain(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [InvoiceService._plain(item) for item in value]
+        if isinstance(value, float) and value != value:
+            return None
+        if isinstance(value, datetime):
+            return None if value != value else value.isoformat(sep=' ')
+        if isinstance(value, date):
+            return value.isoformat()
+        if hasattr(value, 'item'):
+            return InvoiceService._plain(value.item())
+        return value
+
+
+    def _load_state(self, customer_id: str):
+        from modules.workflow_state import WorkflowState
+        return self.data_manager.get_customer(customer_id, WorkflowState)
+
+
+    def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and save a new ledger record, as the Submit New Record button does"""
+        from modules.validator import DataValidator
+        from modules.workflow_state import WorkflowState
+
+        state = WorkflowState.empty()
+        state.customer.update({key: str(payload.get(key, '') or '') for key in state.customer})
+        try:
+            amount = float(payload.get('billed_amount', 0))
+        except (TypeError, ValueError):
+            return {'ok': False, 'message': f"Invalid billed amount: {payload.get('billed_amount')}"}
+        state.invoice.update(WorkflowState.new_invoice(
+            amount, payload.get('currency', 'USD'), payload.get('payment_status', 'pending')
+        ))
+
+        validation_result = DataValidator.validate_workflow_state(state.dict())
+        if validation_result is not None:
+            return {'ok': False, 'message': f"Validation failed: {validation_result}"}
+
+        saved = self.data_manager.save_record(state.dict(), WorkflowState)
+        return {'ok': True, 'message': "Record saved successfully",
+                'customer': saved.customer, 'invoice': saved.invoice}
+
+
+    def search(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Latest ledger record of a customer"""
+        state = self._load_state(payload['customer_id'])
+        if state is None:
+            return {'ok': False, 'message': "Customer not found"}
+        return {'ok': True, 'message': "Customer found", 'customer': state.customer, 'invoice': state.invoice}
+
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Render the invoice PDF of a customer's latest record without sending it"""
+        state = self._load_state(payload['customer_id'])
+        if state is None:
+            return {'ok': False, 'message': "Customer not found"}
+        file_path = self.workflow_manager.invoice_generator.generate_invoice(state.dict())
+        return {'ok': True, 'message': "Invoice generated", 'file_path': file_path,
+                'transaction_id': state.invoice['transaction_id']}
+
+
+    def send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the invoice workflow (generate and email) for a customer's latest record"""
+        state = self._load_state(payload['customer_id'])
+        if state is None:
+            return {'ok': False, 'message': "Customer not found"}
+
+        result = self.workflow_manager.run_workflow(state, force=bool(payload.get('force', False)))
+        if result.error:
+            return {'ok': False, 'message': result.error}
+
+        notification = result.email_notification_status or {}
+        if notification.get('skipped'):
+            message = f"Invoice already sent to {notification['recipient']} on {notification['sent_at']}"
+        else:
+            message = f"Invoice generated and sent to {result.customer['cust_email']}"
+        return {'ok': True, 'message': message,
+                'transaction_id': result.invoice['transaction_id'],
+                'file_path': (result.invoice_creation_status or {}).get('file_path'),
+                'email_notification_status': notification}
+
+
+    def update_status(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Set the payment status of a transaction"""
+        status = str(payload.get('status', '')).lower()
+        if status not in self.PAYMENT_STATUSES:
+            return {'ok': False, 'message': f"Invalid payment status: {payload.get('status')}"}
+        if not self.data_manager.update_payment_status(payload['transaction_id'], status):
+            return {'ok': False, 'message': f"Transaction not found: {payload['transaction_id']}"}
+        return {'ok': True, 'message': f"Payment status set to {status}",
+                'transaction_id': payload['transaction_id']}
+
+
+    def kyc_search(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Best KYC search hits, result columns with ISO dates"""
+        kyc_manager = self.kyc_manager
+        limit = int(payload.get('limit') or kyc_manager.config.KYC_SEARCH_PAGE_SIZE)
+        ranked, total = kyc_manager.search_ranked(payload.get('term', ''), limit=limit)
+        rows = kyc_manager.dates.to_storage_frame(ranked, kyc_manager.config.KYC_SEARCH_RESULT_COLUMNS)
+        return {'ok': True, 'message': f"{total} matching records", 'total': total,
+                'records': rows.astype(object).where(rows.notna(), None).to_dict('records')}
+
+
+    def kyc_save(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a KYC record, or update one when 'update' is set"""
+        success, message = self.kyc_manager.save_kyc_record(
+            dict(payload['record']), update=bool(payload.get('update', False))
+        )
+        return {'ok': success, 'message': message}
+
+
+    def kyc_import(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Bulk import a CSV/XLSX file of KYC applicants from a local path"""
+        summary = self.kyc_manager.import_kyc_file(payload['path'])
+        return dict(summary, ok=True, message=f"{summary['imported']} imported, {summary['rejected']} rejected")
+
+
+    def execute(self, op: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one operation, errors are returned as a failed result"""
+        operation = self.operations.get(op)
+        if operation is None:
+            return {'ok': False, 'op': op, 'message': f"Unknown operation: {op}"}
+        try:
+            result = operation(payload)
+        except KeyError as e:
+            result = {'ok': False, 'message': f"Missing field: {e.args[0]}"}
+        except Exception as e:
+            result = {'ok': False, 'message': f"{op} failed: {str(e)}"}
+        return self._plain(dict(result, op=op))
+
+
+    def run_batch(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Run JSON Lines requests ({"op": ..., <payload fields>}) in order,
+        yielding each result as soon as it is ready. Results carry the input
+        line number and the request's optional "id".
+        """
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                yield {'line': line_number, 'ok': False, 'message': f"Invalid JSON: {str(e)}"}
+                continue
+
+            payload = dict(request)
+            op = payload.pop('op', None)
+            request_id = payload.pop('id', None)
+            result = self.execute(op, payload)
+            result['line'] = line_number
+            if request_id is not None:
+                result['id'] = request_id
+            yield result
+
+
+    @staticmethod
+    def to_json_line(result: Dict[str, Any]) -> str:
+        return json.dumps(result, default=str) + '\n'
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.service',
+        description="Headless invoice and KYC operations"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run JSON Lines requests, stream JSON Lines results to stdout")
+    run.add_argument('input', nargs='?', default='-', help="JSON Lines file, - for stdin (default)")
+
+    serve = commands.add_parser('serve', help="serve the local HTTP API")
+    serve.add_argument('--host')
+    serve.add_argument('--port', type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from modules.service_api import serve as serve_api
+        serve_api(args.host, args.port)
+        return
+
+    service = InvoiceService()
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    results = sys.stdout
+    failed = 0
+    try:
+        # Debug output of the managers goes to stderr, stdout carries only the results
+        with contextlib.redirect_stdout(sys.stderr):
+            for result in service.run_batch(source):
+                failed += not result['ok']
+                results.write(service.to_json_line(result))
+                results.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    # e.g. python -m modules.service run requests.jsonl > results.jsonl
+    main()
@@ -0,0 +1,103 @@
+# modules/service_api.py
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+from config.customer_config import CustomerConfig
+from modules.service import InvoiceService
+from modules.metrics import metrics
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Local HTTP API over InvoiceService:
+      GET  /health  liveness check
+      GET  /metrics metrics of this process in the Prometheus text format
+      POST /batch   JSON Lines requests in, results streamed back as JSON Lines
+                    (chunked, one line per request as soon as it completes)
+      POST /<op>    one JSON payload in, one JSON result out
+    """
+    service = InvoiceService()
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status: int, result: dict):
+        body = json.dumps(result, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def _body_lines(self) -> Iterator[str]:
+        """Request body read line by line, so large batches are never held in memory"""
+        remaining = int(self.headers.get('Content-Length') or 0)
+        while remaining > 0:
+            line = self.rfile.readline(min(remaining, 1 << 20))
+            if not line:
+                break
+            remaining -= len(line)
+            yield line.decode('utf-8')
+
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._send_json(200, {'ok': True, 'operations': sorted(self.service.operations)})
+        elif self.path.rstrip('/') == '/metrics':
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {'ok': False, 'message': f"Not found: {self.path}"})
+
+
+    def do_POST(self):
+        op = self.path.strip('/')
+        if op == 'batch':
+            self._stream_batch()
+            return
+
+        if op not in self.service.operations:
+            self._send_json(404, {'ok': False, 'message': f"Unknown operation: {op}"})
+            return
+        try:
+            payload = json.loads(''.join(self._body_lines()) or '{}')
+        except ValueError as e:
+            self._send_json(400, {'ok': False, 'message': f"Invalid JSON: {str(e)}"})
+            return
+
+        result = self.service.execute(op, payload)
+        self._send_json(200 if result['ok'] else 422, result)
+
+
+    def _stream_batch(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for result in self.service.run_batch(self._body_lines()):
+            chunk = self.service.to_json_line(result).encode('utf-8')
+            self.wfile.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None):
+    """Serve the API until interrupted, on localhost by default"""
+    config = CustomerConfig()
+    host = host or config.SERVICE_API_HOST
+    port = port or config.SERVICE_API_PORT
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    print(f"Invoice service API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
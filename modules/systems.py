@@ -0,0 +1,184 @@
+# modules/systems.py
+
+import atexit
+import threading
+from typing import Callable, Dict, Any, Optional, List
+from modules.event_log import log_event
+
+class SystemRegistry:
+    """
+    Process-wide systems shared by every Streamlit session: data managers,
+    generators, the email handler and the compiled workflow. Each system is
+    built once, on first use or by warm_up(), behind a lock so concurrent
+    sessions never build it twice; a factory that fails is retried on the
+    next request. Systems must not keep per-user state, that belongs in
+    st.session_state.
+
+    Factories import their modules when called, so heavy dependencies
+    (langgraph, reportlab, smtplib) load only when a system is first used
+    rather than when the app starts.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._factories: Dict[str, Dict[str, Any]] = {}
+        self._systems: Dict[str, Any] = {}
+        # Build order, so shutdown closes dependants before their dependencies
+        self._started: List[str] = []
+        self._warmed = set()
+
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 warm_up: Optional[Callable[[Any], None]] = None,
+                 close: Optional[Callable[[Any], None]] = None):
+        """Declare how a system is built, warmed up (e.g. caches preloaded) and closed"""
+        with self._lock:
+            self._factories[name] = {'factory': factory, 'warm_up': warm_up, 'close': close}
+
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance of a system, building it on first use"""
+        system = self._systems.get(name)
+        if system is not None:
+            return system
+
+        with self._lock:
+            # Another session may have built it while we waited for the lock
+            system = self._systems.get(name)
+            if system is None:
+                system = self._factories[name]['factory']()
+                self._systems[name] = system
+                self._started.append(name)
+            return system
+
+
+    def is_started(self, name: str) -> bool:
+        return name in self._systems
+
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Build systems ahead of the first request and run their warm-up hooks (once per build)"""
+        warmed = {}
+        for name in names or list(self._factories):
+            system = self.get(name)
+            hook = self._factories[name]['warm_up']
+            if hook is not None and name not in self._warmed:
+                hook(system)
+                self._warmed.add(name)
+            warmed[name] = system
+        return warmed
+
+
+    def shutdown(self):
+        """Close started systems in reverse build order and forget them"""
+        with self._lock:
+            for name in reversed(self._started):
+                close = self._factories[name]['close']
+                if close is not None:
+                    try:
+                        close(self._systems[name])
+                    except Exception as e:
+                        log_event('system_close_failed', level='warning', system=name, error=str(e))
+            self._systems.clear()
+            self._started.clear()
+            self._warmed.clear()
+
+
+    def reset(self, name: str):
+        """Drop one system so that it is rebuilt on next use (e.g. after a config change)"""
+        with self._lock:
+            system = self._systems.pop(name, None)
+            if system is None:
+                return
+            self._started.remove(name)
+            self._warmed.discard(name)
+            close = self._factories[name]['close']
+            if close is not None:
+                close(system)
+
+
+# Factories import lazily, see SystemRegistry
+
+def build_data_manager():
+    from modules.data_manager import DataManager
+    return DataManager()
+
+
+def build_invoice_generator():
+    from modules.invoice_gen import InvoiceGenerator
+    return InvoiceGenerator()
+
+
+def build_email_handler():
+    from modules.email_handler import EmailHandler
+    return EmailHandler()
+
+
+def build_send_ledger():
+    from modules.send_ledger import SendLedger
+    return SendLedger()
+
+
+def build_workflow_manager():
+    from modules.workflow import WorkflowManager
+    from modules.workflow_state import WorkflowState
+    return WorkflowManager(
+        systems.get('data_manager'),
+        systems.get('invoice_generator'),
+        systems.get('email_handler'),
+        WorkflowState,
+        systems.get('send_ledger')
+    )
+
+
+def build_kyc_manager():
+    from modules.kyc_manager import KYCManager
+    kyc_manager = KYCManager()
+    kyc_manager.start_expiry_scanner()
+    return kyc_manager
+
+
+def build_job_runner():
+    from config.customer_config import CustomerConfig
+    from modules.job_runner import JobRunner
+    config = CustomerConfig()
+    return JobRunner(config.JOB_POOL_SIZES, config.JOB_MAX_PENDING, config.JOB_HISTORY_LIMIT)
+
+
+def build_metrics_exporter():
+    from config.customer_config import CustomerConfig
+    from modules.metrics import metrics
+    config = CustomerConfig()
+    if config.METRICS_TEXTFILE:
+        metrics.start_textfile_export(config.METRICS_TEXTFILE, config.METRICS_EXPORT_INTERVAL_SECONDS)
+    return metrics
+
+
+def close_metrics_exporter(metrics):
+    # Final export, so the textfile holds the last observations of the process
+    from config.customer_config import CustomerConfig
+    if CustomerConfig.METRICS_TEXTFILE:
+        metrics.write_textfile(CustomerConfig.METRICS_TEXTFILE)
+
+
+def warm_up_kyc_manager(kyc_manager):
+    # Parse the KYC dataset before the first rerun needs it
+    kyc_manager.read_kyc_data()
+
+
+def close_kyc_manager(kyc_manager):
+    from modules.kyc_expiry import expiry_scanner
+    expiry_scanner.stop()
+
+
+# Shared by every session in the process
+systems = SystemRegistry()
+systems.register('data_manager', build_data_manager)
+systems.register('invoice_generator', build_invoice_generator)
+systems.register('email_handler', build_email_handler)
+systems.register('send_ledger', build_send_ledger)
+systems.register('workflow_manager', build_workflow_manager)
+systems.register('kyc_manager', build_kyc_manager, warm_up=warm_up_kyc_manager, close=close_kyc_manager)
+systems.register('job_runner', build_job_runner, close=lambda job_runner: job_runner.shutdown(wait=False))
+systems.register('metrics_exporter', build_metrics_exporter, close=close_metrics_exporter)
+
+atexit.register(systems.shutdown)
@@ -1,13 +1,63 @@
 # validator.py
 import re
+import pandas as pd
 from datetime import datetime
+from typing import Optional, Tuple
+
+# Plain ASCII decimal numbers (and inf/nan, which float() spells out). float() alone
+# also takes '1_000' and non-ASCII digits, which the bulk paths would not
+NUMBER_PATTERN = re.compile(
+    r'[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|inf|infinity|nan)', re.ASCII | re.IGNORECASE
+)
+
+
+def parse_number(value) -> Optional[float]:
+    """Float of a number or numeric string, None if it is not one; the single-record rules of parse_numbers"""
+    text = str(value).strip()
+    return float(text) if NUMBER_PATTERN.fullmatch(text) else None
+
+
+def parse_numbers(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Vectorized parse_number: (floats, mask of values that are numbers).
+    Values that are not numbers are NaN, and so is a parsed 'nan'.
+    """
+    text = values.astype(str).str.strip()
+    parsed = text.str.fullmatch(NUMBER_PATTERN).fillna(False).astype(bool)
+    # astype(float) converts each string with float(), exactly like parse_number
+    return text.where(parsed).astype(object).astype(float), parsed
+
+
+def error_lists(error_matrix: pd.DataFrame) -> pd.Series:
+    """Collapse a validate_dataframe error matrix into per-row error lists (None for valid rows)"""
+    messages = error_matrix.columns.to_numpy()
+    flags = error_matrix.to_numpy()
+    return pd.Series(
+        [list(messages[row]) or None for row in flags],
+        index=error_matrix.index,
+        dtype=object
+    )
+
 
 class DataValidator:
+    EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+    # Error messages in the order validate_workflow_state reports them
+    ERROR_MESSAGES = [
+        "Customer ID is required",
+        "Tax ID is required",
+        "Email is required",
+        "Invalid email format",
+        "Billed amount is required",
+        "Billed amount must be positive",
+        "Invalid billed amount",
+        "Currency is required"
+    ]
+
     @staticmethod
     def validate_email(email):
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(DataValidator.EMAIL_PATTERN.match(email))
 
 
     @staticmethod
@@ -31,13 +81,64 @@ class DataValidator:
         if not invoice.get('billed_amount'):
             errors.append("Billed amount is required")
         else:
-            try:
-                if float(invoice['billed_amount']) <= 0:
-                    errors.append("Billed amount must be positive")
-            except ValueError:
+            amount = parse_number(invoice['billed_amount'])
+            if amount is None:
                 errors.append("Invalid billed amount")
+            elif amount <= 0:
+                errors.append("Billed amount must be positive")
 
         if not invoice.get('currency'):
             errors.append("Currency is required")
 
-        return errors if errors else None
\ No newline at end of file
+        return errors if errors else None
+
+
+    @staticmethod
+    def _missing(column: pd.Series) -> pd.Series:
+        """Vectorized equivalent of `not value` for a ledger column (empty cells count as missing)"""
+        values = column.astype(object)
+        return values.isna() | (values == '') | (values == 0)
+
+
+    @staticmethod
+    def validate_dataframe(records) -> pd.DataFrame:
+        """
+        Validate ledger rows in bulk.
+        Accepts a DataFrame in the cust_file.csv layout or a dict of column arrays
+        and returns a boolean error matrix with one column per error message,
+        applying the same rules as validate_workflow_state.
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        empty = pd.Series(None, index=df.index, dtype=object)
+
+        def column(name):
+            return df[name] if name in df.columns else empty
+
+        errors = pd.DataFrame(False, index=df.index, columns=DataValidator.ERROR_MESSAGES)
+
+        # Customer data validation
+        errors["Customer ID is required"] = DataValidator._missing(column('cust_unique_id'))
+        errors["Tax ID is required"] = DataValidator._missing(column('cust_tax_id'))
+
+        email = column('cust_email')
+        email_missing = DataValidator._missing(email)
+        errors["Email is required"] = email_missing
+        # Object dtype keeps matching on Python's re engine, as in validate_email
+        email_valid = email.astype(str).astype(object).str.match(DataValidator.EMAIL_PATTERN).fillna(False).astype(bool)
+        errors["Invalid email format"] = ~email_missing & ~email_valid
+
+        # Invoice data validation
+        amount = column('billed_amount')
+        amount_missing = DataValidator._missing(amount)
+        numeric_amount, amount_parsed = parse_numbers(amount)
+        errors["Billed amount is required"] = amount_missing
+        errors["Billed amount must be positive"] = ~amount_missing & amount_parsed & (numeric_amount <= 0)
+        errors["Invalid billed amount"] = ~amount_missing & ~amount_parsed
+
+        errors["Currency is required"] = DataValidator._missing(column('currency'))
+
+        return errors
+
+
+    # Shared with KYCValidator
+    error_lists = staticmethod(error_lists)
@@ -4,12 +4,15 @@ from langgraph.graph import StateGraph
 from datetime import datetime, timedelta
 import uuid
 from typing import Dict, Any
+from modules.send_ledger import SendLedger
+from modules.event_log import log_event
 
 class WorkflowManager:
-    def __init__(self, data_manager, invoice_generator, email_handler, workflow_state_class):
+    def __init__(self, data_manager, invoice_generator, email_handler, workflow_state_class, send_ledger=None):
         self.data_manager = data_manager
         self.invoice_generator = invoice_generator
         self.email_handler = email_handler
+        self.send_ledger = send_ledger if send_ledger is not None else SendLedger()
         self.graph = self.setup_workflow(workflow_state_class)
 
     def setup_workflow(self, workflow_state_class):
@@ -55,41 +58,94 @@ class WorkflowManager:
             
         return workflow_state
 
-    def send_notification_step(self, workflow_state):
-        """Email notification step"""
+    def send_notification_step(self, workflow_state, force: bool = False):
+        """Email notification step, sends only after reserving the delivery in the send ledger"""
+        delivery = (
+            workflow_state.invoice['transaction_id'],
+            self.email_handler.TEMPLATE_VERSION,
+            workflow_state.customer['cust_email']
+        )
         try:
-            email_sent = self.email_handler.send_invoice(
-                workflow_state.customer['cust_email'],
-                workflow_state.dict(),
-                workflow_state.invoice_creation_status['file_path']
-            )
-            
+            # Decided atomically across sessions and processes, unlike the early already_sent_step check
+            reserved, sent_at = self.send_ledger.reserve(*delivery, force=force)
+            if not reserved:
+                if sent_at is not None:
+                    return self._mark_already_sent(workflow_state, sent_at)
+                workflow_state.error = "Invoice email is already being sent by another session"
+                return workflow_state
+
+            try:
+                email_sent = self.email_handler.send_invoice(
+                    workflow_state.customer['cust_email'],
+                    workflow_state.dict(),
+                    workflow_state.invoice_creation_status['file_path']
+                )
+            except Exception:
+                self.send_ledger.release(*delivery)
+                raise
+
+            sent_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if email_sent:
+                self.send_ledger.record_sent(*delivery, sent_at)
+            else:
+                self.send_ledger.release(*delivery)
+
             workflow_state.email_notification_status = {
                 "is_sent": email_sent,
-                "sent_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "sent_at": sent_at,
                 "recipient": workflow_state.customer['cust_email']
             }
-            print("*********\n\nDebugging : email_notification_status : ", workflow_state.email_notification_status)
+            log_event('invoice_email', level='debug' if email_sent else 'warning',
+                      transaction_id=workflow_state.invoice['transaction_id'],
+                      **workflow_state.email_notification_status)
         except Exception as e:
             workflow_state.error = f"Email notification failed: {str(e)}"
             
         return workflow_state
 
-    def run_workflow(self, workflow_state):
-        """Execute complete workflow"""
+    def already_sent_step(self, workflow_state):
+        """Mark the workflow as a no-op when this invoice was already delivered"""
+        sent_at = self.send_ledger.get_sent_at(
+            workflow_state.invoice['transaction_id'],
+            self.email_handler.TEMPLATE_VERSION,
+            workflow_state.customer['cust_email']
+        )
+        if sent_at is None:
+            return None
+        return self._mark_already_sent(workflow_state, sent_at)
+
+    def _mark_already_sent(self, workflow_state, sent_at):
+        workflow_state.email_notification_status = {
+            "is_sent": True,
+            "sent_at": sent_at,
+            "recipient": workflow_state.customer['cust_email'],
+            "skipped": True
+        }
+        workflow_state.error = None
+        workflow_state.completed = True
+        return workflow_state
+
+    def run_workflow(self, workflow_state, force: bool = False):
+        """Execute complete workflow, skipping invoices already sent unless forced"""
         try:
             # Run validation
             workflow_state = self.validate_step(workflow_state)
             if workflow_state.error and workflow_state.error != "Duplicate customer ID":
                 return workflow_state
 
+            # Skip rendering and SMTP if this exact invoice was already delivered
+            if not force:
+                skipped_state = self.already_sent_step(workflow_state)
+                if skipped_state is not None:
+                    return skipped_state
+
             # Generate invoice
             workflow_state = self.generate_invoice_step(workflow_state)
             if workflow_state.error:
                 return workflow_state
 
             # Send notification
-            workflow_state = self.send_notification_step(workflow_state)
+            workflow_state = self.send_notification_step(workflow_state, force=force)
             if workflow_state.error:
                 return workflow_state
 
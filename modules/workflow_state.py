@@ -0,0 +1,52 @@
+# modules/workflow_state.py
+
+from pydantic import BaseModel
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+import uuid
+
+class WorkflowState(BaseModel):
+    customer: Dict[str, Any]
+    invoice: Dict[str, Any]
+    validation_status: Optional[Dict[str, Any]] = None
+    invoice_creation_status: Optional[Dict[str, Any]] = None
+    email_notification_status: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    completed: bool = False
+
+
+    @classmethod
+    def empty(cls) -> 'WorkflowState':
+        """Blank state of a new session or after a reset"""
+        return cls(
+            customer={
+                'cust_unique_id': '',
+                'cust_tax_id': '',
+                'cust_fname': '',
+                'cust_lname': '',
+                'cust_email': ''
+            },
+            invoice={
+                'transaction_id': '',
+                'transaction_date': '',
+                'billed_amount': 0.0,
+                'currency': 'USD',
+                'payment_due_date': '',
+                'payment_status': 'pending'
+            }
+        )
+
+
+    @staticmethod
+    def new_invoice(amount: float, currency: str, payment_status: str,
+                    now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Invoice fields of a new submission: fresh transaction ID, payment due in 30 days"""
+        now = now or datetime.now()
+        return {
+            'transaction_id': str(uuid.uuid4()),
+            'transaction_date': now.strftime('%Y-%m-%d'),
+            'billed_amount': amount,
+            'currency': currency,
+            'payment_due_date': (now + timedelta(days=30)).strftime('%Y-%m-%d'),
+            'payment_status': payment_status.lower()
+        }
@@ -0,0 +1,177 @@
+# scripts/bench_data.py
+#
+# Seeded synthetic invoice ledgers and KYC books for benchmarks:
+#   python scripts/bench_data.py --rows 100000 [--seed 42] [--out DIR]
+#
+# Writes DIR/data/cust_file.csv (ledger) and DIR/data/kyc_records.csv (KYC book)
+# in the app's own layouts. The same seed and row count always produce the same
+# files. Rows are generated and written in chunks, so 10M-row books never have
+# to fit in memory at once.
+
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config.customer_config import CustomerConfig
+
+CHUNK_ROWS = 200_000
+
+FIRST_NAMES = np.array([
+    'Aisha', 'Rajesh', 'David', 'Fatima', 'Jim', 'Tulsi', 'Omar', 'Priya', 'John', 'Mei',
+    'Carlos', 'Anna', 'Yusuf', 'Sara', 'Ivan', 'Leila', 'Arjun', 'Noor', 'Peter', 'Hana'
+])
+LAST_NAMES = np.array([
+    'Kumar', 'Langer', 'Dow', 'Gadda', 'Khan', 'Ravichandran', 'Smith', 'Chen', 'Garcia', 'Haddad',
+    'Ivanova', 'Mohanty', 'Rahman', 'Silva', 'Nair', 'Suzuki', 'Ali', 'Fischer', 'Patel', 'Mansour'
+])
+# Option values accepted by KYCValidator
+NATIONALITIES = np.array(['UAE', 'India', 'USA', 'UK', 'Pakistan', 'Others'])
+PASSPORT_CODES = np.array(['UAE', 'IND', 'USA', 'GBR', 'PAK', 'OTH'])
+CITIES = np.array(['Dubai', 'Abu Dhabi', 'Sharjah', 'Kolkata', 'Patna', 'Mumbai', 'London', 'Manila'])
+CURRENCIES = np.array(['USD', 'EUR', 'AED', 'INR'])
+PAYMENT_STATUSES = np.array(['pending', 'paid', 'overdue', 'cancelled'])
+PAYMENT_STATUS_WEIGHTS = [0.5, 0.35, 0.1, 0.05]
+KYC_STATUSES = np.array(['Pending', 'Approved', 'Rejected', 'In Review'])
+OCCUPATIONS = np.array(['Service', 'Business', 'Self-Employed', 'Retired', 'Student'])
+PURPOSES = np.array(['Investment', 'Personal Use', 'Rental Income', 'Business', 'Other'])
+FUNDS = np.array(['Salary', 'Business Income', 'Inheritance', 'Savings'])
+PAYMENT_METHODS = np.array(['Bank Transfer', 'Cheque', 'Cash', 'Credit Card'])
+
+BASE_DATE = date(2024, 1, 1)
+
+
+def _iso_dates(rng: np.random.Generator, count: int, start: date, span_days: int) -> np.ndarray:
+    days = rng.integers(0, span_days, size=count)
+    return (np.datetime64(start) + days.astype('timedelta64[D]')).astype(str)
+
+
+def _hex_ids(rng: np.random.Generator, count: int) -> list:
+    """Deterministic UUID-shaped transaction IDs"""
+    high = rng.integers(0, 2**63, size=count, dtype=np.int64)
+    low = rng.integers(0, 2**63, size=count, dtype=np.int64)
+    ids = []
+    for h, l in zip(high.tolist(), low.tolist()):
+        text = f"{h:016x}{l:016x}"
+        ids.append(f"{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}")
+    return ids
+
+
+def ledger_chunk(rng: np.random.Generator, start: int, count: int, customers: int) -> pd.DataFrame:
+    """count ledger rows, on average rows/customers invoices per customer"""
+    customer = rng.integers(0, customers, size=count)
+    first = FIRST_NAMES[customer % len(FIRST_NAMES)]
+    last = LAST_NAMES[(customer // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    transaction_date = _iso_dates(rng, count, BASE_DATE, 730)
+    due_date = (transaction_date.astype('datetime64[D]') + np.timedelta64(30, 'D')).astype(str)
+    return pd.DataFrame({
+        'cust_unique_id': np.char.add('A', np.char.zfill(customer.astype(str), 7)),
+        'cust_tax_id': np.char.add('T', np.char.zfill(customer.astype(str), 7)),
+        'cust_fname': first,
+        'cust_lname': last,
+        'cust_email': np.char.add(np.char.add(np.char.lower(first), '.'), np.char.add(customer.astype(str), '@example.com')),
+        'transaction_id': _hex_ids(rng, count),
+        'transaction_date': transaction_date,
+        'billed_amount': np.round(rng.uniform(10, 50000, size=count), 2),
+        'currency': CURRENCIES[rng.integers(0, len(CURRENCIES), size=count)],
+        'payment_due_date': due_date,
+        'payment_status': rng.choice(PAYMENT_STATUSES, size=count, p=PAYMENT_STATUS_WEIGHTS)
+    })
+
+
+def kyc_chunk(rng: np.random.Generator, start: int, count: int, config: CustomerConfig, year: int) -> pd.DataFrame:
+    """count KYC records with unique customer IDs, passports, Emirates IDs and visa UIDs"""
+    sequence = np.arange(start + 1, start + count + 1)
+    seq_text = sequence.astype(str)
+    nationality = rng.integers(0, len(NATIONALITIES), size=count)
+    first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), size=count)]
+    last = LAST_NAMES[rng.integers(0, len(LAST_NAMES), size=count)]
+    city = CITIES[rng.integers(0, len(CITIES), size=count)]
+    has_dual = rng.random(size=count) < 0.2
+
+    def phone():
+        return rng.integers(10**9, 10**10, size=count).astype(str)
+
+    frame = pd.DataFrame({
+        'customer_id': np.char.add(f"{config.CUSTOMER_ID_PREFIX}{year}", np.char.zfill(seq_text, 3)),
+        'kyc_status': KYC_STATUSES[rng.integers(0, len(KYC_STATUSES), size=count)],
+        'residential_status': np.where(rng.random(size=count) < 0.8, 'Resident', 'Non-Resident'),
+        'full_name': np.char.add(np.char.add(first, ' '), last),
+        'residential_address_line1': np.char.add('Res ', seq_text),
+        'residential_address_line2': city,
+        'home_address_line1': np.char.add('Home ', seq_text),
+        'home_address_line2': NATIONALITIES[nationality],
+        'contact_landline': phone(),
+        'contact_office': phone(),
+        'contact_mobile': phone(),
+        'gender': np.where(rng.random(size=count) < 0.5, 'Male', 'Female'),
+        'nationality': NATIONALITIES[nationality],
+        'date_of_birth': _iso_dates(rng, count, date(1950, 1, 1), 365 * 55),
+        'place_of_birth': city,
+        'passport_number': np.char.add(PASSPORT_CODES[nationality], np.char.zfill(seq_text, 9)),
+        'passport_issue_place': city,
+        'passport_issue_date': _iso_dates(rng, count, date(2015, 1, 1), 365 * 8),
+        'passport_expiry_date': _iso_dates(rng, count, date(2024, 1, 1), 365 * 10),
+        'dual_nationality': np.where(has_dual, 'USA', ''),
+        'dual_passport_number': np.where(has_dual, np.char.add('USA', np.char.zfill(seq_text, 9)), ''),
+        'dual_passport_issue_date': np.where(has_dual, _iso_dates(rng, count, date(2015, 1, 1), 365 * 8), ''),
+        'dual_passport_expiry_date': np.where(has_dual, _iso_dates(rng, count, date(2024, 1, 1), 365 * 10), ''),
+        'emirates_id': np.char.add('784', np.char.zfill(seq_text, 12)),
+        'emirates_id_expiry': _iso_dates(rng, count, date(2024, 1, 1), 365 * 5),
+        'visa_uid': np.char.add('UAEVISA', np.char.zfill(seq_text, 9)),
+        'visa_expiry': _iso_dates(rng, count, date(2024, 1, 1), 365 * 5),
+        'occupation': OCCUPATIONS[rng.integers(0, len(OCCUPATIONS), size=count)],
+        'sponsor_business_name': np.char.add('Company ', (sequence % 997).astype(str)),
+        'sponsor_business_address': city,
+        'sponsor_business_landline': phone(),
+        'sponsor_business_mobile': phone(),
+        'annual_income': rng.integers(20_000, 2_000_000, size=count),
+        'investment_purpose': PURPOSES[rng.integers(0, len(PURPOSES), size=count)],
+        'source_of_funds': FUNDS[rng.integers(0, len(FUNDS), size=count)],
+        'payment_method': PAYMENT_METHODS[rng.integers(0, len(PAYMENT_METHODS), size=count)],
+        'last_updated': f"{year}-01-01 00:00:00"
+    })
+    return frame[config.KYC_CSV_HEADERS]
+
+
+def _write_chunks(path: str, rows: int, make_chunk):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for start in range(0, rows, CHUNK_ROWS):
+        chunk = make_chunk(start, min(CHUNK_ROWS, rows - start))
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def generate(out_dir: str, ledger_rows: int, kyc_rows: int, seed: int = 42, year: int = 2025) -> dict:
+    """Write a ledger and a KYC book under out_dir/data, returns their paths"""
+    config = CustomerConfig()
+    # Separate streams, so the ledger does not change when only the KYC size does
+    ledger_rng, kyc_rng = (np.random.default_rng(stream) for stream in np.random.SeedSequence(seed).spawn(2))
+    customers = max(ledger_rows // 5, 1)
+
+    ledger_file = os.path.join(out_dir, 'data', 'cust_file.csv')
+    kyc_file = os.path.join(out_dir, config.KYC_DATA_FILE)
+    _write_chunks(ledger_file, ledger_rows, lambda start, count: ledger_chunk(ledger_rng, start, count, customers))
+    _write_chunks(kyc_file, kyc_rows, lambda start, count: kyc_chunk(kyc_rng, start, count, config, year))
+    return {'ledger_file': ledger_file, 'kyc_file': kyc_file}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic ledger and KYC data")
+    parser.add_argument('--rows', type=int, default=10_000, help="ledger rows (and KYC rows unless --kyc-rows)")
+    parser.add_argument('--kyc-rows', type=int, help="KYC records, defaults to --rows")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='bench_data', help="directory that receives data/")
+    args = parser.parse_args()
+
+    paths = generate(args.out, args.rows, args.kyc_rows or args.rows, args.seed)
+    for name, path in paths.items():
+        print(f"{name}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+# scripts/benchmark.py
+#
+# Benchmark suite of the invoice and KYC hot paths on seeded synthetic data:
+#   python scripts/benchmark.py [--rows 10000,100000,1000000] [--seed 42]
+#       [--only ledger,kyc_search,customer_id,pdf,workflow] [--json results.json]
+#       [--baseline previous.json --tolerance 0.25]
+#
+# For every row count a ledger and a KYC book are generated (scripts/bench_data.py)
+# into a scratch directory and the benchmarks run in a fresh interpreter with that
+# directory as working directory, so every size starts cold and the repo's own
+# data/ is never touched. The end-to-end workflow benchmark sends its mail to a
+# local SMTP sink (scripts/smtp_sink.py).
+#
+# Results are written as JSON (one entry per benchmark and row count, latencies
+# in ms). With --baseline the medians are compared to an earlier results file and
+# the run fails (exit code 1) when any benchmark is slower than the tolerance.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+BENCHMARK_GROUPS = ['ledger', 'kyc_search', 'customer_id', 'pdf', 'workflow']
+
+
+def summarize(name: str, rows: int, timings: List[float], **extra) -> Dict[str, Any]:
+    """Latency statistics of one benchmark, timings in seconds"""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    result = {
+        'benchmark': name,
+        'rows': rows,
+        'iterations': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'ops_per_second': round(len(ordered) / sum(ordered), 2) if sum(ordered) else None
+    }
+    result.update(extra)
+    return result
+
+
+def measure(name: str, rows: int, fn: Callable[[int], Any], iterations: int, warmup: int = 0, **extra) -> Dict[str, Any]:
+    """Time fn(i) for each iteration after warmup untimed calls"""
+    for i in range(warmup):
+        fn(i)
+    timings = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - started)
+    return summarize(name, rows, timings, **extra)
+
+
+# Worker side: runs inside the scratch directory, imports the app modules there
+
+def bench_ledger(rows: int, args) -> List[Dict[str, Any]]:
+    from modules.data_manager import DataManager
+    from modules.workflow_state import WorkflowState
+
+    data_manager = DataManager()
+    ledger = data_manager.get_all_records()
+    rng = random.Random(args.seed)
+    customer_ids = ledger['cust_unique_id'].sample(n=min(len(ledger), 1000), random_state=args.seed).tolist()
+    transaction_ids = ledger['transaction_id'].sample(n=min(len(ledger), 1000), random_state=args.seed).tolist()
+
+    def save(i):
+        state = WorkflowState.empty()
+        state.customer.update(cust_unique_id=f"B{i:07d}", cust_tax_id=f"T{i:07d}", cust_fname='Bench',
+                              cust_lname='Mark', cust_email='bench@example.com')
+        state.invoice.update(WorkflowState.new_invoice(100 + i, 'USD', 'pending'))
+        data_manager.save_record(state.dict(), WorkflowState)
+
+    return [
+        measure('ledger.read', rows, lambda i: data_manager.get_all_records(), args.iterations),
+        measure('ledger.get_customer', rows,
+                lambda i: data_manager.get_customer(rng.choice(customer_ids), WorkflowState), args.iterations * 4),
+        measure('ledger.check_duplicate', rows,
+                lambda i: data_manager.check_duplicate(rng.choice(customer_ids)), args.iterations),
+        measure('ledger.summary_rebuild', rows,
+                lambda i: data_manager.summary.rebuild(data_manager.csv_file, ledger), args.iterations),
+        measure('ledger.summary_current', rows, lambda i: data_manager.get_receivables_summary(), args.iterations * 4),
+        measure('ledger.save_record', rows, save, args.iterations),
+        measure('ledger.update_payment_status', rows,
+                lambda i: data_manager.update_payment_status(transaction_ids[i % len(transaction_ids)], 'paid'),
+                args.iterations)
+    ]
+
+
+def _kyc_manager():
+    from modules.systems import systems
+    return systems.get('kyc_manager')
+
+
+def bench_kyc_search(rows: int, args) -> List[Dict[str, Any]]:
+    started = time.perf_counter()
+    kyc_manager = _kyc_manager()
+    setup = summarize('kyc.setup', rows, [time.perf_counter() - started],
+                      backend=kyc_manager.config.KYC_STORAGE_BACKEND)
+
+    started = time.perf_counter()
+    df = kyc_manager.read_kyc_data()
+    load = summarize('kyc.load', rows, [time.perf_counter() - started])
+
+    started = time.perf_counter()
+    kyc_manager.search_records('bench-warm-up')
+    index_build = summarize('kyc.search_index_build', rows, [time.perf_counter() - started])
+
+    rng = random.Random(args.seed)
+    sample = df.sample(n=min(len(df), 200), random_state=args.seed)
+    terms = (
+        sample['full_name'].str.split().str[-1].tolist()       # common surname, many hits
+        + sample['passport_number'].str[-6:].tolist()          # ID fragment, few hits
+        + sample['customer_id'].tolist()                       # exact ID
+        + ['no-such-customer']
+    )
+    queries = args.iterations * 20
+    return [
+        setup,
+        load,
+        index_build,
+        measure('kyc.search_records', rows, lambda i: kyc_manager.search_records(rng.choice(terms)), queries),
+        measure('kyc.search_ranked', rows, lambda i: kyc_manager.search_ranked(rng.choice(terms)), queries),
+        measure('kyc.search_page', rows, lambda i: kyc_manager.search_page(rng.choice(terms)), queries)
+    ]
+
+
+def bench_customer_id(rows: int, args) -> List[Dict[str, Any]]:
+    kyc_manager = _kyc_manager()
+    started = time.perf_counter()
+    first = kyc_manager.generate_customer_id()
+    # The first allocation of a year seeds the sequence from the KYC data
+    seeded = summarize('kyc.generate_customer_id_first', rows, [time.perf_counter() - started], customer_id=first)
+    return [
+        seeded,
+        measure('kyc.generate_customer_id', rows, lambda i: kyc_manager.generate_customer_id(), args.iterations * 40)
+    ]
+
+
+def bench_pdf(rows: int, args) -> List[Dict[str, Any]]:
+    from modules.invoice_gen import InvoiceGenerator
+    from modules.workflow_state import WorkflowState
+
+    kyc_manager = _kyc_manager()
+    records = kyc_manager.read_kyc_data().head(args.iterations * 4).to_dict('records')
+    invoice_generator = InvoiceGenerator()
+
+    def invoice_pdf(i):
+        state = WorkflowState.empty()
+        state.customer.update(cust_unique_id=f"B{i:07d}", cust_tax_id=f"T{i:07d}", cust_fname='Bench',
+                              cust_lname='Mark', cust_email='bench@example.com')
+        state.invoice.update(WorkflowState.new_invoice(100 + i, 'USD', 'pending'))
+        invoice_generator.generate_invoice(state.dict())
+
+    return [
+        measure('pdf.invoice', rows, invoice_pdf, args.iterations * 4, warmup=1),
+        measure('pdf.kyc_application', rows,
+                lambda i: kyc_manager.pdf_generator.generate(records[i % len(records)]), args.iterations * 4, warmup=1)
+    ]
+
+
+def bench_workflow(rows: int, args, sink) -> List[Dict[str, Any]]:
+    from concurrent.futures import ThreadPoolExecutor
+    from modules.systems import systems
+    from modules.workflow_state import WorkflowState
+
+    workflow_manager = systems.get('workflow_manager')
+    ledger = systems.get('data_manager').get_all_records()
+    invoices = ledger.sample(n=min(len(ledger), args.invoices), random_state=args.seed).to_dict('records')
+
+    def run(record) -> float:
+        state = WorkflowState(
+            customer={key: record[key] for key in WorkflowState.empty().customer},
+            invoice={key: record[key] for key in WorkflowState.empty().invoice}
+        )
+        started = time.perf_counter()
+        result = workflow_manager.run_workflow(state, force=True)
+        if not result.completed:
+            raise RuntimeError(result.error or "workflow did not complete")
+        return time.perf_counter() - started
+
+    before = sink.stats()['messages']
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        timings = list(pool.map(run, invoices))
+    elapsed = time.perf_counter() - started
+    delivered = sink.stats()['messages'] - before
+
+    result = summarize('workflow.end_to_end', rows, timings, workers=args.workers, delivered=delivered)
+    result['invoices_per_second'] = round(len(invoices) / elapsed, 2)
+    if delivered != len(invoices):
+        result['error'] = f"SMTP sink received {delivered} of {len(invoices)} invoices"
+    return [result]
+
+
+def run_worker(args) -> List[Dict[str, Any]]:
+    from smtp_sink import SMTPSink
+
+    sink = SMTPSink().start()
+    # Mail goes to the sink, never to a real server; set before config is imported
+    os.environ.update(SMTP_HOST='127.0.0.1', SMTP_PORT=str(sink.port), SMTP_STARTTLS='0')
+    os.environ.setdefault('GMAIL_USER', 'bench@example.com')
+    os.environ.pop('GMAIL_APP_PASSWORD', None)
+
+    results = []
+    for group in args.only:
+        print(f"  {group} ...", file=sys.stderr, flush=True)
+        if group == 'workflow':
+            results.extend(bench_workflow(args.rows, args, sink))
+        else:
+            results.extend(globals()[f"bench_{group}"](args.rows, args))
+    sink.shutdown()
+    return results
+
+
+# Orchestrator side
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(rows: int, args, scratch: str) -> List[Dict[str, Any]]:
+    from bench_data import generate
+
+    workdir = os.path.join(scratch, f"rows_{rows}")
+    started = time.perf_counter()
+    generate(workdir, rows, rows, args.seed)
+    print(f"Generated {rows} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    results_file = os.path.join(workdir, 'results.json')
+    env = dict(os.environ, PYTHONPATH=ROOT, KYC_STORAGE_BACKEND=args.kyc_backend,
+               METRICS_TEXTFILE='', LOG_SAMPLE_RATE='0')
+    command = [
+        sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--worker',
+        '--rows', str(rows), '--seed', str(args.seed), '--only', ','.join(args.only),
+        '--iterations', str(args.iterations), '--invoices', str(args.invoices),
+        '--workers', str(args.workers), '--results-file', results_file
+    ]
+    # Repo modules print progress on stdout, keep it out of the report
+    completed = subprocess.run(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmarks for {rows} rows failed (exit code {completed.returncode})")
+    with open(results_file) as f:
+        return json.load(f)
+
+
+def compare(results: List[Dict[str, Any]], baseline_file: str, tolerance: float) -> List[str]:
+    """Benchmarks whose median is slower than the baseline by more than tolerance"""
+    with open(baseline_file) as f:
+        baseline = {(r['benchmark'], r['rows']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['benchmark'], result['rows']))
+        if not previous or not previous['median_ms']:
+            continue
+        ratio = result['median_ms'] / previous['median_ms']
+        result['baseline_median_ms'] = previous['median_ms']
+        result['vs_baseline'] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{result['benchmark']} @ {result['rows']} rows: "
+                               f"{previous['median_ms']} -> {result['median_ms']} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]]):
+    print(f"{'benchmark':34} {'rows':>10} {'n':>5} {'median ms':>11} {'p95 ms':>11} {'ops/s':>10}")
+    for r in results:
+        print(f"{r['benchmark']:34} {r['rows']:>10} {r['iterations']:>5} {r['median_ms']:>11.3f} "
+              f"{r['p95_ms']:>11.3f} {r['ops_per_second'] or 0:>10.1f}"
+              + (f"  ({r['invoices_per_second']} invoices/s)" if 'invoices_per_second' in r else '')
+              + (f"  ERROR: {r['error']}" if 'error' in r else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the invoice and KYC hot paths")
+    parser.add_argument('--rows', default='10000', help="comma-separated row counts, e.g. 10000,100000,10000000")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', default=','.join(BENCHMARK_GROUPS), help="comma-separated benchmark groups")
+    parser.add_argument('--iterations', type=int, default=5, help="base iteration count (cheap operations run more)")
+    parser.add_argument('--invoices', type=int, default=50, help="invoices through the end-to-end workflow")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent end-to-end workflows")
+    parser.add_argument('--kyc-backend', default=os.getenv('KYC_STORAGE_BACKEND', 'sqlite'), choices=['sqlite', 'csv'])
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="earlier results file to compare medians against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown vs the baseline (0.25 = 25%%)")
+    parser.add_argument('--keep-data', action='store_true', help="keep the generated scratch directory")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--results-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.only = [group.strip() for group in args.only.split(',') if group.strip()]
+    unknown = set(args.only) - set(BENCHMARK_GROUPS)
+    if unknown:
+        parser.error(f"unknown benchmark groups: {', '.join(sorted(unknown))}")
+
+    if args.worker:
+        args.rows = int(args.rows)
+        with open(args.results_file, 'w') as f:
+            json.dump(run_worker(args), f)
+        return
+
+    scratch = tempfile.mkdtemp(prefix='invoice_bench_')
+    try:
+        results = []
+        for rows in (int(value) for value in args.rows.split(',')):
+            results.extend(run_size(rows, args, scratch))
+    finally:
+        if args.keep_data:
+            print(f"Benchmark data kept in {scratch}", file=sys.stderr)
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    regressions = compare(results, args.baseline, args.tolerance) if args.baseline else []
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'kyc_backend': args.kyc_backend,
+            'iterations': args.iterations
+        },
+        'results': results,
+        'regressions': regressions
+    }
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    failed = [r for r in results if 'error' in r]
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions or failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+# scripts/load_test.py
+#
+# Load test of the Streamlit handlers under many concurrent sessions:
+#   python scripts/load_test.py [--mode apptest|threads] [--processes 4] [--sessions 2]
+#       [--iterations 5] [--ops submit,generate,overview,kyc_new,kyc_update,kyc_search]
+#       [--rows 1000] [--run-timeout 600] [--json report.json]
+#
+# --processes server-like processes share one data directory, each with
+# --sessions sessions in threads. A session calls one handler per step:
+# handle_submit, handle_generate_invoice and polling of the invoice job, the
+# Overview receivables summary, KYCManager.save_kyc_record for new records and
+# updates, and KYC search of a record it saved.
+#
+# --mode apptest: every session is a streamlit AppTest with its own
+# session_state that runs a small driver script building InvoiceApp like
+# app.py does. AppTest swaps process-wide streamlit state during a rerun, so
+# the reruns of one process take turns (their invoice jobs still run
+# concurrently on the shared JobRunner); concurrent handler calls come from
+# the processes.
+#
+# --mode threads: the sessions of a process make the handlers' calls into the
+# shared systems registry directly from their threads, without AppTest, like
+# the script threads of one Streamlit server. This is what catches in-process
+# races and lock-order deadlocks; sessions still running after --run-timeout
+# are reported as hung, with their stacks.
+#
+# The run works on seeded synthetic data (scripts/bench_data.py) in a scratch
+# directory, with mail going to a local SMTP sink. It reports latency percentiles
+# per handler and checks the files afterwards for lost, duplicated and phantom
+# ledger rows, KYC records and updates, duplicate customer IDs and duplicate
+# deliveries, and that a failed forced resend keeps the earlier delivery
+# recorded. Exit code 1 when an integrity check fails or a session hangs.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import traceback
+import subprocess
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+OPERATIONS = ['submit', 'generate', 'overview', 'kyc_new', 'kyc_update', 'kyc_search']
+MODES = ['apptest', 'threads']
+
+# Ledger customers written by the load test, never present in the synthetic data
+CUSTOMER_PREFIX = 'LT'
+
+# AppTest.run() is not thread-safe (it replaces the global Runtime instance)
+RERUN_LOCK = threading.Lock()
+
+
+def session_script():
+    """Driver run by each AppTest session, one handler call per rerun"""
+    import time
+    import streamlit as st
+    from app import InvoiceApp
+    from modules.receivables_summary import ReceivablesSummary
+
+    app = InvoiceApp()
+    request = st.session_state.get('load_request')
+    if not request:
+        return
+    st.session_state.load_request = None
+
+    result = {'op': request['op']}
+    started = time.perf_counter()
+    if request['op'] == 'submit':
+        app.handle_submit(*request['args'])
+        result['transaction_id'] = app.state.invoice['transaction_id'] if app.state.completed else None
+    elif request['op'] == 'generate':
+        app.handle_generate_invoice(force=False)
+        result['job_id'] = st.session_state.get('invoice_job_id')
+    elif request['op'] == 'poll':
+        # The tab's run_every fragment does this check; AppTest does not run fragment timers
+        from modules.systems import systems
+        if not systems.get('job_runner').is_active(st.session_state.get('invoice_job_id')):
+            app.render_invoice_job()
+        result['done'] = not st.session_state.get('invoice_job_id')
+        result['email'] = app.state.email_notification_status
+    elif request['op'] == 'kyc_save':
+        record = dict(request['record'])
+        ok, message = app.kyc_manager.save_kyc_record(record, update=request['update'])
+        result.update(ok=ok, message=message, customer_id=record.get('customer_id'))
+    elif request['op'] == 'overview':
+        # What render_overview reads
+        summary = app.data_manager.get_receivables_summary()
+        result.update(records=summary['records'], outstanding=len(ReceivablesSummary.totals_frame(summary)),
+                      overdue=ReceivablesSummary.overdue(summary)['count'])
+    elif request['op'] == 'kyc_search':
+        ranked, _ = app.kyc_manager.search_ranked(request['term'])
+        app.kyc_manager.find_similar_names(request['name'])
+        result['found'] = request['customer_id'] in set(ranked['customer_id'])
+    result['seconds'] = time.perf_counter() - started
+    st.session_state.load_result = result
+
+
+class Session:
+    """One simulated operator and what it wrote; subclasses make the handler calls"""
+    def __init__(self, session_id: str, args, kyc_records: List[Dict[str, Any]]):
+        self.session_id = session_id
+        self.args = args
+        self.rng = random.Random(f"{args.seed}-{session_id}")
+        self.kyc_pending = kyc_records
+        self.kyc_saved: Dict[str, Dict[str, Any]] = {}
+        self.samples: List[Dict[str, Any]] = []
+        self.writes = {'transactions': [], 'sent': [], 'kyc_created': [], 'kyc_updates': {}}
+
+
+    def start(self):
+        """Open the session before the start barrier"""
+
+
+    def call(self, op: str, **request) -> Dict[str, Any]:
+        """Run one handler, returns its result with latency and any errors it reported"""
+        raise NotImplementedError
+
+
+    def record(self, op: str, seconds: float, ok: bool, error: str = None):
+        self.samples.append({'op': op, 'seconds': seconds, 'ok': ok, 'error': error})
+
+
+    def submit(self, iteration: int) -> bool:
+        customer_id = f"{CUSTOMER_PREFIX}{self.session_id}-{iteration}"
+        amount = round(self.rng.uniform(10, 5000), 2)
+        result = self.call('submit', args=[customer_id, f"T{customer_id}", 'Load', 'Test',
+                                           'load.test@example.com', amount, 'USD', 'pending'])
+        ok = bool(result.get('transaction_id')) and not result['errors']
+        self.record('submit', result.get('seconds', result['rerun_seconds']), ok, '; '.join(result['errors']) or None)
+        if ok:
+            self.writes['transactions'].append(result['transaction_id'])
+        return ok
+
+
+    def generate(self):
+        started = time.perf_counter()
+        result = self.call('generate')
+        self.record('generate', result.get('seconds', result['rerun_seconds']),
+                    bool(result.get('job_id')) and not result['errors'], '; '.join(result['errors']) or None)
+        if not result.get('job_id'):
+            return
+
+        # Poll like the tab's fragment does until the job has been applied
+        deadline = started + self.args.timeout
+        while time.perf_counter() < deadline:
+            time.sleep(self.args.poll_seconds)
+            result = self.call('poll')
+            if result.get('done'):
+                sent = bool(result.get('email') and result['email'].get('is_sent')) and not result['errors']
+                self.record('generate_completed', time.perf_counter() - started, sent,
+                            '; '.join(result['errors']) or None)
+                if sent:
+                    self.writes['sent'].append(self.writes['transactions'][-1])
+                return
+        self.record('generate_completed', time.perf_counter() - started, False, "timed out")
+
+
+    def kyc_new(self) -> None:
+        record = self.kyc_pending.pop()
+        result = self.call('kyc_save', record=record, update=False)
+        ok = bool(result.get('ok'))
+        self.record('kyc_new', result.get('seconds', result['rerun_seconds']), ok,
+                    None if ok else result.get('message') or '; '.join(result['errors']))
+        if ok:
+            self.writes['kyc_created'].append({'customer_id': result['customer_id'],
+                                               'passport_number': record['passport_number']})
+            self.kyc_saved[result['customer_id']] = dict(record, customer_id=result['customer_id'])
+
+
+    def kyc_update(self, iteration: int) -> None:
+        if not self.kyc_saved:
+            return
+        customer_id = self.rng.choice(sorted(self.kyc_saved))
+        marker = f"{CUSTOMER_PREFIX}{self.session_id}-{iteration}"
+        result = self.call('kyc_save', record=dict(self.kyc_saved[customer_id], sponsor_business_name=marker), update=True)
+        ok = bool(result.get('ok'))
+        self.record('kyc_update', result.get('seconds', result['rerun_seconds']), ok,
+                    None if ok else result.get('message') or '; '.join(result['errors']))
+        if ok:
+            # Each session only edits its own records, so the last marker must win
+            self.writes['kyc_updates'][customer_id] = marker
+
+
+    def overview(self) -> None:
+        result = self.call('overview')
+        self.record('overview', result.get('seconds', result['rerun_seconds']), not result['errors'],
+                    '; '.join(result['errors']) or None)
+
+
+    def kyc_search(self) -> None:
+        if not self.kyc_saved:
+            return
+        record = self.kyc_saved[self.rng.choice(sorted(self.kyc_saved))]
+        result = self.call('kyc_search', term=record['passport_number'], name=record['full_name'],
+                           customer_id=record['customer_id'])
+        # A session must find what it saved itself
+        errors = result['errors'] or ([] if result.get('found') else ["saved record not found"])
+        self.record('kyc_search', result.get('seconds', result['rerun_seconds']), not errors,
+                    '; '.join(errors) or None)
+
+
+    def run(self, start_barrier: threading.Barrier):
+        self.start()
+        start_barrier.wait()
+        for iteration in range(self.args.iterations):
+            submitted = 'submit' in self.args.ops and self.submit(iteration)
+            if submitted and 'generate' in self.args.ops:
+                self.generate()
+            if 'overview' in self.args.ops:
+                self.overview()
+            if 'kyc_new' in self.args.ops:
+                self.kyc_new()
+            if 'kyc_update' in self.args.ops:
+                self.kyc_update(iteration)
+            if 'kyc_search' in self.args.ops:
+                self.kyc_search()
+
+
+class AppTestSession(Session):
+    """A session driven through streamlit AppTest reruns of session_script"""
+    def __init__(self, session_id: str, args, kyc_records: List[Dict[str, Any]]):
+        from streamlit.testing.v1 import AppTest
+
+        super().__init__(session_id, args, kyc_records)
+        self.app = AppTest.from_function(session_script, default_timeout=args.timeout)
+
+
+    def start(self):
+        with RERUN_LOCK:
+            self.app.run()
+
+
+    def call(self, op: str, **request) -> Dict[str, Any]:
+        """Run one handler in a rerun, returns its result with latency and any st.error"""
+        self.app.session_state['load_request'] = dict(request, op=op)
+        started = time.perf_counter()
+        with RERUN_LOCK:
+            self.app.run()
+        wall = time.perf_counter() - started
+        result = self.app.session_state['load_result'] if 'load_result' in self.app.session_state else {}
+        errors = [element.value for element in self.app.error] + [element.message for element in self.app.exception]
+        if not result:
+            errors = errors or ["rerun returned no result"]
+        self.app.session_state['load_result'] = None
+        return dict(result or {}, op=op, rerun_seconds=wall, errors=errors)
+
+
+class ThreadSession(Session):
+    """
+    A session whose thread makes the handlers' calls into the shared systems
+    registry itself, like a script thread of the Streamlit server would.
+    Errors the handlers would show with st.error are returned instead.
+    """
+    def __init__(self, session_id: str, args, kyc_records: List[Dict[str, Any]]):
+        from modules.workflow_state import WorkflowState
+
+        super().__init__(session_id, args, kyc_records)
+        self.state = WorkflowState.empty()
+        self.job_id = None
+        self.job_transaction_id = None
+
+
+    def call(self, op: str, **request) -> Dict[str, Any]:
+        from app import InvoiceApp
+        from modules.validator import DataValidator
+        from modules.workflow_state import WorkflowState
+        from modules.receivables_summary import ReceivablesSummary
+        from modules.systems import systems
+
+        result, errors = {}, []
+        started = time.perf_counter()
+        try:
+            if op == 'submit':
+                # handle_submit
+                InvoiceApp.update_state(self, *request['args'])
+                validation_result = DataValidator().validate_workflow_state(self.state.dict())
+                if validation_result is not None:
+                    errors.append(f"Validation failed: {validation_result}")
+                else:
+                    updated_state = systems.get('data_manager').save_record(self.state.dict(), WorkflowState)
+                    if updated_state:
+                        self.state.customer.update(updated_state.customer)
+                        self.state.invoice.update(updated_state.invoice)
+                        self.state.completed = updated_state.completed
+                        result['transaction_id'] = self.state.invoice['transaction_id']
+                    else:
+                        errors.append("Failed to save record")
+            elif op == 'generate':
+                # handle_generate_invoice
+                self.job_id = systems.get('job_runner').submit(
+                    'invoice', InvoiceApp.run_invoice_workflow, self.state.copy(deep=True), force=False
+                )
+                self.job_transaction_id = self.state.invoice['transaction_id']
+                result['job_id'] = self.job_id
+            elif op == 'poll':
+                # render_invoice_job and apply_invoice_result
+                job_runner = systems.get('job_runner')
+                job = job_runner.status(self.job_id)
+                if job is None or job['status'] not in job_runner.ACTIVE:
+                    self.job_id = None
+                    if job is not None and job['status'] == 'failed':
+                        errors.append(f"Workflow execution failed: {job['error']}")
+                    elif job is not None and job['result'] is None:
+                        errors.append("Invoice generation finished without a result")
+                    elif job is not None and job['result'].error:
+                        errors.append(job['result'].error)
+                    elif job is not None and self.state.invoice['transaction_id'] == self.job_transaction_id:
+                        self.state = job['result']
+                result['done'] = self.job_id is None
+                result['email'] = self.state.email_notification_status
+            elif op == 'kyc_save':
+                record = dict(request['record'])
+                ok, message = systems.get('kyc_manager').save_kyc_record(record, update=request['update'])
+                result.update(ok=ok, message=message, customer_id=record.get('customer_id'))
+            elif op == 'overview':
+                # render_overview
+                summary = systems.get('data_manager').get_receivables_summary()
+                result.update(records=summary['records'], outstanding=len(ReceivablesSummary.totals_frame(summary)),
+                              overdue=ReceivablesSummary.overdue(summary)['count'])
+            elif op == 'kyc_search':
+                kyc_manager = systems.get('kyc_manager')
+                ranked, _ = kyc_manager.search_ranked(request['term'])
+                kyc_manager.find_similar_names(request['name'])
+                result['found'] = request['customer_id'] in set(ranked['customer_id'])
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {str(e)}")
+        seconds = time.perf_counter() - started
+        return dict(result, op=op, seconds=seconds, rerun_seconds=seconds, errors=errors)
+
+
+def new_kyc_records(count: int, offset: int, seed: int) -> List[Dict[str, Any]]:
+    """Valid KYC form data with passports and IDs outside the synthetic book"""
+    import numpy as np
+    from bench_data import kyc_chunk
+    from config.customer_config import CustomerConfig
+
+    frame = kyc_chunk(np.random.default_rng(seed + offset), offset, count, CustomerConfig(), datetime.now().year)
+    frame = frame.drop(columns=['customer_id', 'kyc_status', 'last_updated'])
+    return [{key: ('' if value is None else value) for key, value in record.items()}
+            for record in frame.astype(object).to_dict('records')]
+
+
+def run_worker(args) -> Dict[str, Any]:
+    """Run args.sessions sessions in threads of this process"""
+    session_class = ThreadSession if args.mode == 'threads' else AppTestSession
+    if args.mode == 'threads':
+        # What InvoiceApp.init_systems does on the first rerun of the server
+        from modules.systems import systems
+        systems.warm_up(['metrics_exporter', 'kyc_manager'])
+
+    sessions = []
+    for i in range(args.sessions):
+        session_id = f"{args.process_index}.{i}"
+        offset = 10_000_000 + (args.process_index * args.sessions + i) * 10_000
+        sessions.append(session_class(session_id, args, new_kyc_records(args.iterations, offset, args.seed)))
+
+    barrier = threading.Barrier(len(sessions) + 1)
+    failures = []
+
+    def run(session):
+        try:
+            session.run(barrier)
+        except Exception as e:
+            failures.append(f"session {session.session_id}: {str(e)}")
+            barrier.abort()
+
+    # Daemon threads, a hung session must not keep the worker from reporting
+    threads = [threading.Thread(target=run, args=(session,), name=f"load-{session.session_id}", daemon=True)
+               for session in sessions]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    deadline = started + args.run_timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.perf_counter()))
+
+    frames = sys._current_frames()
+    hung = [thread for thread in threads if thread.is_alive()]
+    for thread in hung:
+        stack = ''.join(traceback.format_stack(frames[thread.ident])[-4:]) if thread.ident in frames else ''
+        failures.append(f"{thread.name} did not finish within {args.run_timeout}s:\n{stack}")
+
+    return {
+        'elapsed_seconds': time.perf_counter() - started,
+        # Samples and writes of hung sessions are still checked, up to where they got
+        'samples': [sample for session in sessions for sample in list(session.samples)],
+        'writes': [session.writes for session in sessions],
+        'failures': failures,
+        'hung': len(hung)
+    }
+
+
+# Orchestrator side
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000, 2)
+    return {'p50_ms': pick(0.5), 'p90_ms': pick(0.9), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99),
+            'max_ms': round(ordered[-1] * 1000, 2)}
+
+
+def latency_report(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    report = {}
+    for op in sorted({sample['op'] for sample in samples}):
+        op_samples = [sample for sample in samples if sample['op'] == op]
+        errors = Counter(sample['error'] for sample in op_samples if not sample['ok'])
+        report[op] = dict(
+            count=len(op_samples),
+            failed=sum(errors.values()),
+            per_second=round(len(op_samples) / elapsed, 2) if elapsed else None,
+            **percentiles([sample['seconds'] for sample in op_samples]),
+            top_errors=[[error, count] for error, count in errors.most_common(3)]
+        )
+    return report
+
+
+def check_integrity(writes: List[Dict[str, Any]], sink_stats: Dict[str, int], kyc_backend: str) -> Dict[str, Any]:
+    """Compare what the sessions were told was saved with what is on disk"""
+    import pandas as pd
+    from config.customer_config import CustomerConfig
+    from modules.kyc_store import create_kyc_store
+
+    issues: Dict[str, Any] = {}
+
+    def report(name: str, items):
+        items = sorted(items)
+        if items:
+            issues[name] = {'count': len(items), 'sample': items[:5]}
+
+    # Ledger: every acknowledged submit exactly once, nothing unacknowledged
+    ledger = pd.read_csv('data/cust_file.csv', dtype=str)
+    ledger = ledger[ledger['cust_unique_id'].str.startswith(CUSTOMER_PREFIX, na=False)]
+    acknowledged = [tid for w in writes for tid in w['transactions']]
+    on_disk = Counter(ledger['transaction_id'])
+    report('ledger_lost_rows', set(acknowledged) - set(on_disk))
+    report('ledger_duplicate_rows', [tid for tid, count in on_disk.items() if count > 1])
+    report('ledger_phantom_rows', set(on_disk) - set(acknowledged))
+    report('ledger_duplicate_acknowledgements', [tid for tid, count in Counter(acknowledged).items() if count > 1])
+
+    # Deliveries: each acknowledged send recorded once and received by the sink
+    sent = [tid for w in writes for tid in w['sent']]
+    send_ledger = pd.read_csv('data/send_ledger.csv', dtype=str) if os.path.exists('data/send_ledger.csv') else pd.DataFrame(columns=['transaction_id', 'status'])
+    # Reservations and releases are logged too, only deliveries count
+    recorded = Counter(send_ledger.loc[send_ledger['status'] == 'sent', 'transaction_id'])
+    report('send_ledger_lost', set(sent) - set(recorded))
+    report('send_ledger_duplicates', [tid for tid in set(sent) if recorded[tid] > 1])
+    if sink_stats['messages'] != len(sent):
+        issues['smtp_sink_mismatch'] = {'sent': len(sent), 'received': sink_stats['messages']}
+
+    # KYC: created records present once, with the customer ID they were given; last update wins
+    config = CustomerConfig()
+    config.KYC_STORAGE_BACKEND = kyc_backend
+    kyc = create_kyc_store(config).load()
+    created = [c for w in writes for c in w['kyc_created']]
+    ids_on_disk = Counter(kyc['customer_id'])
+    report('kyc_duplicate_ids_issued', [cid for cid, count in Counter(c['customer_id'] for c in created).items() if count > 1])
+    report('kyc_lost_records', {c['customer_id'] for c in created} - set(ids_on_disk))
+    report('kyc_duplicate_records', [cid for cid, count in ids_on_disk.items() if count > 1])
+    passports = kyc.set_index('customer_id')['passport_number'].to_dict() if ids_on_disk else {}
+    report('kyc_wrong_record', [c['customer_id'] for c in created
+                                if c['customer_id'] in passports and passports[c['customer_id']] != c['passport_number']])
+    markers = kyc.drop_duplicates('customer_id', keep='last').set_index('customer_id')['sponsor_business_name'].to_dict()
+    report('kyc_lost_updates', [cid for w in writes for cid, marker in w['kyc_updates'].items()
+                                if cid in markers and markers[cid] != marker])
+    return issues
+
+
+def check_resend_recovery() -> Dict[str, Any]:
+    """
+    A delivery stays recorded when a forced resend of it fails: the next
+    normal run must skip the invoice, in this process and after a reload
+    """
+    from modules.send_ledger import SendLedger
+
+    ledger_file = 'data/send_ledger_resend_check.csv'
+    delivery = ('LT-resend', 'v1', 'load.test@example.com')
+    ledger = SendLedger(ledger_file)
+    ledger.reserve(*delivery)
+    sent_at = ledger.record_sent(*delivery)
+    forced, _ = ledger.reserve(*delivery, force=True)
+    ledger.release(*delivery)
+
+    outcomes = {
+        'forced_resend_reserved': forced,
+        'normal_run': ledger.reserve(*delivery),
+        'reloaded_normal_run': SendLedger(ledger_file).reserve(*delivery),
+        'sent_at': ledger.get_sent_at(*delivery)
+    }
+    expected = {'forced_resend_reserved': True, 'normal_run': (False, sent_at),
+                'reloaded_normal_run': (False, sent_at), 'sent_at': sent_at}
+    if outcomes != expected:
+        return {'send_ledger_resend_recovery': {'expected': expected, 'got': outcomes}}
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Streamlit handlers from concurrent sessions")
+    parser.add_argument('--mode', default='apptest', choices=MODES,
+                        help="drive sessions through AppTest reruns or call the handlers from threads directly")
+    parser.add_argument('--processes', type=int, default=4, help="processes sharing the data directory")
+    parser.add_argument('--sessions', type=int, default=2, help="sessions per process")
+    parser.add_argument('--iterations', type=int, default=5, help="rounds of --ops per session")
+    parser.add_argument('--ops', default=','.join(OPERATIONS), help="comma-separated operations per round")
+    parser.add_argument('--rows', type=int, default=1000, help="synthetic ledger and KYC rows to start from")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--kyc-backend', default=os.getenv('KYC_STORAGE_BACKEND', 'sqlite'), choices=['sqlite', 'csv'])
+    parser.add_argument('--poll-seconds', type=float, default=0.05, help="invoice job polling interval")
+    parser.add_argument('--timeout', type=float, default=120, help="per rerun and per invoice job")
+    parser.add_argument('--run-timeout', type=float, default=600,
+                        help="sessions of a process still running after this are reported as hung")
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--keep-data', action='store_true', help="keep the scratch data directory")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--process-index', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--results-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.ops = [op.strip() for op in args.ops.split(',') if op.strip()]
+    unknown = set(args.ops) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+
+    if args.worker:
+        result = run_worker(args)
+        with open(args.results_file, 'w') as f:
+            json.dump(result, f, default=str)
+        if result['hung']:
+            # Hung threads may hold locks that interpreter shutdown would wait for
+            sys.stdout.flush()
+            os._exit(0)
+        return
+
+    from bench_data import generate
+    from smtp_sink import SMTPSink
+
+    scratch = tempfile.mkdtemp(prefix='invoice_load_')
+    sink = SMTPSink().start()
+    env = dict(os.environ, PYTHONPATH=ROOT, KYC_STORAGE_BACKEND=args.kyc_backend, METRICS_TEXTFILE='',
+               LOG_SAMPLE_RATE='0', SMTP_HOST='127.0.0.1', SMTP_PORT=str(sink.port), SMTP_STARTTLS='0',
+               GMAIL_USER=os.getenv('GMAIL_USER', 'load.test@example.com'))
+    env.pop('GMAIL_APP_PASSWORD', None)
+
+    try:
+        generate(scratch, args.rows, args.rows, args.seed)
+        print(f"{args.mode}: {args.processes} process(es) x {args.sessions} sessions x {args.iterations} rounds of "
+              f"{','.join(args.ops)} on {args.rows} rows ({args.kyc_backend} KYC store)", file=sys.stderr)
+
+        workers = []
+        for index in range(args.processes):
+            results_file = os.path.join(scratch, f"results_{index}.json")
+            command = [
+                sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--worker', '--mode', args.mode,
+                '--process-index', str(index), '--results-file', results_file,
+                '--sessions', str(args.sessions), '--iterations', str(args.iterations), '--ops', ','.join(args.ops),
+                '--seed', str(args.seed), '--poll-seconds', str(args.poll_seconds), '--timeout', str(args.timeout),
+                '--run-timeout', str(args.run_timeout)
+            ]
+            # Repo modules and streamlit print on stdout/stderr, keep them out of the report
+            workers.append((subprocess.Popen(command, cwd=scratch, env=env, stdout=subprocess.DEVNULL,
+                                             stderr=subprocess.DEVNULL), results_file))
+
+        samples, writes, failures, elapsed = [], [], [], 0.0
+        for process, results_file in workers:
+            try:
+                process.wait(timeout=args.run_timeout + 60)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                failures.append(f"worker did not exit within {args.run_timeout + 60}s")
+                continue
+            if process.returncode != 0:
+                failures.append(f"worker exited with code {process.returncode}")
+                continue
+            with open(results_file) as f:
+                result = json.load(f)
+            samples.extend(result['samples'])
+            writes.extend(result['writes'])
+            failures.extend(result['failures'])
+            elapsed = max(elapsed, result['elapsed_seconds'])
+
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            integrity = check_integrity(writes, sink.stats(), args.kyc_backend)
+            integrity.update(check_resend_recovery())
+        finally:
+            os.chdir(cwd)
+    finally:
+        sink.shutdown()
+        if args.keep_data:
+            print(f"Load test data kept in {scratch}", file=sys.stderr)
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'mode': args.mode,
+            'processes': args.processes,
+            'sessions_per_process': args.sessions,
+            'iterations': args.iterations,
+            'ops': args.ops,
+            'rows': args.rows,
+            'kyc_backend': args.kyc_backend,
+            'elapsed_seconds': round(elapsed, 2)
+        },
+        'latency': latency_report(samples, elapsed) if samples else {},
+        'integrity': integrity,
+        'failures': failures
+    }
+
+    print(f"{'operation':20} {'count':>6} {'failed':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for op, stats in report['latency'].items():
+        print(f"{op:20} {stats['count']:>6} {stats['failed']:>6} {stats['p50_ms']:>9.1f} "
+              f"{stats['p90_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+        for error, count in stats['top_errors']:
+            print(f"    {count} x {error}")
+    for name, issue in integrity.items():
+        print(f"INTEGRITY {name}: {issue}")
+    for failure in failures:
+        print(f"FAILURE {failure}")
+    if not integrity and not failures:
+        print("Integrity checks passed")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.json}")
+    if integrity or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
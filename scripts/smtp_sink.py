@@ -0,0 +1,113 @@
+# scripts/smtp_sink.py
+#
+# Local SMTP server that accepts and discards every message, for benchmarks and
+# load tests that must not reach a real mail server:
+#   python scripts/smtp_sink.py [--port 8025]
+# and point the app at it with SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=0.
+#
+# Speaks just enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP,
+# QUIT), without TLS or authentication.
+
+import argparse
+import threading
+import socketserver
+from typing import Dict
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+
+    def handle(self):
+        self.reply("220 smtp-sink ready")
+        recipients = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip().split(' ', 1)[0].upper()
+
+            if command == 'EHLO':
+                self.reply("250-smtp-sink")
+                self.reply("250 8BITMIME")
+            elif command in ('HELO', 'MAIL', 'NOOP'):
+                self.reply("250 OK")
+            elif command == 'RCPT':
+                recipients += 1
+                self.reply("250 OK")
+            elif command == 'RSET':
+                recipients = 0
+                self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+                self.server.record(recipients, size)
+                recipients = 0
+                self.reply("250 OK queued")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Counts delivered messages, recipients and bytes; port 0 picks a free port"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), SMTPSinkHandler)
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.recipients = 0
+        self.bytes = 0
+
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+    def record(self, recipients: int, size: int):
+        with self._lock:
+            self.messages += 1
+            self.recipients += recipients
+            self.bytes += size
+
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'messages': self.messages, 'recipients': self.recipients, 'bytes': self.bytes}
+
+
+    def start(self) -> 'SMTPSink':
+        """Serve in a daemon thread"""
+        threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{sink.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Received: {sink.stats()}")
+        sink.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# scripts/startup_profile.py
+#
+# Cold-start profile of the Streamlit app, e.g. in CI:
+#   python scripts/startup_profile.py [--runs 5] [--budget-ms 1500] [--json report.json]
+#
+# Imports app.py in fresh interpreters with -X importtime, reports the slowest
+# imports and fails (exit code 1) when the import time exceeds the budget or
+# when a subsystem that must load lazily was imported at startup.
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget for `import app`, override with APP_COLD_START_BUDGET_MS
+COLD_START_BUDGET_MS = float(os.getenv('APP_COLD_START_BUDGET_MS', 1500))
+
+# Loaded only when a workflow runs or a PDF is generated, never at startup
+LAZY_MODULES = ['langgraph', 'reportlab', 'smtplib']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def profile_once() -> List[Dict[str, Any]]:
+    """Import app in a fresh interpreter, returns one entry per imported module"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                'module': module,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                # importtime indents nested imports by two spaces per level
+                'depth': (len(indent) - 1) // 2
+            })
+    return entries
+
+
+def app_subtree(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Modules imported by `import app`, without the interpreter's own startup imports"""
+    # importtime lists children before their parent, so app's imports are the
+    # nested lines directly above it
+    end = next(i for i, e in enumerate(entries) if e['module'] == 'app' and e['depth'] == 0)
+    start = end
+    while start > 0 and entries[start - 1]['depth'] > 0:
+        start -= 1
+    return entries[start:end + 1]
+
+
+def build_report(runs: int, budget_ms: float, top: int) -> Dict[str, Any]:
+    samples = [app_subtree(profile_once()) for _ in range(runs)]
+    totals = [entries[-1]['cumulative_ms'] for entries in samples]
+
+    # Slowest top-level imports of the fastest run (the least noisy one)
+    fastest = samples[totals.index(min(totals))]
+    top_level = sorted((e for e in fastest if e['depth'] == 1), key=lambda e: e['cumulative_ms'], reverse=True)
+
+    imported = {e['module'] for e in fastest}
+    eager = [name for name in LAZY_MODULES if any(m == name or m.startswith(f"{name}.") for m in imported)]
+
+    return {
+        'runs': runs,
+        'import_ms': {'min': min(totals), 'max': max(totals), 'median': sorted(totals)[len(totals) // 2]},
+        'budget_ms': budget_ms,
+        'modules_imported': len(imported),
+        'slowest_imports': [
+            {'module': e['module'], 'cumulative_ms': round(e['cumulative_ms'], 1)} for e in top_level[:top]
+        ],
+        'eager_lazy_modules': eager,
+        'within_budget': min(totals) <= budget_ms and not eager
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile and enforce the app cold-start budget")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to sample")
+    parser.add_argument('--budget-ms', type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=15, help="slowest top-level imports to report")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = build_report(args.runs, args.budget_ms, args.top)
+
+    print(f"import app: {report['import_ms']['min']:.0f} ms min / {report['import_ms']['median']:.0f} ms median "
+          f"over {report['runs']} runs (budget {report['budget_ms']:.0f} ms), "
+          f"{report['modules_imported']} modules")
+    print("Slowest top-level imports:")
+    for entry in report['slowest_imports']:
+        print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if report['eager_lazy_modules']:
+        print(f"FAIL: imported at startup but must load lazily: {', '.join(report['eager_lazy_modules'])}")
+    if report['import_ms']['min'] > report['budget_ms']:
+        print(f"FAIL: cold start over budget by {report['import_ms']['min'] - report['budget_ms']:.0f} ms")
+    sys.exit(0 if report['within_budget'] else 1)
+
+
+if __name__ == "__main__":
+    main()